@@ -0,0 +1,57 @@
+"""
+Benchmark for the batch recording methods.
+
+Compares a Python loop over Histogram.add, Timer._update and Meter.mark
+with a single add_many, update_many and mark_many call. Run from the
+repository root:
+
+    PYTHONPATH=. python benchmarks/bulk_recording.py
+"""
+from __future__ import print_function
+import random
+import time
+from array import array
+
+from pyformance.meters import Histogram, Meter, Timer
+
+BATCH = 100000
+
+
+def best_of(fn, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        fn()
+        elapsed = time.time() - start
+        best = elapsed if best is None or elapsed < best else best
+    return best
+
+
+def compare(name, make, single, many, values):
+    def loop():
+        metric = make()
+        method = getattr(metric, single)
+        for value in values:
+            method(value)
+
+    def batch():
+        getattr(make(), many)(values)
+
+    looped = best_of(loop)
+    batched = best_of(batch)
+    print("%-28s %10.1f ms %10.1f ms %8.1fx" % (
+        name, looped * 1e3, batched * 1e3, looped / batched))
+
+
+def main():
+    values = array("d", (random.expovariate(10.0) for i in range(BATCH)))
+    print("%-28s %13s %13s %9s" % ("%d values" % BATCH, "loop", "batch",
+                                    "speedup"))
+    compare("Histogram add/add_many", Histogram, "add", "add_many", values)
+    compare("Timer _update/update_many", Timer, "_update", "update_many",
+            values)
+    compare("Meter mark/mark_many", Meter, "mark", "mark_many", values)
+
+
+if __name__ == "__main__":
+    main()
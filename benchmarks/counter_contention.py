@@ -0,0 +1,49 @@
+"""
+Contention benchmark for Counter and StripedCounter.
+
+Every thread increments the same counter; the total throughput is printed
+for a growing number of threads. Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/counter_contention.py
+"""
+from __future__ import print_function
+import threading
+import time
+
+from pyformance.meters import Counter, StripedCounter
+
+OPS_PER_THREAD = 200000
+THREADS = (1, 2, 4, 8, 16, 32)
+
+
+def run(counter, threads, ops=OPS_PER_THREAD):
+    barrier = threading.Event()
+
+    def work():
+        inc = counter.inc
+        barrier.wait()
+        for i in range(ops):
+            inc()
+
+    workers = [threading.Thread(target=work) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    start = time.time()
+    barrier.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.time() - start
+    assert counter.get_count() == threads * ops
+    return threads * ops / elapsed
+
+
+def main():
+    print("%8s %16s %16s" % ("threads", "Counter ops/s", "Striped ops/s"))
+    for threads in THREADS:
+        print("%8d %16d %16d" % (threads,
+                                 run(Counter(), threads),
+                                 run(StripedCounter(), threads)))
+
+
+if __name__ == "__main__":
+    main()
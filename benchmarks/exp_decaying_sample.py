@@ -0,0 +1,62 @@
+"""
+Benchmark for ExpDecayingSample and ArrayExpDecayingSample.
+
+Prints the cost per update with a full reservoir and the memory held by a
+reservoir after it has seen many more values than it keeps. Run from the
+repository root:
+
+    PYTHONPATH=. python benchmarks/exp_decaying_sample.py
+"""
+from __future__ import print_function
+import random
+import time
+import tracemalloc
+
+from pyformance.stats.samples import ExpDecayingSample, ArrayExpDecayingSample
+
+SIZE = 1028
+UPDATES = 200000
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+def fill(sample, clock, values):
+    for value in values:
+        # one millisecond per update so newer values gain priority
+        clock.now += 0.001
+        sample.update(value)
+
+
+def run(cls):
+    values = [random.random() for i in range(UPDATES)]
+    clock = FakeClock()
+    sample = cls(SIZE, clock=clock)
+    start = time.time()
+    fill(sample, clock, values)
+    elapsed = time.time() - start
+
+    clock = FakeClock()
+    tracemalloc.start()
+    sample = cls(SIZE, clock=clock)
+    fill(sample, clock, values)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed * 1e9 / UPDATES, memory
+
+
+def main():
+    print("%-24s %10s %14s" % ("size %d" % SIZE, "ns/update", "bytes held"))
+    for cls in (ExpDecayingSample, ArrayExpDecayingSample):
+        cost, memory = run(cls)
+        print("%-24s %10.0f %14d" % (cls.__name__, cost, memory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Memory overhead benchmark for Histogram.add.
+
+Uses tracemalloc to measure the peak memory taken, even briefly, by each
+add once the histogram is in a steady state, and compares it with the
+peak of the sample's own update. The floats of the running statistics
+come from the interpreter's free list, so they do not raise the peak.
+Fails if Histogram.add takes more than the sample it wraps, or if it
+takes anything with a SlidingWindowSample; the reservoir samples draw
+random ints and push new entries, so their updates allocate. Needs
+Python 3.9 or later for tracemalloc.reset_peak. Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/histogram_add_overhead.py
+"""
+from __future__ import print_function
+import collections
+import tracemalloc
+
+from pyformance.meters import Histogram
+from pyformance.stats.samples import ExpDecayingSample, SlidingWindowSample
+from pyformance.stats.samples import UniformSample
+
+SIZE = 1028
+UPDATES = 20000
+
+
+def peak_per_call(record):
+    "the most common peak of traced memory during one call, in bytes"
+    values = [float(i % 1000) for i in range(UPDATES)]
+    # reach the steady state: full reservoirs, warm free lists
+    for value in values:
+        record(value)
+    sizes = collections.Counter()
+    get_traced_memory = tracemalloc.get_traced_memory
+    reset_peak = tracemalloc.reset_peak
+    tracemalloc.start()
+    try:
+        for value in values:
+            before = get_traced_memory()[0]
+            reset_peak()
+            record(value)
+            sizes[get_traced_memory()[1] - before] += 1
+    finally:
+        tracemalloc.stop()
+    return sizes.most_common(1)[0][0]
+
+
+if __name__ == "__main__":
+    for cls in (SlidingWindowSample, UniformSample, ExpDecayingSample):
+        sample = peak_per_call(cls(SIZE).update)
+        histogram = peak_per_call(Histogram(sample=cls(SIZE)).add)
+        print("%-20s sample %4d bytes, histogram overhead %4d bytes per add"
+              % (cls.__name__, sample, histogram - sample))
+        assert histogram == sample, "Histogram.add has an overhead"
+        if cls is SlidingWindowSample:
+            assert histogram == 0, "Histogram.add allocates"
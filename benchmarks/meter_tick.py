@@ -0,0 +1,58 @@
+"""
+Benchmark for ticking the moving averages of a Meter.
+
+Compares a Meter with five periods, whose rates are decayed together in
+one tick, with five separate ExpWeightedMovingAvg instances which each
+tick and call math.exp on their own. Every round marks, advances the
+clock by one tick interval and reads all rates. Run from the repository
+root:
+
+    PYTHONPATH=. python benchmarks/meter_tick.py
+"""
+from __future__ import print_function
+import time
+
+from pyformance.meters import Meter
+from pyformance.stats.moving_average import ExpWeightedMovingAvg
+
+PERIODS = (10, 60, 300, 900, 3600)
+ROUNDS = 100000
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+def run_meter():
+    clock = FakeClock()
+    meter = Meter(clock=clock, periods=PERIODS)
+    start = time.time()
+    for i in range(ROUNDS):
+        meter.mark()
+        clock.now += Meter.INTERVAL
+        meter.get_rates()
+    return time.time() - start
+
+
+def run_averages():
+    clock = FakeClock()
+    averages = [ExpWeightedMovingAvg(period / 60.0, clock=clock)
+                for period in PERIODS]
+    start = time.time()
+    for i in range(ROUNDS):
+        for average in averages:
+            average.add(1)
+        clock.now += ExpWeightedMovingAvg.INTERVAL
+        [average.get_rate() for average in averages]
+    return time.time() - start
+
+
+if __name__ == "__main__":
+    for name, run in (("Meter", run_meter),
+                      ("ExpWeightedMovingAvg x5", run_averages)):
+        print("%-24s %6.2f us per round" % (name, run() * 1e6 / ROUNDS))
@@ -0,0 +1,63 @@
+"""
+Memory benchmark: bytes held per metric, by metric type.
+
+Creates many metrics of each type and divides the memory traced by
+tracemalloc by their number, once for fresh metrics and once after a few
+values were recorded in each, e.g. to size processes which hold 100k
+metrics. Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/metric_memory.py
+"""
+from __future__ import print_function
+import tracemalloc
+
+from pyformance.meters import Counter, Meter, Histogram, Timer, FusedTimer
+from pyformance.meters.gauge import SimpleGauge
+from pyformance.stats.samples import SlidingWindowSample
+
+METRICS = 2000
+RECORDED = 100
+
+
+def record(metric):
+    for i in range(RECORDED):
+        if isinstance(metric, Counter):
+            metric.inc()
+        elif isinstance(metric, Meter):
+            metric.mark()
+        elif isinstance(metric, Histogram):
+            metric.add(i)
+        elif isinstance(metric, Timer):
+            metric._update(i / 1000.0)
+        else:
+            metric.set_value(i)
+
+
+def bytes_per_metric(factory, recorded):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        metrics = [factory() for i in range(METRICS)]
+        if recorded:
+            for metric in metrics:
+                record(metric)
+        return (tracemalloc.get_traced_memory()[0] - before) / METRICS
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    factories = [
+        ("Counter", Counter),
+        ("SimpleGauge", SimpleGauge),
+        ("Meter", Meter),
+        ("Histogram", Histogram),
+        ("Histogram(sliding)",
+         lambda: Histogram(sample=SlidingWindowSample(RECORDED))),
+        ("Timer", Timer),
+        ("FusedTimer", FusedTimer),
+    ]
+    print("%-20s %10s %16s" % ("", "fresh", "%d recorded" % RECORDED))
+    for name, factory in factories:
+        print("%-20s %10.0f %16.0f" % (name, bytes_per_metric(factory, False),
+                                       bytes_per_metric(factory, True)))
@@ -0,0 +1,88 @@
+"""
+Benchmark for dumping a registry with many metrics.
+
+Compares dump_metrics, which walks the metrics of each type once, with
+looking every key up by get_metrics, which checks the key against every
+metric type, at 1k, 10k and 100k metrics: 60% counters, 30% meters and
+10% timers, each with a few recorded values. The last column dumps with
+changed_only after 1% of the metrics changed, once the moving averages of
+the others decayed. Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/registry_dump.py
+"""
+from __future__ import print_function
+import time
+
+from pyformance import MetricsRegistry
+
+SIZES = (1000, 10000, 100000)
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+def create_registry(size):
+    registry = MetricsRegistry(clock=FakeClock())
+    for i in range(size):
+        kind = i % 10
+        if kind < 6:
+            registry.counter("counter.%d" % i).inc(i)
+        elif kind < 9:
+            registry.meter("meter.%d" % i).mark(i)
+        else:
+            registry.timer("timer.%d" % i).update_many([0.1, 0.2, 0.3])
+    registry._clock.now = 10.0
+    return registry
+
+
+def dump_by_key(registry):
+    metrics = {}
+    for metrics_of_type, to_metrics, to_token in registry._typed_metrics():
+        for key in list(metrics_of_type):
+            metrics[key] = registry.get_metrics(key)
+    return metrics
+
+
+def dump_changed(registry):
+    return registry.dump_metrics(changed_only=True)
+
+
+def touch(registry, fraction):
+    "change every 1 / fraction-th counter, meter and timer"
+    step = int(1 / fraction)
+    for metrics, change in ((registry._counters, lambda c: c.inc()),
+                            (registry._meters, lambda m: m.mark()),
+                            (registry._timers, lambda t: t.update_many([0.1]))):
+        for metric in list(metrics.values())[::step]:
+            change(metric)
+
+
+def measure(dump, registry):
+    start = time.time()
+    dump(registry)
+    return time.time() - start
+
+
+if __name__ == "__main__":
+    print("%8s %16s %16s %16s" % ("metrics", "dump_metrics", "get_metrics",
+                                  "changed_only"))
+    for size in SIZES:
+        registry = create_registry(size)
+        # the first dump ticks every meter, time the second one
+        registry.dump_metrics(changed_only=True)
+        # changed_only reports idle meters and timers until their moving
+        # averages decayed, let them decay first
+        registry._clock.now += 4 * 3600
+        registry.dump_metrics(changed_only=True)
+        full = measure(MetricsRegistry.dump_metrics, registry)
+        by_key = measure(dump_by_key, registry)
+        touch(registry, 0.01)
+        changed = measure(dump_changed, registry)
+        print("%8d %13.1f ms %13.1f ms %13.1f ms" % (
+            size, full * 1e3, by_key * 1e3, changed * 1e3))
@@ -0,0 +1,45 @@
+"""
+Benchmark for reading the reported percentiles off a Snapshot.
+
+Compares five separate get_percentile calls, which sort the values,
+against a single get_percentiles call, which partitions around the
+needed ranks when NumPy is installed. Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/snapshot_percentiles.py
+"""
+from __future__ import print_function
+import random
+import time
+
+from pyformance.stats import snapshot as snapshot_module
+from pyformance.stats.snapshot import Snapshot
+
+SIZE = 16384
+SNAPSHOTS = 200
+QUANTILES = (Snapshot.MEDIAN, Snapshot.P75_Q, Snapshot.P95_Q, Snapshot.P99_Q,
+             Snapshot.P999_Q)
+
+
+def one_by_one(values):
+    snapshot = Snapshot(values)
+    return [snapshot.get_percentile(q) for q in QUANTILES]
+
+
+def batched(values):
+    return Snapshot(values).get_percentiles(QUANTILES)
+
+
+def run(name, read):
+    reservoirs = [[random.random() for i in range(SIZE)]
+                  for j in range(SNAPSHOTS)]
+    start = time.time()
+    for values in reservoirs:
+        read(values)
+    elapsed = time.time() - start
+    print("%-12s %8.1f us per snapshot" % (name, elapsed * 1e6 / SNAPSHOTS))
+
+
+if __name__ == "__main__":
+    print("numpy: %s" % ("yes" if snapshot_module.numpy is not None else "no"))
+    run("one by one", one_by_one)
+    run("batched", batched)
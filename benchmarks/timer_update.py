@@ -0,0 +1,49 @@
+"""
+Microbenchmark for recording a duration with Timer and FusedTimer.
+
+Prints the wall clock cost per recorded duration (ns/op) when 1, 4 and 16
+threads share the same timer. Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/timer_update.py
+"""
+from __future__ import print_function
+import threading
+import time
+
+from pyformance.meters import Timer, FusedTimer
+
+OPS_PER_THREAD = 100000
+THREADS = (1, 4, 16)
+
+
+def run(timer, threads, ops=OPS_PER_THREAD):
+    barrier = threading.Event()
+
+    def work():
+        update = timer._update
+        barrier.wait()
+        for i in range(ops):
+            update(0.001)
+
+    workers = [threading.Thread(target=work) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    start = time.time()
+    barrier.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.time() - start
+    assert timer.get_count() == threads * ops
+    return elapsed * 1e9 / (threads * ops)
+
+
+def main():
+    print("%8s %14s %14s" % ("threads", "Timer ns/op", "Fused ns/op"))
+    for threads in THREADS:
+        print("%8d %14.0f %14.0f" % (threads,
+                                     run(Timer(), threads),
+                                     run(FusedTimer(), threads)))
+
+
+if __name__ == "__main__":
+    main()
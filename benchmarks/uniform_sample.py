@@ -0,0 +1,34 @@
+"""
+Benchmark for the steady-state update of UniformSample.
+
+Compares the cost per update of a full UniformSample, which only draws
+random numbers for the values it keeps, with ExpDecayingSample and with
+incrementing a Counter. Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/uniform_sample.py
+"""
+from __future__ import print_function
+import time
+
+from pyformance.meters import Counter
+from pyformance.stats.samples import ExpDecayingSample, UniformSample
+
+SIZE = 1028
+UPDATES = 500000
+
+
+def run(name, record):
+    # fill the reservoirs first, the steady state is what matters
+    for i in range(SIZE * 10):
+        record(i)
+    start = time.time()
+    for i in range(UPDATES):
+        record(i)
+    elapsed = time.time() - start
+    print("%-20s %6.3f us per update" % (name, elapsed * 1e6 / UPDATES))
+
+
+if __name__ == "__main__":
+    run("Counter.inc", Counter().inc)
+    run("UniformSample", UniformSample(SIZE).update)
+    run("ExpDecayingSample", ExpDecayingSample(SIZE).update)
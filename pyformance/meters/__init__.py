@@ -1,5 +1,7 @@
-from .counter import Counter
-from .meter import Meter
-from .histogram import Histogram
-from .timer import Timer
+from .counter import Counter, StripedCounter
+from .meter import Meter, StripedMeter, WindowedMeter
+from .histogram import Histogram, DeltaHistogram
+from .timer import Timer, FusedTimer, DeltaTimer
 from .gauge import Gauge, CallbackGauge, SimpleGauge
+from .distinct import Distinct
+from .top_k import TopK
@@ -1,6 +1,7 @@
 from threading import Lock
 
 from pyformance.meters.metric import Metric
+from ..stats.adder import Adder
 
 
 class Counter(Metric):
@@ -9,6 +10,8 @@ class Counter(Metric):
     An incrementing and decrementing metric
     """
 
+    __slots__ = ("lock", "counter")
+
     def __init__(self, sink=None, unit=None):
         super(Counter, self).__init__(sink, unit)
         self.lock = Lock()
@@ -28,8 +31,47 @@ class Counter(Metric):
         "return current value of counter"
         return self.counter
 
+    def get_state(self):
+        "get the state of the counter as plain data"
+        return {"count": self.get_count()}
+
+    def merge_state(self, state):
+        "add the count of another counter"
+        self.inc(state["count"])
+
     def clear(self):
         "reset counter to 0"
         with self.lock:
             super(Counter, self).clear()
             self.counter = 0
+
+
+class StripedCounter(Counter):
+
+    """
+    A counter which spreads increments over per-thread cells, similar to
+    Java's LongAdder. Concurrent writers never contend on a lock; the cells
+    are only summed up in get_count.
+    """
+
+    __slots__ = ("adder",)
+
+    def __init__(self, sink=None, unit=None):
+        super(StripedCounter, self).__init__(sink, unit)
+        self.adder = Adder()
+
+    def inc(self, val=1):
+        "increment counter by val (default is 1)"
+        self.adder.add(val)
+        if self.sink is not None:
+            with self.lock:
+                self.add_to_sink(self.adder.sum())
+
+    def get_count(self):
+        "return current value of counter"
+        return self.adder.sum()
+
+    def clear(self):
+        "reset counter to 0"
+        super(StripedCounter, self).clear()
+        self.adder.reset()
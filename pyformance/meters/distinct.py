@@ -0,0 +1,52 @@
+from threading import Lock
+
+from pyformance.meters.metric import Metric
+from ..stats.hyperloglog import HyperLogLog, DEFAULT_PRECISION, hash64
+
+
+class Distinct(Metric):
+
+    """
+    A metric which estimates the number of distinct values added to it,
+    e.g. unique users, in a fixed few KB of memory using a L{HyperLogLog}.
+    Its version is bumped whenever the sketch changes, which is rare once
+    most values were seen before.
+    """
+
+    __slots__ = ("lock", "sketch", "version")
+
+    def __init__(self, precision=DEFAULT_PRECISION, sink=None, unit=None):
+        super(Distinct, self).__init__(sink, unit)
+        self.lock = Lock()
+        self.sketch = HyperLogLog(precision)
+        self.version = 0
+
+    def add(self, value):
+        "add a hashable value"
+        x = hash64(value)
+        with self.lock:
+            if self.sketch.add_hash(x):
+                self.version += 1
+
+    def get_count(self):
+        "get the estimated number of distinct values"
+        with self.lock:
+            return int(round(self.sketch.estimate()))
+
+    def clear(self):
+        "forget all values"
+        with self.lock:
+            super(Distinct, self).clear()
+            self.sketch.clear()
+            self.version += 1
+
+    def get_state(self):
+        "get the state of the sketch as plain data"
+        with self.lock:
+            return self.sketch.get_state()
+
+    def merge_state(self, state):
+        "merge the sketch of another distinct metric"
+        with self.lock:
+            self.sketch.merge_state(state)
+            self.version += 1
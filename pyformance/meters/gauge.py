@@ -17,16 +17,30 @@ class Gauge(Metric):
     
     """
 
+    __slots__ = ()
+
     def get_value(self):
         "A subclass of Gauge should implement this method"
         raise NotImplementedError()
 
+    def get_state(self):
+        "get the current value as plain data"
+        return {"value": self.get_value()}
+
+    def merge_state(self, state):
+        """
+        A gauge reads its value from what it instruments, so merging
+        another gauge leaves it unchanged.
+        """
+
 
 class CallbackGauge(Gauge):
     """
     A Gauge reading for a given callback
     """
 
+    __slots__ = ("callback",)
+
     def __init__(self, callback, sink=None, unit=None):
         "constructor expects a callable"
         super(CallbackGauge, self).__init__(sink, unit)
@@ -42,6 +56,8 @@ class SimpleGauge(Gauge):
     A gauge which holds values with simple getter- and setter-interface
     """
 
+    __slots__ = ("_value",)
+
     def __init__(self, value=float("nan"), sink=None, unit=None):
         "constructor accepts initial value"
         super(SimpleGauge, self).__init__(sink, unit)
@@ -55,3 +71,7 @@ class SimpleGauge(Gauge):
         "setter changes current value"
         # XXX: add locking?
         self._value = value
+
+    def merge_state(self, state):
+        "take the value of another gauge, the last write wins"
+        self._value = state["value"]
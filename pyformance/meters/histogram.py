@@ -1,9 +1,12 @@
+import functools
 import time
 import math
+import weakref
 from threading import Lock
 
 from pyformance.meters.metric import Metric
 from ..stats. samples import ExpDecayingSample, DEFAULT_SIZE, DEFAULT_ALPHA
+from ..stats.batch import to_list, summarize
 
 
 class Histogram(Metric):
@@ -12,6 +15,9 @@ class Histogram(Metric):
     A metric which calculates the distribution of a value.
     """
 
+    __slots__ = ("lock", "clock", "sample", "counter", "max", "min", "sum",
+                 "mean", "m2")
+
     def __init__(self, size=DEFAULT_SIZE, alpha=DEFAULT_ALPHA, clock=time,
                  sample=None, sink=None, unit=None):
         """
@@ -32,14 +38,52 @@ class Histogram(Metric):
 
         :type value: float
         """
-        with self.lock:
+        # acquire and release explicitly: entering a with-block allocates
+        # bound __enter__ and __exit__ methods on every call
+        self.lock.acquire()
+        try:
             self.sample.update(value)
-            self.counter = self.counter + 1
-            self.max = value if value > self.max else self.max
-            self.min = value if value < self.min else self.min
+            counter = self.counter + 1
+            self.counter = counter
+            if value > self.max:
+                self.max = value
+            if value < self.min:
+                self.min = value
             self.sum = self.sum + value
-            self._update_var(value)
+            # Welford's online update of the mean and the squared deviations
+            delta = value - self.mean
+            self.mean += delta / counter
+            self.m2 += delta * (value - self.mean)
             self.add_to_sink(value)
+        finally:
+            self.lock.release()
+
+    def add_many(self, values):
+        """
+        Add a batch of values to histogram under a single lock.
+
+        :param values: an iterable of numbers or an object supporting the
+                       buffer protocol, e.g. array('d'), memoryview or a
+                       one-dimensional NumPy array
+        """
+        values = to_list(values)
+        if not values:
+            return
+        count, total, mean, m2 = summarize(values)
+        with self.lock:
+            update_many = getattr(self.sample, "update_many", None)
+            if update_many is not None:
+                update_many(values)
+            else:
+                for value in values:
+                    self.sample.update(value)
+            old_counter = self.counter
+            self.counter = old_counter + count
+            self.max = max(self.max, max(values))
+            self.min = min(self.min, min(values))
+            self.sum = self.sum + total
+            self._merge_var(old_counter, count, mean, m2)
+            self.add_many_to_sink(values)
 
     def clear(self):
         "reset histogram to initial state"
@@ -47,10 +91,11 @@ class Histogram(Metric):
             super(Histogram, self).clear()
             self.sample.clear()
             self.counter = 0.0
-            self.max = -2147483647.0
-            self.min = 2147483647.0
+            self.max = float("-inf")
+            self.min = float("inf")
             self.sum = 0.0
-            self.var = [-1.0, 0.0]
+            self.mean = 0.0
+            self.m2 = 0.0
 
     def get_count(self):
         "get current value of counter"
@@ -60,13 +105,21 @@ class Histogram(Metric):
         "get current sum"
         return self.sum
 
+    def get_total_count(self):
+        "get the number of values added, which a rollover does not reset"
+        return self.counter
+
     def get_max(self):
         "get current maximum"
-        return self.max
+        if self.counter > 0:
+            return self.max
+        return 0
 
     def get_min(self):
         "get current minimum"
-        return self.min
+        if self.counter > 0:
+            return self.min
+        return 0
 
     def get_mean(self):
         "get current mean"
@@ -83,19 +136,142 @@ class Histogram(Metric):
     def get_var(self):
         "get current variance"
         if self.counter > 1:
-            return self.var[1] / (self.counter - 1)
+            return self.m2 / (self.counter - 1)
         return 0
 
     def get_snapshot(self):
         "get snapshot instance which holds the percentiles"
         return self.sample.get_snapshot()
 
-    def _update_var(self, value):
-        old_m, old_s = self.var
-        new_m, new_s = [0.0, 0.0]
-        if old_m == -1:
-            new_m = value
-        else:
-            new_m = old_m + ((value - old_m) / self.counter)
-            new_s = old_s + ((value - old_m) * (value - new_m))
-        self.var = [new_m, new_s]
+    def get_state(self):
+        """
+        get count, sum, min, max, the running variance terms and the state
+        of the sample as plain data
+        """
+        with self.lock:
+            # the infinite sentinels of an empty histogram are not valid JSON
+            empty = not self.counter
+            return {"count": self.counter,
+                    "sum": self.sum,
+                    "min": None if empty else self.min,
+                    "max": None if empty else self.max,
+                    "mean": self.mean,
+                    "m2": self.m2,
+                    "sample": self.sample.get_state()}
+
+    def merge_state(self, state):
+        """
+        Merges another histogram with the same kind of sample into this one.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another histogram
+        """
+        count = state["count"]
+        if not count:
+            return
+        with self.lock:
+            self.sample.merge_state(state["sample"])
+            old_counter = self.counter
+            self.counter = old_counter + count
+            self.max = max(self.max, state["max"])
+            self.min = min(self.min, state["min"])
+            self.sum = self.sum + state["sum"]
+            self._merge_var(old_counter, count, state["mean"], state["m2"])
+
+    def _merge_var(self, old_counter, count, mean, m2):
+        delta = mean - self.mean
+        self.mean += delta * count / self.counter
+        self.m2 += m2 + delta * delta * old_counter * count / self.counter
+
+
+class DeltaHistogram(Histogram):
+
+    """
+    A histogram whose statistics cover one reporting interval only.
+    L{rollover} closes the interval by swapping the filled sample and
+    statistics with a new, empty set under the lock that L{add} already
+    takes, so writers are held up for a few assignments at most and the
+    write path costs nothing extra.
+
+    Each reader, e.g. each reporter, gets the values added since its own
+    last rollover: the values of an interval closed by one reader are
+    merged into a private histogram for every other reader, so readers do
+    not take values from each other.
+    """
+
+    __slots__ = ("sample_factory", "readers", "rollover_lock",
+                 "closed_count")
+
+    def __init__(self, size=DEFAULT_SIZE, alpha=DEFAULT_ALPHA, clock=time,
+                 sample=None, sink=None, unit=None, sample_factory=None):
+        """
+        Creates a new instance of a L{DeltaHistogram}.
+
+        :param sample_factory: a callable returning an empty sample for
+                               each new interval, required with sample. By
+                               default the sample of a L{Histogram}.
+        """
+        if sample_factory is None:
+            if sample is not None:
+                raise ValueError("A sample needs a sample_factory")
+            sample_factory = functools.partial(ExpDecayingSample, size,
+                                               alpha, clock)
+        if sample is None:
+            sample = sample_factory()
+        super(DeltaHistogram, self).__init__(clock=clock, sample=sample,
+                                             sink=sink, unit=unit)
+        self.sample_factory = sample_factory
+        self.readers = weakref.WeakKeyDictionary()
+        self.rollover_lock = Lock()
+        self.closed_count = 0
+
+    def rollover(self, reader=None):
+        """
+        Closes the current interval and starts a new one.
+
+        :param reader: the object reading the intervals, e.g. a reporter,
+                       which gets all values added since its last rollover.
+                       It is only weakly referenced. Without a reader, and
+                       on the first rollover of a reader, only the values
+                       since the last rollover of any reader are returned.
+
+        :return: L{Histogram} of the values since the last rollover, owned
+                 by the caller
+        """
+        closed = self._close()
+        with self.rollover_lock:
+            for other, pending in list(self.readers.items()):
+                if other is not reader:
+                    pending.merge(closed)
+            if reader is None:
+                return closed
+            pending = self.readers.get(reader)
+            self.readers[reader] = self._create_interval()
+        if pending is not None:
+            pending.merge(closed)
+            return pending
+        return closed
+
+    def _create_interval(self):
+        return Histogram(clock=self.clock, sample=self.sample_factory())
+
+    def _close(self):
+        "swap the current interval with an empty one and return it"
+        closed = self._create_interval()
+        self.lock.acquire()
+        try:
+            closed.sample, self.sample = self.sample, closed.sample
+            closed.counter, self.counter = self.counter, closed.counter
+            closed.max, self.max = self.max, closed.max
+            closed.min, self.min = self.min, closed.min
+            closed.sum, self.sum = self.sum, closed.sum
+            closed.mean, self.mean = self.mean, closed.mean
+            closed.m2, self.m2 = self.m2, closed.m2
+            self.closed_count += closed.counter
+        finally:
+            self.lock.release()
+        return closed
+
+    def get_total_count(self):
+        "get the number of values added in all intervals"
+        return self.closed_count + self.counter
@@ -1,21 +1,54 @@
+import math
 import time
+from array import array
 from threading import Lock
 
 from pyformance.meters.metric import Metric
+from ..stats.adder import Adder
+from ..stats.batch import to_list
 from ..stats.moving_average import ExpWeightedMovingAvg
 
+DEFAULT_PERIODS = (60, 300, 900)  # seconds
+
+# decay factors per tick interval, shared by all meters with the same periods
+_decays = {}
+
 
 class Meter(Metric):
 
     """
-    A meter metric which measures mean throughput and one-, five-, and fifteen-minute
-    exponentially-weighted moving average throughputs.
+    A meter metric which measures mean throughput and exponentially-weighted
+    moving average throughputs, by default over one, five and fifteen
+    minutes.
+
+    The moving averages for all periods are kept in one array and decayed
+    together in a single tick. The decay factors for the standard tick
+    interval are computed once per set of periods; a meter which was idle
+    for several intervals catches up in closed form with one power per
+    period.
     """
 
-    def __init__(self, clock=time, sink=None, unit=None):
+    __slots__ = ("lock", "clock", "periods", "decays", "start_time",
+                 "counter", "rates", "uncounted", "last_tick")
+
+    INTERVAL = ExpWeightedMovingAvg.INTERVAL  # seconds
+
+    def __init__(self, clock=time, sink=None, unit=None,
+                 periods=DEFAULT_PERIODS):
+        """
+        Creates a new L{Meter}.
+
+        :type periods: C{tuple}
+        :param periods: the periods of the moving averages in seconds
+        """
         super(Meter, self).__init__(sink, unit)
         self.lock = Lock()
         self.clock = clock
+        self.periods = tuple(periods)
+        if self.periods not in _decays:
+            _decays[self.periods] = tuple(
+                math.exp(-self.INTERVAL / period) for period in self.periods)
+        self.decays = _decays[self.periods]
         self.clear()
 
     def clear(self):
@@ -23,40 +56,302 @@ class Meter(Metric):
             super(Meter, self).clear()
             self.start_time = self.clock.time()
             self.counter = 0.0
-            self.m1rate = ExpWeightedMovingAvg(period=1, clock=self.clock)
-            self.m5rate = ExpWeightedMovingAvg(period=5, clock=self.clock)
-            self.m15rate = ExpWeightedMovingAvg(period=15, clock=self.clock)
+            self.rates = array("d", [-1.0]) * len(self.periods)
+            self.uncounted = 0.0
+            self.last_tick = self.start_time
+
+    def get_rate(self, period):
+        """
+        get the moving average rate for one of the periods of this meter
+
+        :type period: C{int}
+        :param period: the period in seconds
+        """
+        if period not in self.periods:
+            raise ValueError(
+                "{0} is not a period of this meter".format(period))
+        return self.get_rates()[self.periods.index(period)]
+
+    def get_rates(self):
+        "get the moving average rates for all periods, in order"
+        with self.lock:
+            if self.clock.time() - self.last_tick >= self.INTERVAL:
+                self._tick()
+            return [rate if rate >= 0 else 0 for rate in self.rates]
 
     def get_one_minute_rate(self):
-        return self.m1rate.get_rate()
+        return self.get_rate(60)
 
     def get_five_minute_rate(self):
-        return self.m5rate.get_rate()
+        return self.get_rate(300)
 
     def get_fifteen_minute_rate(self):
-        return self.m15rate.get_rate()
+        return self.get_rate(900)
 
     def tick(self):
-        self.m1rate.tick()
-        self.m5rate.tick()
-        self.m15rate.tick()
+        with self.lock:
+            self._tick()
 
     def mark(self, value=1):
         with self.lock:
             self.counter += value
-            self.m1rate.add(value)
-            self.m5rate.add(value)
-            self.m15rate.add(value)
+            self.uncounted += value
             self.add_to_sink(value)
 
+    def mark_many(self, values):
+        """
+        Mark a batch of values under a single lock.
+
+        :param values: an iterable of numbers or an object supporting the
+                       buffer protocol
+        """
+        values = to_list(values)
+        value = sum(values)
+        with self.lock:
+            self.counter += value
+            self.uncounted += value
+            self.add_many_to_sink(values)
+
     def get_count(self):
         return self.counter
 
+    def get_state(self):
+        "get count, start time and moving averages as plain data"
+        with self.lock:
+            return {"count": self.counter,
+                    "start_time": self.start_time,
+                    "periods": list(self.periods),
+                    "rates": self.rates.tolist(),
+                    "uncounted": self.uncounted}
+
+    def merge_state(self, state):
+        """
+        Adds the count and rates of another meter with the same periods. The
+        mean rate is then taken over the time since the earlier of both
+        meters started.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another meter
+        """
+        if tuple(state.get("periods", ())) != self.periods:
+            raise ValueError("Cannot merge meters with different periods")
+        with self.lock:
+            self.counter += state["count"]
+            self.start_time = min(self.start_time, state["start_time"])
+            self.uncounted += state["uncounted"]
+            rates = self.rates
+            for index, rate in enumerate(state["rates"]):
+                if rate >= 0:
+                    rates[index] = max(rates[index], 0.0) + rate
+
     def get_mean_rate(self):
-        if self.counter == 0:
+        counter = self.get_count()
+        if counter == 0:
             return 0
         elapsed = self.clock.time() - self.start_time
-        return self.counter / elapsed
+        return counter / elapsed
+
+    def _tick(self):
+        "decay all moving averages by the time since the last tick"
+        now = self.clock.time()
+        interval = now - self.last_tick
+        if interval <= 0:
+            return
+        instant_rate = self.uncounted / interval
+        self.uncounted = 0.0
+        self.last_tick = now
+        decays = self.decays
+        if interval != self.INTERVAL:
+            # exp(-interval / period) == decay ** (interval / INTERVAL)
+            power = interval / self.INTERVAL
+            decays = [decay ** power for decay in decays]
+        rates = self.rates
+        for index, decay in enumerate(decays):
+            rate = rates[index]
+            if rate >= 0:
+                rates[index] = instant_rate + decay * (rate - instant_rate)
+            else:
+                rates[index] = instant_rate
 
     def _convertNsRate(self, ratePerNs):
         return ratePerNs
+
+
+class StripedMeter(Meter):
+
+    """
+    A meter whose mark only adds to a per-thread L{Adder}, so concurrent
+    writers neither take the meter lock nor touch the moving averages. The
+    accumulated marks are folded into the moving averages on tick and
+    whenever a rate or the count is read.
+    """
+
+    __slots__ = ("adder", "folded")
+
+    def __init__(self, clock=time, sink=None, unit=None,
+                 periods=DEFAULT_PERIODS):
+        self.adder = Adder()
+        super(StripedMeter, self).__init__(clock, sink, unit, periods)
+
+    def clear(self):
+        super(StripedMeter, self).clear()
+        with self.lock:
+            self.adder.reset()
+            self.folded = 0
+
+    def get_rates(self):
+        self._fold()
+        return super(StripedMeter, self).get_rates()
+
+    def tick(self):
+        self._fold()
+        super(StripedMeter, self).tick()
+
+    def mark(self, value=1):
+        self.adder.add(value)
+        if self.sink is not None:
+            with self.lock:
+                self.add_to_sink(value)
+
+    def mark_many(self, values):
+        values = to_list(values)
+        self.adder.add(sum(values))
+        if self.sink is not None:
+            with self.lock:
+                self.add_many_to_sink(values)
+
+    def get_count(self):
+        self._fold()
+        return self.counter
+
+    def get_state(self):
+        self._fold()
+        return super(StripedMeter, self).get_state()
+
+    def _fold(self):
+        with self.lock:
+            total = self.adder.sum()
+            value = total - self.folded
+            if value:
+                self.folded = total
+                self.counter += value
+                self.uncounted += value
+
+
+class WindowedMeter(Meter):
+
+    """
+    A meter which counts marks per second in a ring covering its longest
+    period, by default fifteen minutes, and keeps a running sum over each
+    period. Unlike the moving averages of L{Meter} its rates are exact
+    averages over their window, right after a burst and before any tick.
+    Marking is O(1); seconds which leave a window are subtracted from its
+    sum as time passes, which is amortized O(1) as well.
+    """
+
+    __slots__ = ("ring", "sums", "second")
+
+    def clear(self):
+        with self.lock:
+            super(Meter, self).clear()
+            self.start_time = self.clock.time()
+            self.counter = 0.0
+            self.ring = array("d", [0.0]) * int(max(self.periods))
+            self.sums = [0.0] * len(self.periods)
+            self.second = int(self.start_time)
+
+    def get_rates(self):
+        with self.lock:
+            now = self.clock.time()
+            self._advance(now)
+            # a window holds the current partial second and the full seconds
+            # before it, but nothing from before the meter started
+            partial = now - self.second
+            elapsed = now - self.start_time
+            rates = []
+            for period, total in zip(self.periods, self.sums):
+                span = min(period - 1 + partial, elapsed)
+                rates.append(max(total, 0.0) / span if span > 0 else 0)
+            return rates
+
+    def tick(self):
+        with self.lock:
+            self._advance(self.clock.time())
+
+    def mark(self, value=1):
+        with self.lock:
+            self._add(value)
+            self.add_to_sink(value)
+
+    def mark_many(self, values):
+        values = to_list(values)
+        with self.lock:
+            self._add(sum(values))
+            self.add_many_to_sink(values)
+
+    def get_state(self):
+        "get count, start time and the per-second counts as plain data"
+        with self.lock:
+            self._advance(self.clock.time())
+            start = (self.second + 1) % len(self.ring)
+            return {"count": self.counter,
+                    "start_time": self.start_time,
+                    "periods": list(self.periods),
+                    "second": self.second,
+                    "counts": (self.ring[start:] + self.ring[:start]).tolist()}
+
+    def merge_state(self, state):
+        """
+        Adds the count and the per-second counts of another windowed meter.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another meter
+        """
+        if "counts" not in state or \
+                tuple(state["periods"]) != self.periods:
+            raise ValueError("Cannot merge meters with different windows")
+        with self.lock:
+            self._advance(self.clock.time())
+            self.counter += state["count"]
+            self.start_time = min(self.start_time, state["start_time"])
+            counts = state["counts"]
+            first = state["second"] - len(counts) + 1
+            for offset, value in enumerate(counts):
+                # seconds ahead of this meter's clock count as now
+                second = min(first + offset, self.second)
+                age = self.second - second
+                if not value or age >= len(self.ring):
+                    continue
+                self.ring[second % len(self.ring)] += value
+                for index, period in enumerate(self.periods):
+                    if age < period:
+                        self.sums[index] += value
+
+    def _add(self, value):
+        self._advance(self.clock.time())
+        self.counter += value
+        self.ring[self.second % len(self.ring)] += value
+        sums = self.sums
+        for index in range(len(sums)):
+            sums[index] += value
+
+    def _advance(self, now):
+        "retire the seconds which fell out of the windows"
+        second = int(now)
+        last = self.second
+        if second <= last:
+            return
+        ring = self.ring
+        size = len(ring)
+        sums = self.sums
+        if second - last >= size:
+            ring[:] = array("d", [0.0]) * size
+            for index in range(len(sums)):
+                sums[index] = 0.0
+        else:
+            periods = list(enumerate(self.periods))
+            for current in range(last + 1, second + 1):
+                for index, period in periods:
+                    sums[index] -= ring[(current - period) % size]
+                ring[current % size] = 0.0
+        self.second = second
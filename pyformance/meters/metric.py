@@ -4,6 +4,8 @@ import six
 
 @six.add_metaclass(abc.ABCMeta)
 class Metric(object):
+    __slots__ = ("sink", "unit", "__weakref__")
+
     def __init__(self, sink=None, unit=None):
         self.sink = sink
         self.unit = unit
@@ -15,3 +17,24 @@ class Metric(object):
     def add_to_sink(self, value):
         if self.sink is not None:
             self.sink.add(value)
+
+    def add_many_to_sink(self, values):
+        if self.sink is not None:
+            for value in values:
+                self.sink.add(value)
+
+    def get_state(self):
+        """
+        Returns the state of the metric as plain dicts, lists and numbers,
+        which can be pickled or serialized to JSON and merged into a metric
+        of the same kind, e.g. in another process, with merge_state.
+        """
+        raise NotImplementedError(self.get_state)
+
+    def merge_state(self, state):
+        "merge a state exported by get_state into this metric"
+        raise NotImplementedError(self.merge_state)
+
+    def merge(self, other):
+        "merge another metric of the same kind into this one"
+        self.merge_state(other.get_state())
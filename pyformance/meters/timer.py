@@ -1,12 +1,16 @@
+import math
 import time
+from threading import Lock
 
 from pyformance.meters.metric import Metric
+from ..stats.batch import to_list, summarize
+from ..stats.samples import ExpDecayingSample
 
 try:
     from blinker import Namespace
 except ImportError:
     Namespace = None
-from .histogram import Histogram, DEFAULT_SIZE, DEFAULT_ALPHA
+from .histogram import Histogram, DeltaHistogram, DEFAULT_SIZE, DEFAULT_ALPHA
 from .meter import Meter
 
 if Namespace is not None:
@@ -20,15 +24,24 @@ class Timer(Metric):
     """
     A timer metric which aggregates timing durations and provides duration statistics, plus
     throughput statistics via Meter and Histogram.
+
+    A custom meter, e.g. a L{StripedMeter}, can be passed in with the meter argument.
     """
 
+    __slots__ = ("meter", "hist", "threshold")
+
     def __init__(self, threshold=None, size=DEFAULT_SIZE, alpha=DEFAULT_ALPHA,
-                 clock=time, sink=None, sample=None, unit=None):
+                 clock=time, sink=None, sample=None, unit=None, meter=None):
         super(Timer, self).__init__(sink, unit)
-        self.meter = Meter(clock=clock)
-        self.hist = Histogram(size=size, alpha=alpha, clock=clock, sample=sample)
+        if meter is None:
+            meter = Meter(clock=clock)
+        self.meter = meter
+        self.hist = self._create_histogram(size, alpha, clock, sample)
         self.threshold = threshold
 
+    def _create_histogram(self, size, alpha, clock, sample):
+        return Histogram(size=size, alpha=alpha, clock=clock, sample=sample)
+
     def get_count(self):
         "get count from internal histogram"
         return self.hist.get_count()
@@ -77,12 +90,34 @@ class Timer(Metric):
         "get 15 rate from internal meter"
         return self.meter.get_fifteen_minute_rate()
 
+    def get_rate(self, period):
+        "get the rate for a period in seconds from internal meter"
+        return self.meter.get_rate(period)
+
+    def get_rates(self):
+        "get the rates for all periods from internal meter"
+        return self.meter.get_rates()
+
     def _update(self, seconds):
         if seconds >= 0:
             self.hist.add(seconds)
             self.meter.mark()
             self.add_to_sink(seconds)
 
+    def update_many(self, seconds):
+        """
+        Record a batch of durations at once. Negative durations are ignored
+        like in a single update.
+
+        :param seconds: an iterable of numbers or an object supporting the
+                        buffer protocol, e.g. array('d')
+        """
+        values = [value for value in to_list(seconds) if value >= 0]
+        if values:
+            self.hist.add_many(values)
+            self.meter.mark(len(values))
+            self.add_many_to_sink(values)
+
     def time(self, *args, **kwargs):
         """
         Parameters will be sent to signal, if fired.
@@ -91,6 +126,21 @@ class Timer(Metric):
         """
         return TimerContext(self, self.meter.clock, *args, **kwargs)
 
+    def get_state(self):
+        "get the state of internal histogram and meter as plain data"
+        return {"histogram": self.hist.get_state(),
+                "meter": self.meter.get_state()}
+
+    def merge_state(self, state):
+        """
+        Merges another timer into this one.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another timer
+        """
+        self.hist.merge_state(state["histogram"])
+        self.meter.merge_state(state["meter"])
+
     def clear(self):
         "clear internal histogram and meter"
         super(Timer, self).clear()
@@ -98,8 +148,221 @@ class Timer(Metric):
         self.meter.clear()
 
 
+class FusedTimer(Timer):
+
+    """
+    A timer which records a duration under a single lock. Count, sum, min,
+    max and the running variance are kept in one tuple instead of an inner
+    L{Histogram}, and the inner meter is only marked with the recorded
+    durations when it is read through the meter property.
+    """
+
+    __slots__ = ("sample", "lock", "record", "_meter")
+
+    def __init__(self, threshold=None, size=DEFAULT_SIZE, alpha=DEFAULT_ALPHA,
+                 clock=time, sink=None, sample=None, unit=None, meter=None):
+        self.lock = Lock()
+        if sample is None:
+            sample = ExpDecayingSample(size, alpha, clock)
+        self.sample = sample
+        super(FusedTimer, self).__init__(threshold, size, alpha, clock, sink,
+                                         sample, unit, meter)
+        self.clear()
+
+    def _create_histogram(self, size, alpha, clock, sample):
+        # there is no inner histogram, see record
+        return None
+
+    @property
+    def meter(self):
+        "the inner meter, marked with every duration recorded so far"
+        self._mark_meter()
+        return self._meter
+
+    @meter.setter
+    def meter(self, meter):
+        self._meter = meter
+
+    def get_count(self):
+        "get current count"
+        return self.record[0]
+
+    def get_sum(self):
+        "get current sum"
+        return self.record[1]
+
+    def get_max(self):
+        "get current maximum"
+        record = self.record
+        if record[0] > 0:
+            return record[3]
+        return 0
+
+    def get_min(self):
+        "get current minimum"
+        record = self.record
+        if record[0] > 0:
+            return record[2]
+        return 0
+
+    def get_mean(self):
+        "get current mean"
+        count, total = self.record[:2]
+        if count > 0:
+            return total / count
+        return 0
+
+    def get_stddev(self):
+        "get current standard deviation"
+        if self.record[0] > 0:
+            return math.sqrt(self.get_var())
+        return 0
+
+    def get_var(self):
+        "get current variance"
+        count = self.record[0]
+        if count > 1:
+            return self.record[5] / (count - 1)
+        return 0
+
+    def get_snapshot(self):
+        "get snapshot from sample"
+        return self.sample.get_snapshot()
+
+    def time(self, *args, **kwargs):
+        "see L{Timer.time}, without marking the meter"
+        return TimerContext(self, self._meter.clock, *args, **kwargs)
+
+    def _update(self, seconds):
+        if seconds >= 0:
+            with self.lock:
+                self.sample.update(seconds)
+                count, total, min_, max_, mean, m2, unmarked = self.record
+                count += 1
+                delta = seconds - mean
+                mean += delta / count
+                self.record = (
+                    count, total + seconds,
+                    seconds if seconds < min_ else min_,
+                    seconds if seconds > max_ else max_,
+                    mean, m2 + delta * (seconds - mean), unmarked + 1)
+                self.add_to_sink(seconds)
+
+    def update_many(self, seconds):
+        """
+        Record a batch of durations under a single lock.
+
+        :param seconds: an iterable of numbers or an object supporting the
+                        buffer protocol, e.g. array('d')
+        """
+        values = [value for value in to_list(seconds) if value >= 0]
+        if not values:
+            return
+        count, total, mean, m2 = summarize(values)
+        with self.lock:
+            self.sample.update_many(values)
+            old_count, old_total, min_, max_, old_mean, old_m2, unmarked = \
+                self.record
+            new_count = old_count + count
+            delta = mean - old_mean
+            self.record = (
+                new_count, old_total + total,
+                min(min_, min(values)), max(max_, max(values)),
+                old_mean + delta * count / new_count,
+                old_m2 + m2 + delta * delta * old_count * count / new_count,
+                unmarked + count)
+            self.add_many_to_sink(values)
+
+    def get_state(self):
+        "get the state as plain data, in the format of L{Timer.get_state}"
+        self._mark_meter()
+        with self.lock:
+            count, total, min_, max_, mean, m2 = self.record[:6]
+            if not count:
+                min_ = max_ = None
+            histogram = {"count": count, "sum": total, "min": min_,
+                         "max": max_, "mean": mean, "m2": m2,
+                         "sample": self.sample.get_state()}
+        return {"histogram": histogram, "meter": self._meter.get_state()}
+
+    def merge_state(self, state):
+        """
+        Merges another timer into this one.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another timer
+        """
+        histogram = state["histogram"]
+        count = histogram["count"]
+        if count:
+            with self.lock:
+                self.sample.merge_state(histogram["sample"])
+                old_count, old_total, min_, max_, old_mean, old_m2, \
+                    unmarked = self.record
+                new_count = old_count + count
+                delta = histogram["mean"] - old_mean
+                self.record = (
+                    new_count, old_total + histogram["sum"],
+                    min(min_, histogram["min"]), max(max_, histogram["max"]),
+                    old_mean + delta * count / new_count,
+                    old_m2 + histogram["m2"] +
+                    delta * delta * old_count * count / new_count,
+                    unmarked)
+        self._meter.merge_state(state["meter"])
+
+    def _mark_meter(self):
+        with self.lock:
+            unmarked = self.record[6]
+            if unmarked:
+                self.record = self.record[:6] + (0,)
+        if unmarked:
+            self._meter.mark(unmarked)
+
+    def clear(self):
+        "clear sample, record and internal meter"
+        with self.lock:
+            super(Timer, self).clear()
+            self.sample.clear()
+            self.record = (0.0, 0.0, float("inf"), float("-inf"), 0.0, 0.0, 0)
+        self._meter.clear()
+
+
+class DeltaTimer(Timer):
+
+    """
+    A timer whose duration statistics cover one reporting interval only,
+    see L{DeltaHistogram}. The meter is not reset, so its moving averages
+    keep their history.
+    """
+
+    __slots__ = ("sample_factory",)
+
+    def __init__(self, threshold=None, size=DEFAULT_SIZE, alpha=DEFAULT_ALPHA,
+                 clock=time, sink=None, sample=None, unit=None, meter=None,
+                 sample_factory=None):
+        self.sample_factory = sample_factory
+        super(DeltaTimer, self).__init__(threshold, size, alpha, clock, sink,
+                                         sample, unit, meter)
+
+    def _create_histogram(self, size, alpha, clock, sample):
+        return DeltaHistogram(size=size, alpha=alpha, clock=clock,
+                              sample=sample,
+                              sample_factory=self.sample_factory)
+
+    def rollover(self, reader=None):
+        """
+        Closes the current interval of the internal histogram and starts a
+        new one, see L{DeltaHistogram.rollover}.
+
+        :return: L{Histogram} of the durations since the last rollover
+        """
+        return self.hist.rollover(reader)
+
+
 class TimerContext(object):
 
+    __slots__ = ("clock", "timer", "start_time", "kwargs", "args")
+
     def __init__(self, timer, clock, *args, **kwargs):
         super(TimerContext, self).__init__()
         self.clock = clock
@@ -0,0 +1,71 @@
+from threading import Lock
+
+from pyformance.meters.metric import Metric
+from ..stats.space_saving import SpaceSaving
+
+DEFAULT_K = 10
+
+
+class TopK(Metric):
+
+    """
+    A metric which counts the heaviest keys, e.g. the tenants or URLs with
+    the most traffic, in a fixed number of slots using L{SpaceSaving}
+    instead of one counter per key. Keys are converted to C{str}, as they
+    are when reported or serialized to JSON, so 200 and "200" are the same
+    key.
+    """
+
+    __slots__ = ("lock", "k", "summary")
+
+    def __init__(self, k=DEFAULT_K, slots=None, sink=None, unit=None):
+        """
+        Creates a new L{TopK} metric.
+
+        :type k: C{int}
+        :param k: the number of keys reported
+        :type slots: C{int}
+        :param slots: the number of keys tracked, 10 * k by default: keys
+                      only rank reliably when they are much heavier than
+                      the total weight divided by the number of slots
+        """
+        super(TopK, self).__init__(sink, unit)
+        self.lock = Lock()
+        self.k = k
+        self.summary = SpaceSaving(slots or k * 10)
+
+    def add(self, key, weight=1):
+        "add weight, e.g. a request or its duration, to the count of key"
+        key = str(key)
+        with self.lock:
+            self.summary.add(key, weight)
+
+    def get_top(self, n=None):
+        """
+        get the n heaviest keys, k by default, as (key, count, error) sorted
+        by descending count, where count overestimates the true count by at
+        most error
+        """
+        with self.lock:
+            return self.summary.top(n or self.k)
+
+    def get_total(self):
+        "get the total weight of the tracked keys"
+        with self.lock:
+            return sum(self.summary.counts.values())
+
+    def clear(self):
+        "forget all keys"
+        with self.lock:
+            super(TopK, self).clear()
+            self.summary.clear()
+
+    def get_state(self):
+        "get the state of the summary as plain data"
+        with self.lock:
+            return self.summary.get_state()
+
+    def merge_state(self, state):
+        "merge the summary of another top-k metric"
+        with self.lock:
+            self.summary.merge_state(state)
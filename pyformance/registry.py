@@ -2,16 +2,135 @@ import functools
 import re
 import time
 import sys
+from threading import Lock
+
+import six
+
 from .meters import Counter, Histogram, Meter, Timer, Gauge, CallbackGauge, SimpleGauge
+from .meters import WindowedMeter, Distinct, TopK
+from .meters import DeltaHistogram, DeltaTimer
+from .stats.snapshot import Snapshot
+
+
+class MetricFamily(object):
+
+    """
+    Metrics of one kind which share a name and are told apart by the values
+    of a fixed set of labels, e.g. the latency of each route and status.
+    Children are created on first use and cached by their label values, so
+    looking one up again costs a single dict lookup instead of formatting a
+    name for every call. Label values are converted to text, as they are
+    when reported, so labels(200) and labels("200") are the same child.
+    """
+
+    __slots__ = ("name", "label_names", "factory", "children", "lookup",
+                 "lock")
+
+    def __init__(self, name, label_names, factory):
+        """
+        Creates a new L{MetricFamily}.
+
+        :param name: name of the metric
+        :type name: C{str}
+        :param label_names: names of the labels
+        :type label_names: C{tuple} of C{str}
+        :param factory: a callable returning a new child metric
+        """
+        super(MetricFamily, self).__init__()
+        self.name = name
+        self.label_names = tuple(label_names)
+        self.factory = factory
+        # the children by their label values as text
+        self.children = {}
+        # the children by the label values as passed, e.g. ("/api", 200)
+        self.lookup = {}
+        self.lock = Lock()
+
+    def labels(self, *values, **labels):
+        """
+        Gets the child metric for the given label values, creates a new one
+        if it does not exist. Values are passed in the order of the label
+        names or by name, e.g. labels("/api", 200) or
+        labels(route="/api", status=200).
+        """
+        if labels:
+            if values:
+                raise ValueError("Expected labels %s" % (self.label_names,))
+            # labels passed by name are looked up by their items
+            passed = frozenset(labels.items())
+            try:
+                return self.lookup[passed]
+            except KeyError:
+                if set(labels) != set(self.label_names):
+                    raise ValueError(
+                        "Expected labels %s" % (self.label_names,))
+                values = tuple(labels[name] for name in self.label_names)
+                return self._create(values, passed)
+        try:
+            return self.lookup[values]
+        except KeyError:
+            if len(values) != len(self.label_names):
+                raise ValueError("Expected labels %s" % (self.label_names,))
+            return self._create(values, values)
+
+    def _create(self, values, passed):
+        "get the child for values passed as passed for the first time"
+        key = tuple(six.text_type(value) for value in values)
+        with self.lock:
+            child = self.children.get(key)
+            if child is None:
+                child = self.children[key] = self.factory()
+            self.lookup[passed] = child
+        return child
+
+    def get_children(self):
+        "get a list of (label values, metric) for all children"
+        with self.lock:
+            return list(self.children.items())
+
+    def clear(self):
+        "forget all children"
+        with self.lock:
+            self.children.clear()
+            self.lookup.clear()
+
+
+class Cursor(object):
+
+    """
+    The change tokens of the metrics a reader of L{MetricsRegistry.iter_metrics}
+    has seen, e.g. a reporter with changed_only. The tokens of a dump are
+    staged and only count as seen once L{commit} is called, e.g. after the
+    dump was sent, so the changes of a failed send are dumped again.
+    """
+
+    __slots__ = ("seen", "staged")
+
+    def __init__(self):
+        super(Cursor, self).__init__()
+        self.seen = {}
+        self.staged = {}
+
+    def commit(self):
+        "mark the metrics of the last dump as seen"
+        for name, tokens in self.staged.items():
+            self.seen.setdefault(name, {}).update(tokens)
+        self.staged.clear()
+
+    def clear(self):
+        "forget all metrics seen"
+        self.seen.clear()
+        self.staged.clear()
 
 
 class MetricsRegistry(object):
 
     """
     A single interface used to gather metrics on a service. It keeps track of
-    all the relevant Counters, Meters, Histograms, and Timers. It does not have
-    a reference back to its service. The service would create a
-    L{MetricsRegistry} to manage all of its metrics tools.
+    all the relevant Counters, Meters, Histograms, Timers, Gauges, Distinct
+    counts and TopKs. It does not have a reference back to its service. The
+    service would create a L{MetricsRegistry} to manage all of its metrics
+    tools.
     """
     def __init__(self, clock=time, sink=None):
         """
@@ -21,7 +140,15 @@ class MetricsRegistry(object):
         self._meters = {}
         self._counters = {}
         self._histograms = {}
+        # delta metrics are kept apart, so that they are rolled over without
+        # checking the type of every metric in a dump
+        self._delta_timers = {}
+        self._delta_histograms = {}
         self._gauges = {}
+        self._distincts = {}
+        self._top_ks = {}
+        self._families = {}
+        self._cursor = {}
         self._clock = clock
         self._sink_obj = sink
 
@@ -33,14 +160,19 @@ class MetricsRegistry(object):
 
         :param key: name of the metric
         :type key: C{str}
-        :param metric: instance of Histogram, Meter, Gauge, Timer or Counter
+        :param metric: instance of Histogram, Meter, Gauge, Timer, Counter,
+                       Distinct or TopK
         """
         class_map = (
+           (DeltaHistogram, self._delta_histograms),
            (Histogram, self._histograms),
            (Meter, self._meters),
            (Gauge, self._gauges),
+           (DeltaTimer, self._delta_timers),
            (Timer, self._timers),
            (Counter, self._counters),
+           (Distinct, self._distincts),
+           (TopK, self._top_ks),
         )
         for cls, registry in class_map:
             if isinstance(metric, cls):
@@ -50,31 +182,54 @@ class MetricsRegistry(object):
                 return
         raise TypeError("Invalid class. Could not register metric %r" % key)
 
-    def counter(self, key, unit=None):
+    def counter(self, key, unit=None, labels=None):
         """
         Gets a counter based on a key, creates a new one if it does not exist.
 
         :param key: name of the metric
         :type key: C{str}
+        :param labels: names of labels, returns a L{MetricFamily} of counters
+        :type labels: C{tuple} of C{str}
 
         :return: L{Counter}
         """
+        if labels is not None:
+            return self._get_family(
+                key, labels, lambda: Counter(sink=self.sink, unit=unit),
+                _counter_metrics, _count_token)
         if key not in self._counters:
             self._counters[key] = Counter(sink=self.sink, unit=unit)
         return self._counters[key]
 
-    def histogram(self, key, unit=None):
+    def histogram(self, key, unit=None, delta=False, labels=None):
         """
         Gets a histogram based on a key, creates a new one if it does not exist.
 
         :param key: name of the metric
         :type key: C{str}
+        :param delta: create a L{DeltaHistogram} whose values are reported
+                      once to each reader of L{iter_metrics}
+        :type delta: C{bool}
+        :param labels: names of labels, returns a L{MetricFamily} of
+                       histograms
+        :type labels: C{tuple} of C{str}
 
         :return: L{Histogram}
         """
-        if key not in self._histograms:
-            self._histograms[key] = Histogram(clock=self._clock, sink=self.sink, unit=unit)
-        return self._histograms[key]
+        if delta:
+            cls, histograms = DeltaHistogram, self._delta_histograms
+            to_metrics, to_token = _delta_histogram_metrics, _delta_token
+        else:
+            cls, histograms = Histogram, self._histograms
+            to_metrics, to_token = _histogram_metrics, _count_token
+        if labels is not None:
+            return self._get_family(
+                key, labels,
+                lambda: cls(clock=self._clock, sink=self.sink, unit=unit),
+                to_metrics, to_token)
+        if key not in histograms:
+            histograms[key] = cls(clock=self._clock, sink=self.sink, unit=unit)
+        return histograms[key]
 
     def gauge(self, key, gauge=None, default=float("nan")):
         if key not in self._gauges:
@@ -88,19 +243,60 @@ class MetricsRegistry(object):
             self._gauges[key] = gauge
         return self._gauges[key]
 
-    def meter(self, key, unit=None):
+    def meter(self, key, unit=None, windowed=False, labels=None):
         """
         Gets a meter based on a key, creates a new one if it does not exist.
 
         :param key: name of the metric
         :type key: C{str}
+        :param windowed: create a L{WindowedMeter} with exact windowed rates
+                         instead of moving averages
+        :type windowed: C{bool}
+        :param labels: names of labels, returns a L{MetricFamily} of meters
+        :type labels: C{tuple} of C{str}
 
         :return: L{Meter}
         """
+        cls = WindowedMeter if windowed else Meter
+        if labels is not None:
+            return self._get_family(
+                key, labels,
+                lambda: cls(clock=self._clock, unit=unit, sink=self.sink),
+                _meter_metrics, _count_token)
         if key not in self._meters:
-            self._meters[key] = Meter(clock=self._clock, unit=unit, sink=self.sink)
+            self._meters[key] = cls(clock=self._clock, unit=unit, sink=self.sink)
         return self._meters[key]
 
+    def distinct(self, key, unit=None):
+        """
+        Gets a distinct count based on a key, creates a new one if it does not
+        exist.
+
+        :param key: name of the metric
+        :type key: C{str}
+
+        :return: L{Distinct}
+        """
+        if key not in self._distincts:
+            self._distincts[key] = Distinct(unit=unit)
+        return self._distincts[key]
+
+    def top_k(self, key, k=10, unit=None):
+        """
+        Gets a top-k metric based on a key, creates a new one if it does not
+        exist.
+
+        :param key: name of the metric
+        :type key: C{str}
+        :param k: the number of heaviest keys reported
+        :type k: C{int}
+
+        :return: L{TopK}
+        """
+        if key not in self._top_ks:
+            self._top_ks[key] = TopK(k, unit=unit)
+        return self._top_ks[key]
+
     @property
     def sink(self):
         return self._sink_obj() if self._sink_obj else self.create_sink()
@@ -108,18 +304,53 @@ class MetricsRegistry(object):
     def create_sink(self):
         return None
 
-    def timer(self, key, unit='event/minute'):
+    def timer(self, key, unit='event/minute', windowed=False, delta=False,
+              labels=None):
         """
         Gets a timer based on a key, creates a new one if it does not exist.
 
         :param key: name of the metric
         :type key: C{str}
+        :param windowed: measure the throughput with a L{WindowedMeter}
+        :type windowed: C{bool}
+        :param delta: create a L{DeltaTimer} whose durations are reported
+                      once to each reader of L{iter_metrics}
+        :type delta: C{bool}
+        :param labels: names of labels, returns a L{MetricFamily} of timers
+        :type labels: C{tuple} of C{str}
 
         :return: L{Timer}
         """
-        if key not in self._timers:
-            self._timers[key] = Timer(clock=self._clock, sink=self.sink, unit=unit)
-        return self._timers[key]
+        if delta:
+            timers = self._delta_timers
+            to_metrics, to_token = _delta_timer_metrics, _delta_timer_token
+        else:
+            timers = self._timers
+            to_metrics, to_token = _timer_metrics, _count_token
+        if labels is not None:
+            return self._get_family(
+                key, labels,
+                lambda: self._create_timer(unit, windowed, delta),
+                to_metrics, to_token)
+        if key not in timers:
+            timers[key] = self._create_timer(unit, windowed, delta)
+        return timers[key]
+
+    def _create_timer(self, unit, windowed, delta):
+        meter = WindowedMeter(clock=self._clock) if windowed else None
+        cls = DeltaTimer if delta else Timer
+        return cls(clock=self._clock, sink=self.sink, unit=unit, meter=meter)
+
+    def _get_family(self, key, labels, factory, to_metrics, to_token):
+        # families of different types may share a name like other metrics do
+        if (to_metrics, key) not in self._families:
+            self._families[to_metrics, key] = (
+                MetricFamily(key, labels, factory), to_token)
+        family = self._families[to_metrics, key][0]
+        if family.label_names != tuple(labels):
+            raise ValueError("Metric %r has labels %s" %
+                             (key, family.label_names))
+        return family
 
     def clear(self):
         self._meters.clear()
@@ -127,67 +358,28 @@ class MetricsRegistry(object):
         self._gauges.clear()
         self._timers.clear()
         self._histograms.clear()
-
-    def _get_counter_metrics(self, key):
-        if key in self._counters:
-            counter = self._counters[key]
-            return {"count": counter.get_count()}
-        return {}
-
-    def _get_gauge_metrics(self, key):
-        if key in self._gauges:
-            gauge = self._gauges[key]
-            return {"value": gauge.get_value()}
-        return {}
-
-    def _get_histogram_metrics(self, key):
-        if key in self._histograms:
-            histogram = self._histograms[key]
-            snapshot = histogram.get_snapshot()
-            res = {"avg": histogram.get_mean(),
-                   "count": histogram.get_count(),
-                   "max": histogram.get_max(),
-                   "min": histogram.get_min(),
-                   "std_dev": histogram.get_stddev(),
-                   "75_percentile": snapshot.get_75th_percentile(),
-                   "95_percentile": snapshot.get_95th_percentile(),
-                   "99_percentile": snapshot.get_99th_percentile(),
-                   "999_percentile": snapshot.get_999th_percentile()}
-            return res
-        return {}
-
-    def _get_meter_metrics(self, key):
-        if key in self._meters:
-            meter = self._meters[key]
-            res = {"count": meter.get_count(),
-                   "15m_rate": meter.get_fifteen_minute_rate(),
-                   "5m_rate": meter.get_five_minute_rate(),
-                   "1m_rate": meter.get_one_minute_rate(),
-                   "mean_rate": meter.get_mean_rate()}
-            return res
-        return {}
-
-    def _get_timer_metrics(self, key):
-        if key in self._timers:
-            timer = self._timers[key]
-            snapshot = timer.get_snapshot()
-            res = {"avg": timer.get_mean(),
-                   "sum": timer.get_sum(),
-                   "count": timer.get_count(),
-                   "max": timer.get_max(),
-                   "min": timer.get_min(),
-                   "std_dev": timer.get_stddev(),
-                   "15m_rate": timer.get_fifteen_minute_rate(),
-                   "5m_rate": timer.get_five_minute_rate(),
-                   "1m_rate": timer.get_one_minute_rate(),
-                   "mean_rate": timer.get_mean_rate(),
-                   "50_percentile": snapshot.get_median(),
-                   "75_percentile": snapshot.get_75th_percentile(),
-                   "95_percentile": snapshot.get_95th_percentile(),
-                   "99_percentile": snapshot.get_99th_percentile(),
-                   "999_percentile": snapshot.get_999th_percentile()}
-            return res
-        return {}
+        self._delta_timers.clear()
+        self._delta_histograms.clear()
+        self._distincts.clear()
+        self._top_ks.clear()
+        self._families.clear()
+        self._cursor.clear()
+
+    def _typed_metrics(self):
+        """
+        the dict of metrics of each type with the functions which format a
+        metric and get its change token
+        """
+        return ((self._counters, _counter_metrics, _count_token),
+                (self._histograms, _histogram_metrics, _count_token),
+                (self._delta_histograms, _delta_histogram_metrics,
+                 _delta_token),
+                (self._meters, _meter_metrics, _count_token),
+                (self._timers, _timer_metrics, _count_token),
+                (self._delta_timers, _delta_timer_metrics, _delta_timer_token),
+                (self._gauges, _gauge_metrics, None),
+                (self._distincts, _distinct_metrics, _distinct_token),
+                (self._top_ks, _top_k_metrics, _top_k_token))
 
     def get_metrics(self, key):
         """
@@ -199,29 +391,297 @@ class MetricsRegistry(object):
         :return: C{dict}
         """
         metrics = {}
-        for getter in (self._get_counter_metrics, self._get_histogram_metrics,
-                       self._get_meter_metrics, self._get_timer_metrics,
-                       self._get_gauge_metrics):
-            metrics.update(getter(key))
+        for registry, to_metrics, to_token in self._typed_metrics():
+            metric = registry.get(key)
+            if metric is not None:
+                metrics.update(_formatter(to_metrics, None)(metric))
         return metrics
 
-    def dump_metrics(self):
+    def iter_metrics(self, cursor=None, reader=None):
+        """
+        Formats the metrics one at a time, walking the metrics of each type
+        once instead of looking every key up by each type.
+
+        With a cursor only the metrics which changed since the last call
+        with that cursor are formatted, e.g. for each reporter its own
+        cursor. A metric changed if its count did. A meter or timer whose
+        count stopped changing is still reported while its moving averages
+        decay, until they are about 0, i.e. below a hundredth of their peak
+        since the count last changed. Gauges are always reported.
+
+        :param cursor: a L{Cursor} whose changes are only seen once it is
+                       committed, or an initially empty dict in which the
+                       state of each metric seen is kept at once
+        :type cursor: L{Cursor} or C{dict}
+        :param reader: the object reading the metrics, e.g. the reporter,
+                       for which delta histograms and timers are rolled
+                       over, see L{DeltaHistogram.rollover}
+
+        :return: iterator of (key, labels, metrics) where labels is a
+                 C{tuple} of (label name, value) pairs, empty for unlabelled
+                 metrics. A key registered as two types, e.g. as a counter
+                 and a meter, is yielded once for each.
+        """
+        if isinstance(cursor, Cursor):
+            cursor.staged.clear()
+        for registry, to_metrics, to_token in self._typed_metrics():
+            seen, staged = _tokens(cursor, to_metrics)
+            format_metric = _formatter(to_metrics, reader)
+            for key, metric in _changed(registry.items(), to_token, seen,
+                                        staged, to_metrics in _rate_metrics):
+                yield key, (), format_metric(metric)
+        for (to_metrics, key), (family, to_token) in \
+                list(self._families.items()):
+            seen, staged = _tokens(cursor, (to_metrics, key))
+            format_metric = _formatter(to_metrics, reader)
+            label_names = family.label_names
+            for values, metric in _changed(family.get_children(), to_token,
+                                           seen, staged,
+                                           to_metrics in _rate_metrics):
+                yield (key, tuple(zip(label_names, values)),
+                       format_metric(metric))
+
+    def dump_metrics(self, changed_only=False, cursor=None, reader=None):
         """
-        Formats all of the metrics and returns them as a dict.
+        Formats all of the metrics and returns them as a dict. The children
+        of a L{MetricFamily} are keyed by their name and labels, e.g.
+        "latency{route=/api,status=200}".
+
+        :param changed_only: only dump the metrics which changed since the
+                             last dump with changed_only
+        :type changed_only: C{bool}
+        :param cursor: only dump the metrics which changed since the last
+                       dump with this cursor, see L{iter_metrics}
+        :type cursor: C{dict}
+        :param reader: the reader of the dump, see L{iter_metrics}
 
         :return: C{list} of C{dict} of metrics
         """
+        if changed_only and cursor is None:
+            cursor = self._cursor
         metrics = {}
-        for metric_type in (self._counters,
-                            self._histograms,
-                            self._meters,
-                            self._timers,
-                            self._gauges):
-            for key in metric_type.keys():
-                metrics[key] = self.get_metrics(key)
-
+        for key, labels, values in self.iter_metrics(cursor, reader):
+            if labels:
+                key = format_labels(key, labels)
+            existing = metrics.get(key)
+            if existing is None:
+                metrics[key] = values
+            else:
+                existing.update(values)
         return metrics
 
+    def dump_labelled_metrics(self, changed_only=False, cursor=None,
+                              reader=None):
+        """
+        Formats all of the metrics like L{dump_metrics}, but keeps the labels
+        of the children of a L{MetricFamily} apart from their name. The
+        arguments are those of L{dump_metrics}.
+
+        :return: C{list} of (key, labels, metrics), see L{iter_metrics}
+        """
+        if changed_only and cursor is None:
+            cursor = self._cursor
+        return list(self.iter_metrics(cursor, reader))
+
+
+def format_labels(key, labels):
+    "format a metric name with its labels, e.g. latency{route=/api,status=200}"
+    if not labels:
+        return key
+    return "%s{%s}" % (key, ",".join("%s=%s" % label for label in labels))
+
+
+_unseen = object()
+
+
+def _tokens(cursor, name):
+    "get the seen and the staged tokens of the metrics of a cursor"
+    if cursor is None:
+        return None, None
+    if isinstance(cursor, Cursor):
+        return (cursor.seen.get(name, {}),
+                cursor.staged.setdefault(name, {}))
+    tokens = cursor.setdefault(name, {})
+    return tokens, tokens
+
+
+def _changed(items, to_token, seen, staged, rates=False):
+    """
+    filter (key, metric) pairs down to the metrics whose change token is not
+    the one in seen, and remember the new tokens in staged. With rates, an
+    unchanged metric is kept until the moving averages last reported for it
+    were about 0, and the token is kept with the peak of its rates since it
+    changed, None once they decayed.
+    """
+    items = list(items)
+    if seen is None or to_token is None:
+        return items
+    changed = []
+    for key, metric in items:
+        token = to_token(metric)
+        last = seen.get(key, _unseen)
+        if not rates:
+            if last != token:
+                staged[key] = token
+                changed.append((key, metric))
+        elif last is _unseen or last[0] != token:
+            staged[key] = (token, tuple(metric.get_rates()))
+            changed.append((key, metric))
+        elif last[1] is not None:
+            # only the rates of the metrics still decaying are computed
+            staged[key] = (token, _decay(last[1], metric.get_rates()))
+            changed.append((key, metric))
+    return changed
+
+
+# the moving averages of a metric whose count stopped changing are about 0
+# once they are below this fraction of their peak since it changed
+_DECAYED = 0.01
+
+
+def _decay(peak, rates):
+    "the new peak of decaying rates, None once they are about 0"
+    if all(rate <= high * _DECAYED for rate, high in zip(rates, peak)):
+        return None
+    return tuple(max(rate, high) for rate, high in zip(rates, peak))
+
+
+def _count_token(metric):
+    return metric.get_count()
+
+
+def _delta_token(histogram):
+    return histogram.get_total_count()
+
+
+def _delta_timer_token(timer):
+    return timer.hist.get_total_count()
+
+
+def _distinct_token(distinct):
+    return distinct.version
+
+
+def _top_k_token(top_k):
+    return top_k.get_total()
+
+
+def _counter_metrics(counter):
+    return {"count": counter.get_count()}
+
+
+def _gauge_metrics(gauge):
+    return {"value": gauge.get_value()}
+
+
+def _distinct_metrics(distinct):
+    return {"count": distinct.get_count()}
+
+
+def _top_k_metrics(top_k):
+    # prefixed so that keys like "count" do not look like the usual fields
+    return dict(("top." + key, count) for key, count, error in top_k.get_top())
+
+
+def _formatter(to_metrics, reader):
+    "the function formatting the metrics of a type for reader"
+    if to_metrics in _reader_metrics:
+        return functools.partial(to_metrics, reader=reader)
+    return to_metrics
+
+
+def _histogram_metrics(histogram):
+    p75, p95, p99, p999 = histogram.get_snapshot().get_percentiles(
+        (Snapshot.P75_Q, Snapshot.P95_Q, Snapshot.P99_Q, Snapshot.P999_Q))
+    return {"avg": histogram.get_mean(),
+            "count": histogram.get_count(),
+            "max": histogram.get_max(),
+            "min": histogram.get_min(),
+            "std_dev": histogram.get_stddev(),
+            "75_percentile": p75,
+            "95_percentile": p95,
+            "99_percentile": p99,
+            "999_percentile": p999}
+
+
+def _delta_histogram_metrics(histogram, reader=None):
+    "format the interval closed for reader"
+    return _histogram_metrics(histogram.rollover(reader))
+
+
+def _meter_metrics(meter):
+    res = format_rates(meter.periods, meter.get_rates())
+    res["count"] = meter.get_count()
+    res["mean_rate"] = meter.get_mean_rate()
+    return res
+
+
+def _timer_metrics(timer, durations=None):
+    if durations is None:
+        durations = timer
+    p50, p75, p95, p99, p999 = durations.get_snapshot().get_percentiles(
+        (Snapshot.MEDIAN, Snapshot.P75_Q, Snapshot.P95_Q, Snapshot.P99_Q,
+         Snapshot.P999_Q))
+    res = {"avg": durations.get_mean(),
+           "sum": durations.get_sum(),
+           "count": durations.get_count(),
+           "max": durations.get_max(),
+           "min": durations.get_min(),
+           "std_dev": durations.get_stddev(),
+           "mean_rate": timer.get_mean_rate(),
+           "50_percentile": p50,
+           "75_percentile": p75,
+           "95_percentile": p95,
+           "99_percentile": p99,
+           "999_percentile": p999}
+    res.update(format_rates(timer.meter.periods, timer.get_rates()))
+    return res
+
+
+def _delta_timer_metrics(timer, reader=None):
+    "format the durations of the interval closed for reader"
+    return _timer_metrics(timer, timer.rollover(reader))
+
+
+# the formatters of delta metrics, which roll them over for a reader
+_reader_metrics = frozenset([_delta_histogram_metrics, _delta_timer_metrics])
+
+
+# the formatters of metrics with moving averages
+_rate_metrics = frozenset([_meter_metrics, _timer_metrics,
+                           _delta_timer_metrics])
+
+
+# the names of the rates of each combination of periods, meters usually
+# share the default periods
+_rate_names = {}
+
+
+def format_rates(periods, rates):
+    """
+    Names the moving average rates of a meter after their periods.
+
+    :type periods: C{tuple}
+    :param periods: the periods of the meter in seconds
+    :type rates: C{list}
+    :param rates: the rates for the periods, in order
+
+    :return: C{dict} of the rates by name, e.g. 1m_rate or 10s_rate
+    """
+    names = _rate_names.get(periods)
+    if names is None:
+        names = _rate_names[periods] = tuple(
+            _rate_name(period) for period in periods)
+    return dict(zip(names, rates))
+
+
+def _rate_name(period):
+    if period % 3600 == 0:
+        return "%dh_rate" % (period // 3600)
+    if period % 60 == 0:
+        return "%dm_rate" % (period // 60)
+    return "%gs_rate" % period
+
 
 class RegexRegistry(MetricsRegistry):
 
@@ -246,20 +706,31 @@ class RegexRegistry(MetricsRegistry):
         key = '/'.join((v for match in matches for v in match.groups() if v))
         return key
 
-    def timer(self, key, unit=None):
-        return super(RegexRegistry, self).timer(self._get_key(key), unit=unit)
+    def timer(self, key, unit=None, windowed=False, delta=False, labels=None):
+        return super(RegexRegistry, self).timer(self._get_key(key), unit=unit,
+                                                windowed=windowed, delta=delta,
+                                                labels=labels)
 
-    def histogram(self, key, unit=None):
-        return super(RegexRegistry, self).histogram(self._get_key(key), unit=unit)
+    def histogram(self, key, unit=None, delta=False, labels=None):
+        return super(RegexRegistry, self).histogram(self._get_key(key), unit=unit,
+                                                    delta=delta, labels=labels)
 
-    def counter(self, key, unit=None):
-        return super(RegexRegistry, self).counter(self._get_key(key), unit=unit)
+    def counter(self, key, unit=None, labels=None):
+        return super(RegexRegistry, self).counter(self._get_key(key), unit=unit,
+                                                  labels=labels)
 
     def gauge(self, key, g=None, default=float("nan")):
         return super(RegexRegistry, self).gauge(self._get_key(key), g, default)
 
-    def meter(self, key, unit=None):
-        return super(RegexRegistry, self).meter(self._get_key(key), unit=unit)
+    def distinct(self, key, unit=None):
+        return super(RegexRegistry, self).distinct(self._get_key(key), unit=unit)
+
+    def top_k(self, key, k=10, unit=None):
+        return super(RegexRegistry, self).top_k(self._get_key(key), k, unit=unit)
+
+    def meter(self, key, unit=None, windowed=False, labels=None):
+        return super(RegexRegistry, self).meter(self._get_key(key), unit=unit,
+                                                windowed=windowed, labels=labels)
 
 
 _global_registry = MetricsRegistry()
@@ -274,26 +745,34 @@ def set_global_registry(registry):
     _global_registry = registry
 
 
-def counter(key, unit=None):
-    return _global_registry.counter(key, unit)
+def counter(key, unit=None, labels=None):
+    return _global_registry.counter(key, unit, labels)
 
 
-def histogram(key, unit=None):
-    return _global_registry.histogram(key, unit)
+def histogram(key, unit=None, delta=False, labels=None):
+    return _global_registry.histogram(key, unit, delta, labels)
 
 
-def meter(key, unit=None):
-    return _global_registry.meter(key, unit)
+def meter(key, unit=None, windowed=False, labels=None):
+    return _global_registry.meter(key, unit, windowed, labels)
 
 
-def timer(key, unit=None):
-    return _global_registry.timer(key, unit)
+def timer(key, unit=None, windowed=False, delta=False, labels=None):
+    return _global_registry.timer(key, unit, windowed, delta, labels)
 
 
 def gauge(key, g=None):
     return _global_registry.gauge(key, g)
 
 
+def distinct(key, unit=None):
+    return _global_registry.distinct(key, unit)
+
+
+def top_k(key, k=10, unit=None):
+    return _global_registry.top_k(key, k, unit)
+
+
 def dump_metrics():
     return _global_registry.dump_metrics()
 
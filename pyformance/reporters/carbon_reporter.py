@@ -4,6 +4,7 @@ import sys
 import struct
 import pickle
 import contextlib
+import re
 from six import iteritems
 
 from .reporter import Reporter
@@ -15,13 +16,15 @@ DEFAULT_CARBON_PORT = 2003
 class CarbonReporter(Reporter):
 
     """
-    Carbon is the network daemon to collect metrics for Graphite
+    Carbon is the network daemon to collect metrics for Graphite.
+    Labelled metrics are sent as Graphite tags, e.g. latency.count;route=/api
     """
 
     def __init__(self, registry=None, reporting_interval=5, prefix="",
                  server=DEFAULT_CARBON_SERVER, port=DEFAULT_CARBON_PORT, socket_factory=socket.socket,
-                 clock=None, pickle_protocol=False):
-        super(CarbonReporter, self).__init__(registry, reporting_interval, clock)
+                 clock=None, pickle_protocol=False, changed_only=False):
+        super(CarbonReporter, self).__init__(registry, reporting_interval, clock,
+                                             changed_only)
         self.prefix = prefix
         self.server = server
         self.port = port
@@ -35,24 +38,29 @@ class CarbonReporter(Reporter):
             with contextlib.closing(self.socket_factory()) as sock:
                 sock.connect((self.server, self.port))
                 sock.sendall(metrics)
+        self._commit()
 
     def _collect_metrics(self, registry, timestamp=None):
         timestamp = timestamp or int(round(self.clock.time()))
-        metrics = registry.dump_metrics()
+        metrics = [(metric_name, _format_tags(labels), metric)
+                   for metric_name, labels, metric
+                   in registry.iter_metrics(self.cursor, self)]
         if self.pickle_protocol:
             payload = pickle.dumps([
-                ("%s%s.%s" % (self.prefix, metric_name, metic_key), (timestamp, metric_value))
-                for metric_name, metric in iteritems(metrics)
+                ("%s%s.%s%s" % (self.prefix, metric_name, metic_key, tags),
+                 (timestamp, metric_value))
+                for metric_name, tags, metric in metrics
                 for metic_key, metric_value in iteritems(metric)
             ])
             header = struct.pack("!L", len(payload))
             return header + payload
         else:
             metrics_data = []
-            for metric_name, metric in iteritems(metrics):
+            for metric_name, tags, metric in metrics:
                 for metic_key, metric_value in iteritems(metric):
-                    metricLine = "%s%s.%s %s %s\n" % (
-                        self.prefix, metric_name, metic_key, metric_value, timestamp)
+                    metricLine = "%s%s.%s%s %s %s\n" % (
+                        self.prefix, metric_name, metic_key, tags,
+                        metric_value, timestamp)
                     metrics_data.append(metricLine)
             result = ''.join(metrics_data)
             if sys.version_info[0] > 2:
@@ -72,3 +80,14 @@ class UdpCarbonReporter(CarbonReporter):
         if metrics:
             with contextlib.closing(self.socket_factory(socket.AF_INET, socket.SOCK_DGRAM)) as sock:
                 sock.sendto(metrics, (self.server, self.port))
+        self._commit()
+
+
+# characters Graphite does not allow in tag names or values
+_TAG_CHARACTERS = re.compile(r"[;!^=~\s]")
+
+
+def _format_tags(labels):
+    return "".join(";%s=%s" % (_TAG_CHARACTERS.sub("_", name),
+                               _TAG_CHARACTERS.sub("_", value))
+                   for name, value in labels)
@@ -3,6 +3,7 @@ from __future__ import print_function
 import sys
 import datetime
 from .reporter import Reporter
+from ..registry import format_labels
 
 
 class ConsoleReporter(Reporter):
@@ -12,26 +13,27 @@ class ConsoleReporter(Reporter):
     This is useful for debugging if you want to read the current state on the console.
     """
 
-    def __init__(self, registry=None, reporting_interval=30, stream=sys.stderr, clock=None):
+    def __init__(self, registry=None, reporting_interval=30, stream=sys.stderr, clock=None,
+                 changed_only=False):
         super(ConsoleReporter, self).__init__(
-            registry, reporting_interval, clock)
+            registry, reporting_interval, clock, changed_only)
         self.stream = stream
 
     def report_now(self, registry=None, timestamp=None):
         metrics = self._collect_metrics(registry or self.registry, timestamp)
         for line in metrics:
             print(line, file=self.stream)
+        self._commit()
 
     def _collect_metrics(self, registry, timestamp=None):
         timestamp = timestamp or int(round(self.clock.time()))
         dt = datetime.datetime(1970, 1, 1) + \
             datetime.timedelta(seconds=timestamp)
-        metrics = registry.dump_metrics()
+        metrics = registry.iter_metrics(self.cursor, self)
         metrics_data = ["== %s ===================================" %
                         dt.strftime("%Y-%m-%d %H:%M:%S")]
-        for key in metrics.keys():
-            values = metrics[key]
-            metrics_data.append("%s:" % key)
+        for key, labels, values in metrics:
+            metrics_data.append("%s:" % format_labels(key, labels))
             for value_key in values.keys():
                 metrics_data.append(
                     "%20s = %s" % (value_key, values[value_key]))
@@ -12,9 +12,10 @@ class CsvReporter(Reporter):
     Each metrics gets its own file
     """
 
-    def __init__(self, registry=None, reporting_interval=30, path=None, separator="\t", clock=None):
+    def __init__(self, registry=None, reporting_interval=30, path=None, separator="\t", clock=None,
+                 changed_only=False):
         super(CsvReporter, self).__init__(
-            registry, reporting_interval, clock)
+            registry, reporting_interval, clock, changed_only)
         self.path = path or os.getcwd()
         if not os.path.exists(self.path):
             os.makedirs(self.path)
@@ -29,7 +30,7 @@ class CsvReporter(Reporter):
         dt = datetime.datetime(1970, 1, 1) + \
             datetime.timedelta(seconds=timestamp)
         date = dt.strftime("%Y-%m-%d %H:%M:%S")
-        metrics = registry.dump_metrics()
+        metrics = registry.dump_metrics(cursor=self.cursor, reader=self)
         for key in metrics.keys():
             values = metrics[key]
             value_keys = list(sorted(values.keys()))
@@ -47,3 +48,4 @@ class CsvReporter(Reporter):
                 cols.append(values[vk])
             f.write("%s\n" % self.separator.join(map(str, cols)))
             f.flush()
+        self._commit()
@@ -17,9 +17,9 @@ class HostedGraphiteReporter(Reporter):
 
     def __init__(
         self, hosted_graphite_api_key, registry=None, reporting_interval=10, url="https://hostedgraphite.com/api/v1/sink",
-            clock=None):
+            clock=None, changed_only=False):
         super(HostedGraphiteReporter, self).__init__(
-            registry, reporting_interval, clock)
+            registry, reporting_interval, clock, changed_only)
         self.url = url
         self.api_key = hosted_graphite_api_key
 
@@ -32,12 +32,13 @@ class HostedGraphiteReporter(Reporter):
                 request.add_header("Authorization", "Basic %s" %
                                    base64.encodestring(self.api_key).strip())
                 result = urllib2.urlopen(request)
+                self._commit()
             except Exception as e:
                 print(e, file=sys.stderr)
 
     def _collect_metrics(self, registry, timestamp=None):
         timestamp = timestamp or int(round(self.clock.time()))
-        metrics = registry.dump_metrics()
+        metrics = registry.dump_metrics(cursor=self.cursor, reader=self)
         metrics_data = []
         for key in metrics.keys():
             for value_key in metrics[key].keys():
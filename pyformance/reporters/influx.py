@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import urllib2
 import base64
+import re
 
 from .reporter import Reporter
 
@@ -11,12 +12,15 @@ DEFAULT_INFLUX_USERNAME = None
 DEFAULT_INFLUX_PASSWORD = None
 DEFAULT_INFLUX_PROTOCOL = "http"
 
+_TAG_CHARACTERS = re.compile(r"[,= ]")
+
 
 class InfluxReporter(Reporter):
 
     """
     InfluxDB reporter using native http api
     (based on https://influxdb.com/docs/v0.9/guides/writing_data.html)
+    Labelled metrics are written with their labels as tags.
     """
 
     def __init__(self, registry=None, reporting_interval=5, prefix="",
@@ -24,9 +28,9 @@ class InfluxReporter(Reporter):
                  username=DEFAULT_INFLUX_USERNAME,
                  password=DEFAULT_INFLUX_PASSWORD,
                  port=DEFAULT_INFLUX_PORT, protocol=DEFAULT_INFLUX_PROTOCOL,
-                 clock=None):
+                 clock=None, changed_only=False):
         super(InfluxReporter, self).__init__(
-            registry, reporting_interval, clock)
+            registry, reporting_interval, clock, changed_only)
         self.prefix = prefix
         self.database = database
         self.username = username
@@ -37,13 +41,16 @@ class InfluxReporter(Reporter):
 
     def report_now(self, registry=None, timestamp=None):
         timestamp = timestamp or int(round(self.clock.time()))
-        metrics = (registry or self.registry).dump_metrics()
+        metrics = (registry or self.registry).iter_metrics(self.cursor, self)
         post_data = []
-        for key, metric_values in metrics.iteritems():
+        for key, labels, metric_values in metrics:
             if not self.prefix:
                 table = key
             else:
                 table = "%s.%s" % (self.prefix, key)
+            table += "".join([",%s=%s" % (_escape_tag(name),
+                                          _escape_tag(value))
+                              for name, value in labels])
             values = ",".join(["%s=%s" % (k, v)
                               for (k, v) in metric_values.iteritems()])
             line = "%s %s %s" % (table, values, timestamp)
@@ -65,3 +72,9 @@ class InfluxReporter(Reporter):
             raise RuntimeError("Cannot write to %s: %s %s" %
                                (self.server, err.code, err.reason))
         _result = response.read()
+        self._commit()
+
+
+def _escape_tag(tag):
+    "escape the characters which delimit the tags of the line protocol"
+    return _TAG_CHARACTERS.sub(r"\\\g<0>", tag)
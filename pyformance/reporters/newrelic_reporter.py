@@ -12,6 +12,9 @@ import six
 
 from pyformance.__version__ import __version__
 from .reporter import Reporter
+from ..meters import DeltaHistogram, DeltaTimer
+from ..registry import format_rates
+from ..stats.snapshot import Snapshot
 
 if sys.version_info[0] > 2:
     import urllib.request as urllib
@@ -170,38 +173,41 @@ class NewRelicReporter(Reporter):
         for key, histogram in registry._histograms.items():
             key = self._get_key_name(key, key_name_prefix)
             key = '{}/{{}}'.format(key)
+            if isinstance(histogram, DeltaHistogram):
+                histogram = histogram.rollover(self)
 
             results[key.format('mean_rate')] = create_metric(histogram.get_mean())
             results[key.format('std_dev')] = histogram.get_stddev()
-            snapshot = histogram.get_snapshot()
-            results[key.format('75_percentile')] = snapshot.get_75th_percentile()
-            results[key.format('95_percentile')] = snapshot.get_95th_percentile()
-            results[key.format('99_percentile')] = snapshot.get_99th_percentile()
-            results[key.format('999_percentile')] = snapshot.get_999th_percentile()
+            p75, p95, p99, p999 = histogram.get_snapshot().get_percentiles(
+                (Snapshot.P75_Q, Snapshot.P95_Q, Snapshot.P99_Q, Snapshot.P999_Q))
+            results[key.format('75_percentile')] = p75
+            results[key.format('95_percentile')] = p95
+            results[key.format('99_percentile')] = p99
+            results[key.format('999_percentile')] = p999
 
         # noinspection PyProtectedMember
         for key, meter in registry._meters.items():
             key = '{}/{{}}'.format(self._get_key_name(key, key_name_prefix))
-            results[key.format('15m_rate')] = create_metric(meter.get_fifteen_minute_rate())
-            results[key.format('5m_rate')] = create_metric(meter.get_five_minute_rate())
-            results[key.format('1m_rate')] = create_metric(meter.get_one_minute_rate())
+            for name, rate in format_rates(meter.periods, meter.get_rates()).items():
+                results[key.format(name)] = create_metric(rate)
             results[key.format('mean_rate')] = create_metric(meter.get_mean_rate())
 
         # noinspection PyProtectedMember
         for key, timer in registry._timers.items():
             key = '{}/{{}}'.format(self._get_key_name(key, key_name_prefix))
-            snapshot = timer.get_snapshot()
-            results.update({key.format("count"): timer.get_count(),
-                            key.format("std_dev"): timer.get_stddev(),
-                            key.format("15m_rate"): create_metric(timer.get_fifteen_minute_rate()),
-                            key.format("5m_rate"): create_metric(timer.get_five_minute_rate()),
-                            key.format("1m_rate"): create_metric(timer.get_one_minute_rate()),
+            durations = timer.rollover(self) if isinstance(timer, DeltaTimer) else timer
+            p50, p75, p95, p99, p999 = durations.get_snapshot().get_percentiles(
+                (Snapshot.MEDIAN, Snapshot.P75_Q, Snapshot.P95_Q, Snapshot.P99_Q, Snapshot.P999_Q))
+            results.update({key.format("count"): durations.get_count(),
+                            key.format("std_dev"): durations.get_stddev(),
                             key.format("mean_rate"): create_metric(timer.get_mean_rate()),
-                            key.format("50_percentile"): snapshot.get_median(),
-                            key.format("75_percentile"): snapshot.get_75th_percentile(),
-                            key.format("95_percentile"): snapshot.get_95th_percentile(),
-                            key.format("99_percentile"): snapshot.get_99th_percentile(),
-                            key.format("999_percentile"): snapshot.get_999th_percentile()})
+                            key.format("50_percentile"): p50,
+                            key.format("75_percentile"): p75,
+                            key.format("95_percentile"): p95,
+                            key.format("99_percentile"): p99,
+                            key.format("999_percentile"): p999})
+            for name, rate in format_rates(timer.meter.periods, timer.get_rates()).items():
+                results[key.format(name)] = create_metric(rate)
 
         # noinspection PyProtectedMember
         sink_meters = filter(lambda tup: tup[1].sink,
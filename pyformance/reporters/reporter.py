@@ -1,6 +1,6 @@
 import time
 from threading import Thread, Event
-from ..registry import global_registry, get_qualname
+from ..registry import global_registry, get_qualname, Cursor
 
 
 class Reporter(object):
@@ -10,10 +10,16 @@ class Reporter(object):
         self._loop_thread = Thread(target=self._loop, name="pyformance reporter {0}".format(get_qualname(type(self))))
         self._loop_thread.setDaemon(True)
 
-    def __init__(self, registry=None, reporting_interval=30, clock=None):
+    def __init__(self, registry=None, reporting_interval=30, clock=None,
+                 changed_only=False):
         self.registry = registry or global_registry()
         self.reporting_interval = reporting_interval
         self.clock = clock or time
+        # each reporter keeps its own cursor and delta metrics are rolled
+        # over for each reporter, so that reporters sharing a registry all
+        # see every change. The values of delta metrics in a failed report
+        # are lost, with or without changed_only.
+        self.cursor = Cursor() if changed_only else None
         self._stopped = Event()
         self.create_thread()
 
@@ -46,3 +52,8 @@ class Reporter(object):
 
     def report_now(self, registry=None, timestamp=None):
         raise NotImplementedError(self.report_now)
+
+    def _commit(self):
+        "mark the changes reported as seen, once the report was sent"
+        if self.cursor is not None:
+            self.cursor.commit()
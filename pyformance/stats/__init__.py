@@ -1,3 +1,12 @@
-from .samples import ExpDecayingSample
+from .samples import ExpDecayingSample, ArrayExpDecayingSample
+from .samples import UniformSample
+from .samples import SlidingWindowSample
+from .samples import BucketedSlidingTimeWindowSample
 from .moving_average import ExpWeightedMovingAvg
 from .snapshot import Snapshot
+from .adder import Adder
+from .hdr_histogram import HdrHistogramSample
+from .tdigest import TDigestSample
+from .ddsketch import DDSketchSample
+from .hyperloglog import HyperLogLog
+from .space_saving import SpaceSaving
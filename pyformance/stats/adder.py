@@ -0,0 +1,68 @@
+import threading
+import weakref
+from threading import Lock
+
+
+class Adder(object):
+
+    """
+    A sum which is spread over one cell per writing thread, modeled after
+    Java's LongAdder. Threads only ever write to their own cell, so adding
+    does not need a lock; the cells are summed up when the total is read.
+    """
+
+    __slots__ = ("lock", "_local", "_cells", "_base")
+
+    def __init__(self):
+        super(Adder, self).__init__()
+        self.lock = Lock()
+        self._local = threading.local()
+        self._cells = []
+        self._base = 0
+
+    def add(self, value):
+        """
+        Add value to the cell of the calling thread.
+
+        :type value: C{int} or C{float}
+        """
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+        cell[0] += value
+
+    def sum(self):
+        "return the sum over all cells"
+        with self.lock:
+            total = self._base
+            for _, cell in self._cells:
+                total += cell[0]
+            return total
+
+    def reset(self):
+        """
+        Reset all cells to 0. Like LongAdder.reset this is only exact when
+        there are no concurrent calls to add.
+        """
+        with self.lock:
+            self._base = 0
+            for _, cell in self._cells:
+                cell[0] = 0
+
+    def _new_cell(self):
+        cell = [0]
+        with self.lock:
+            # fold the cells of finished threads into the base value so the
+            # number of cells stays bounded by the number of live threads
+            cells = []
+            for ref, other in self._cells:
+                thread = ref()
+                if thread is None or not thread.is_alive():
+                    self._base += other[0]
+                else:
+                    cells.append((ref, other))
+            cells.append((weakref.ref(threading.current_thread()), cell))
+            self._cells = cells
+        self._local.cell = cell
+        return cell
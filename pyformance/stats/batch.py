@@ -0,0 +1,32 @@
+import operator
+
+
+def to_list(values):
+    """
+    Convert a batch of values to a list of numbers.
+
+    Arrays, memoryviews and one-dimensional NumPy arrays are converted with
+    their C-level tolist method, other buffer-protocol objects through a
+    memoryview and any other iterable with list.
+    """
+    if isinstance(values, list):
+        return values
+    tolist = getattr(values, "tolist", None)
+    if tolist is not None:
+        return tolist()
+    try:
+        return memoryview(values).tolist()
+    except TypeError:
+        return list(values)
+
+
+def summarize(values):
+    """
+    Get count, sum, mean and the sum of squared deviations from the mean
+    of a non-empty list of numbers.
+    """
+    count = len(values)
+    total = sum(values)
+    mean = total / float(count)
+    deviations = [value - mean for value in values]
+    return count, total, mean, sum(map(operator.mul, deviations, deviations))
@@ -0,0 +1,243 @@
+from __future__ import division
+import math
+from bisect import bisect_right
+
+from .samples import Sample
+from .snapshot import Snapshot
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BINS = 2048
+
+
+class DDSketchSample(Sample):
+
+    """
+    A sample which counts values in logarithmically sized bins, following
+    DDSketch. Every percentile is answered with a relative error of at most
+    relative_accuracy, memory is bounded by max_bins per sign, and sketches
+    with the same accuracy can be merged without losing that guarantee.
+
+    @see: <a href="https://arxiv.org/abs/1908.10693">Masson et al.
+          DDSketch: A Fast and Fully-Mergeable Quantile Sketch with
+          Relative-Error Guarantees. PVLDB 12(12) (2019)</a>
+    """
+
+    __slots__ = ("relative_accuracy", "max_bins", "gamma", "_multiplier",
+                 "positive", "negative", "zero_count", "count", "min", "max")
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY,
+                 max_bins=DEFAULT_MAX_BINS):
+        """
+        Creates a new L{DDSketchSample}.
+
+        :type relative_accuracy: C{float}
+        :param relative_accuracy: the guaranteed relative error of the
+                                  percentiles, between 0 and 1
+        :type max_bins: C{int}
+        :param max_bins: the maximum number of bins for positive and for
+                         negative values; when exceeded the bins of the
+                         smallest positive or of the largest negative
+                         values are collapsed, which only affects the
+                         lowest percentiles
+        """
+        super(DDSketchSample, self).__init__()
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(
+                "{0} is not in (0..1)".format(relative_accuracy))
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(self.gamma)
+        self.clear()
+
+    def clear(self):
+        self.positive = _Bins(self.max_bins, collapse_low=True)
+        self.negative = _Bins(self.max_bins, collapse_low=False)
+        self.zero_count = 0
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.marker = None
+
+    def get_size(self):
+        return self.count
+
+    def update(self, value):
+        """
+        Adds a value to the sample.
+
+        :type value: C{int} or C{float}
+        :param value: the value to be added, which must be finite
+        """
+        _check_finite(value)
+        if value > 0:
+            self.positive.add(
+                int(math.ceil(math.log(value) * self._multiplier)), 1)
+        elif value < 0:
+            self.negative.add(
+                int(math.ceil(math.log(-value) * self._multiplier)), 1)
+        else:
+            self.zero_count += 1
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.marker = None
+
+    def update_many(self, values):
+        # check the whole batch first, so a bad value adds none of it
+        for value in values:
+            _check_finite(value)
+        for value in values:
+            self.update(value)
+
+    def get_state(self):
+        # the infinite sentinels of an empty sketch are not valid JSON
+        empty = not self.count
+        return {"relative_accuracy": self.relative_accuracy,
+                "positive": [list(item)
+                             for item in self.positive.counts.items()],
+                "negative": [list(item)
+                             for item in self.negative.counts.items()],
+                "zero_count": self.zero_count,
+                "count": self.count,
+                "min": None if empty else self.min,
+                "max": None if empty else self.max}
+
+    def merge_state(self, state):
+        """
+        Adds the bins of another sketch with the same relative accuracy.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another sample
+        """
+        if self.relative_accuracy != state["relative_accuracy"]:
+            raise ValueError(
+                "Cannot merge sketches with different relative accuracy")
+        self.positive.merge(state["positive"])
+        self.negative.merge(state["negative"])
+        self.zero_count += state["zero_count"]
+        self.count += state["count"]
+        if state["count"]:
+            self.min = min(self.min, state["min"])
+            self.max = max(self.max, state["max"])
+        self.marker = None
+
+    def _create_snapshot(self):
+        return DDSketchSnapshot(self)
+
+    def _value(self, key):
+        "the value with the lowest relative error to all values in a bin"
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+
+def _check_finite(value):
+    # the log of inf overflows the bin key and nan compares false to 0
+    if math.isinf(value) or math.isnan(value):
+        raise ValueError("{0} is not a finite value".format(value))
+
+
+class _Bins(object):
+
+    """
+    Counts per bin key for one sign of a L{DDSketchSample}. The keys grow
+    with the magnitude of the values, so the bins of the lowest values are
+    the lowest keys for positive values and the highest keys for negative
+    values, which are the ones collapsed when there are too many.
+    """
+
+    __slots__ = ("max_bins", "collapse_low", "counts", "collapsed_key")
+
+    def __init__(self, max_bins, collapse_low):
+        self.max_bins = max_bins
+        self.collapse_low = collapse_low
+        self.counts = {}
+        self.collapsed_key = None
+
+    def add(self, key, count):
+        collapsed_key = self.collapsed_key
+        if collapsed_key is not None and (
+                key < collapsed_key if self.collapse_low
+                else key > collapsed_key):
+            key = collapsed_key
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+        else:
+            counts[key] = count
+            if len(counts) > self.max_bins:
+                self._collapse()
+
+    def merge(self, items):
+        for key, count in items:
+            self.add(key, count)
+
+    def _collapse(self):
+        keys = sorted(self.counts, reverse=not self.collapse_low)
+        target = keys[-self.max_bins]
+        for key in keys[:-self.max_bins]:
+            self.counts[target] += self.counts.pop(key)
+        self.collapsed_key = target
+
+
+class DDSketchSnapshot(Snapshot):
+
+    """
+    A snapshot of the bins of a L{DDSketchSample}
+    """
+
+    __slots__ = ("bin_values", "cumulative_counts", "count", "min", "max")
+
+    def __init__(self, sample):
+        # the raw values are not available, so Snapshot.__init__ is skipped
+        # and get_percentiles asks get_percentile for every quantile
+        super(Snapshot, self).__init__()
+        self._sorted = True
+        self.bin_values = []
+        self.cumulative_counts = []
+        total = 0
+        negative = dict(sample.negative.counts)
+        for key in sorted(negative, reverse=True):
+            total += negative[key]
+            self.bin_values.append(-sample._value(key))
+            self.cumulative_counts.append(total)
+        if sample.zero_count:
+            total += sample.zero_count
+            self.bin_values.append(0)
+            self.cumulative_counts.append(total)
+        positive = dict(sample.positive.counts)
+        for key in sorted(positive):
+            total += positive[key]
+            self.bin_values.append(sample._value(key))
+            self.cumulative_counts.append(total)
+        self.count = total
+        self.min = sample.min
+        self.max = sample.max
+
+    @property
+    def values(self):
+        """
+        the value of each non-empty bin, sorted; one per bin, while get_size
+        counts every recorded value
+        """
+        return self.bin_values
+
+    def get_size(self):
+        "get number of recorded values"
+        return self.count
+
+    def get_percentile(self, percentile):
+        """
+        get custom percentile
+
+        :param percentile: float value between 0 and 1
+        """
+        if percentile < 0 or percentile > 1:
+            raise ValueError("{0} is not in [0..1]".format(percentile))
+        if self.count == 0:
+            return 0
+        rank = int(percentile * (self.count - 1))
+        index = bisect_right(self.cumulative_counts, rank)
+        value = self.bin_values[index]
+        return min(max(value, self.min), self.max)
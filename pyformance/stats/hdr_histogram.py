@@ -0,0 +1,213 @@
+import math
+from array import array
+from bisect import bisect_left
+from itertools import compress
+
+from .samples import Sample
+from .snapshot import Snapshot
+
+DEFAULT_LOWEST = 0.000001  # 1 microsecond
+DEFAULT_HIGHEST = 3600.0  # 1 hour
+DEFAULT_SIGNIFICANT_DIGITS = 2
+
+try:
+    array("q")
+    COUNTS_TYPECODE = "q"
+except ValueError:
+    # python 2
+    COUNTS_TYPECODE = "l"
+
+
+class HdrHistogramSample(Sample):
+
+    """
+    A sample which counts values in fixed log-linear buckets, following the
+    layout of Gil Tene's HdrHistogram. Recording a value is O(1), memory is
+    fixed by the trackable range and the precision, and percentiles are
+    read from a cumulative scan over the buckets without sorting anything.
+
+    @see: <a href="http://hdrhistogram.org/">HdrHistogram</a>
+    """
+
+    __slots__ = ("lowest", "highest", "significant_digits", "_sub_bucket_bits",
+                 "_sub_bucket_mask", "_half_count_bits", "_half_count",
+                 "_max_scaled", "_length", "counts", "count", "min", "max")
+
+    def __init__(self, lowest=DEFAULT_LOWEST, highest=DEFAULT_HIGHEST,
+                 significant_digits=DEFAULT_SIGNIFICANT_DIGITS):
+        """
+        Creates a new L{HdrHistogramSample}.
+
+        :type lowest: C{float}
+        :param lowest: the smallest value which can be told apart from 0;
+                       all values are counted in multiples of it
+        :type highest: C{float}
+        :param highest: the highest trackable value; larger values are
+                        counted as highest
+        :type significant_digits: C{int}
+        :param significant_digits: the number of significant decimal digits
+                                   kept for each value, between 0 and 5
+        """
+        super(HdrHistogramSample, self).__init__()
+        if not 0 <= significant_digits <= 5:
+            raise ValueError(
+                "{0} significant digits not in [0..5]".format(
+                    significant_digits))
+        if lowest <= 0 or highest < 2 * lowest:
+            raise ValueError(
+                "invalid range [{0}..{1}]".format(lowest, highest))
+        self.lowest = lowest
+        self.highest = highest
+        self.significant_digits = significant_digits
+        largest_single_unit = 2 * 10 ** significant_digits
+        self._sub_bucket_bits = max(1, (largest_single_unit - 1).bit_length())
+        self._sub_bucket_mask = (1 << self._sub_bucket_bits) - 1
+        self._half_count_bits = self._sub_bucket_bits - 1
+        self._half_count = 1 << self._half_count_bits
+        self._max_scaled = int(highest / lowest)
+        self._length = self._index(self._max_scaled) + 1
+        self.clear()
+
+    def clear(self):
+        self.counts = array(COUNTS_TYPECODE, [0]) * self._length
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.marker = None
+
+    def get_size(self):
+        return self.count
+
+    def update(self, value):
+        """
+        Adds a value to the sample. Negative values are counted as 0 and
+        values above the trackable range as highest.
+
+        :type value: C{int} or C{float}
+        :param value: the value to be added
+        """
+        if value >= self.highest:
+            scaled = self._max_scaled
+        elif value > 0:
+            scaled = int(value / self.lowest)
+        else:
+            scaled = 0
+        bucket = (scaled | self._sub_bucket_mask).bit_length() - \
+            self._sub_bucket_bits
+        self.counts[((bucket + 1) << self._half_count_bits) +
+                    (scaled >> bucket) - self._half_count] += 1
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.marker = None
+
+    def update_many(self, values):
+        for value in values:
+            self.update(value)
+
+    def get_state(self):
+        counts = self.counts
+        # the infinite sentinels of an empty sample are not valid JSON
+        empty = not self.count
+        return {"lowest": self.lowest,
+                "highest": self.highest,
+                "significant_digits": self.significant_digits,
+                "counts": [[index, counts[index]] for index in
+                           compress(range(self._length), counts)],
+                "count": self.count,
+                "min": None if empty else self.min,
+                "max": None if empty else self.max}
+
+    def merge_state(self, state):
+        """
+        Adds the counts of another sample with the same range and precision
+        to this one.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another sample
+        """
+        if (self.lowest, self.highest, self.significant_digits) != \
+                (state["lowest"], state["highest"],
+                 state["significant_digits"]):
+            raise ValueError("Cannot merge samples with different layouts")
+        counts = self.counts
+        for index, count in state["counts"]:
+            counts[index] += count
+        self.count += state["count"]
+        if state["count"]:
+            self.min = min(self.min, state["min"])
+            self.max = max(self.max, state["max"])
+        self.marker = None
+
+    def _create_snapshot(self):
+        return HdrSnapshot(self)
+
+    def _index(self, scaled):
+        bucket = (scaled | self._sub_bucket_mask).bit_length() - \
+            self._sub_bucket_bits
+        return ((bucket + 1) << self._half_count_bits) + \
+            (scaled >> bucket) - self._half_count
+
+    def _highest_equivalent(self, index):
+        bucket = (index >> self._half_count_bits) - 1
+        sub_bucket = (index & (self._half_count - 1)) + self._half_count
+        if bucket < 0:
+            sub_bucket -= self._half_count
+            bucket = 0
+        return (((sub_bucket + 1) << bucket) - 1) * self.lowest
+
+
+class HdrSnapshot(Snapshot):
+
+    """
+    A snapshot of the non-empty buckets of a L{HdrHistogramSample}
+    """
+
+    __slots__ = ("bucket_values", "cumulative_counts", "count", "min", "max")
+
+    def __init__(self, sample):
+        # the raw values are not available, so Snapshot.__init__ is skipped
+        # and get_percentiles asks get_percentile for every quantile
+        super(Snapshot, self).__init__()
+        self._sorted = True
+        counts = sample.counts
+        self.bucket_values = []
+        self.cumulative_counts = []
+        total = 0
+        for index in compress(range(len(counts)), counts):
+            total += counts[index]
+            self.bucket_values.append(sample._highest_equivalent(index))
+            self.cumulative_counts.append(total)
+        self.count = total
+        self.min = sample.min
+        self.max = sample.max
+
+    @property
+    def values(self):
+        """
+        the highest equivalent value of each non-empty bucket, sorted; one
+        per bucket, while get_size counts every recorded value
+        """
+        return self.bucket_values
+
+    def get_size(self):
+        "get number of recorded values"
+        return self.count
+
+    def get_percentile(self, percentile):
+        """
+        get custom percentile
+
+        :param percentile: float value between 0 and 1
+        """
+        if percentile < 0 or percentile > 1:
+            raise ValueError("{0} is not in [0..1]".format(percentile))
+        if self.count == 0:
+            return 0
+        rank = max(1, int(math.ceil(percentile * self.count)))
+        if rank >= self.count:
+            return self.max
+        value = self.bucket_values[bisect_left(self.cumulative_counts, rank)]
+        return min(max(value, self.min), self.max)
@@ -0,0 +1,142 @@
+import hashlib
+import math
+import struct
+
+import six
+
+DEFAULT_PRECISION = 12
+
+_MASK64 = (1 << 64) - 1
+
+try:
+    _blake2b = hashlib.blake2b
+except AttributeError:
+    # python 2
+    _blake2b = None
+
+
+def hash64(item):
+    """
+    A 64 bit hash of item which, unlike the builtin hash, is the same in
+    every process. Integers and integral floats, which compare equal to
+    them, are mixed with the splitmix64 finalizer, text and bytes are
+    digested, and any other value is hashed by its repr.
+    """
+    if isinstance(item, bool):
+        item = repr(item)
+    elif isinstance(item, float) and item.is_integer():
+        item = int(item)
+    if isinstance(item, six.integer_types):
+        x = (item + 0x9e3779b97f4a7c15) & _MASK64
+        x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+        x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & _MASK64
+        return x ^ (x >> 31)
+    if not isinstance(item, six.binary_type):
+        if not isinstance(item, six.text_type):
+            item = repr(item)
+        item = item.encode("utf-8")
+    if _blake2b is not None:
+        digest = _blake2b(item, digest_size=8).digest()
+    else:
+        digest = hashlib.sha1(item).digest()[:8]
+    return struct.unpack("<Q", digest)[0]
+
+
+class HyperLogLog(object):
+
+    """
+    Estimates the number of distinct items added to it in fixed memory: one
+    byte for each of 2 ** precision registers, 4KB by default, with a
+    standard error of about 1.04 / sqrt(2 ** precision), 1.6% by default.
+    Sketches with the same precision can be merged, e.g. across processes.
+
+    @see: <a href="http://algo.inria.fr/flajolet/Publications/FlFuGaMe07.pdf">
+          Flajolet et al. HyperLogLog: the analysis of a near-optimal
+          cardinality estimation algorithm. AofA '07 (2007)</a>
+    """
+
+    __slots__ = ("precision", "registers", "_rank_bits", "_rank_mask")
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        """
+        Creates a new L{HyperLogLog}.
+
+        :type precision: C{int}
+        :param precision: the number of hash bits used to pick a register,
+                          between 4 and 18
+        """
+        super(HyperLogLog, self).__init__()
+        if not 4 <= precision <= 18:
+            raise ValueError("{0} is not in [4..18]".format(precision))
+        self.precision = precision
+        self._rank_bits = 64 - precision
+        self._rank_mask = (1 << self._rank_bits) - 1
+        self.clear()
+
+    def clear(self):
+        self.registers = bytearray(1 << self.precision)
+
+    def add(self, item):
+        """
+        Adds an item to the sketch.
+
+        :param item: an int, text, bytes or any other value with a stable
+                     repr
+        """
+        self.add_hash(hash64(item))
+
+    def add_hash(self, x):
+        """
+        Adds an item by its hash, e.g. to hash outside of a lock.
+
+        :type x: C{int}
+        :param x: the L{hash64} of the item
+
+        :return: C{True} if a register changed, i.e. the estimate may have
+        """
+        index = x >> self._rank_bits
+        rank = self._rank_bits - (x & self._rank_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def estimate(self):
+        "get the estimated number of distinct items"
+        registers = self.registers
+        m = len(registers)
+        # registers only hold small ranks: count them at C speed instead of
+        # summing 2 ** -register in a Python loop
+        total = 0.0
+        for rank in range(max(registers) + 1):
+            count = registers.count(rank)
+            if count:
+                total += count * 2.0 ** -rank
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / total
+        zeros = registers.count(0)
+        if zeros and estimate <= 2.5 * m:
+            # linear counting is more accurate for small cardinalities
+            estimate = m * math.log(float(m) / zeros)
+        return estimate
+
+    def get_state(self):
+        "get the precision and the registers as plain data"
+        return {"precision": self.precision,
+                "registers": list(self.registers)}
+
+    def merge_state(self, state):
+        """
+        Merges the registers of another sketch with the same precision.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another sketch
+        """
+        if state["precision"] != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers,
+                                       state["registers"]))
+
+    def merge(self, other):
+        "merge another sketch into this one"
+        self.merge_state(other.get_state())
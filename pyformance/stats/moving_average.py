@@ -7,6 +7,9 @@ class ExpWeightedMovingAvg(object):
     """
     An exponentially-weighted moving average.
     """
+
+    __slots__ = ("clock", "uncounted", "interval", "rate", "period",
+                 "last_tick")
     INTERVAL = 5.0  # seconds
     SECONDS_PER_MINUTE = 60.0
 
@@ -1,14 +1,79 @@
+import abc
 import time
 import random
 import math
 import heapq
+from array import array
+from operator import itemgetter
+
+import six
+
 from .snapshot import Snapshot
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 DEFAULT_SIZE = 1028
 DEFAULT_ALPHA = 0.015
 
 
-class ExpDecayingSample(object):
+@six.add_metaclass(abc.ABCMeta)
+class Sample(object):
+
+    """
+    Base class for samples. get_snapshot hands out the same snapshot until
+    the sample changes, so several readers within a reporting interval
+    share one sorted copy of the values. A reader sets a fresh marker
+    before it takes a snapshot and every change resets the marker to None
+    after it is made, so a snapshot which may have missed a change is not
+    handed out again. Resetting the marker allocates nothing, unlike
+    counting changes in an ever-growing int.
+
+    get_state exports a sample as plain lists and dicts, which can be
+    pickled or serialized to JSON and merged into another sample of the
+    same kind with merge_state.
+    """
+
+    __slots__ = ("marker", "_snapshot")
+
+    def __init__(self):
+        super(Sample, self).__init__()
+        self.marker = None
+        self._snapshot = None
+
+    def get_snapshot(self):
+        cached = self._snapshot
+        if cached is not None and cached[0] == self._snapshot_key():
+            return cached[1]
+        self.marker = object()
+        key = self._snapshot_key()
+        snapshot = self._create_snapshot()
+        self._snapshot = (key, snapshot)
+        return snapshot
+
+    @abc.abstractmethod
+    def get_state(self):
+        "get the state of the sample as plain data"
+
+    @abc.abstractmethod
+    def merge_state(self, state):
+        "merge a state exported by get_state into this sample"
+
+    def merge(self, other):
+        "merge another sample of the same kind into this one"
+        self.merge_state(other.get_state())
+
+    def _snapshot_key(self):
+        return self.marker
+
+    @abc.abstractmethod
+    def _create_snapshot(self):
+        "create a snapshot of the values in the sample"
+
+
+class ExpDecayingSample(Sample):
 
     """
     An exponentially-decaying random sample of longs. Uses Cormode et al's
@@ -22,6 +87,9 @@ class ExpDecayingSample(object):
           International Conference on Data Engineering (2009)</a>
     """
 
+    __slots__ = ("clock", "size", "alpha", "values", "priorities", "counter",
+                 "start_time", "next_time")
+
     RESCALE_THREASHOLD = 3600.0  # 1 hour
 
     def __init__(self, size=DEFAULT_SIZE, alpha=DEFAULT_ALPHA, clock=time):
@@ -51,6 +119,7 @@ class ExpDecayingSample(object):
         self.start_time = self.clock.time()
         self.next_time = self.clock.time() + \
             ExpDecayingSample.RESCALE_THREASHOLD
+        self.marker = None
 
     def get_size(self):
         return self.counter if self.counter < self.size else self.size
@@ -84,40 +153,510 @@ class ExpDecayingSample(object):
                     del self.values[first]
             else:
                 heapq.heappush(self.priorities, first)
+        self.marker = None
+
+    def update_many(self, values):
+        """
+        Adds a batch of values to the sample. All values share the weight of
+        the current time, which allows skipping over the values which would
+        not make it into a full reservoir without drawing a random number
+        for each of them.
+
+        :type values: C{list}
+        :param values: the values to be added
+        """
+        if self.size == 0:
+            return
+        self._rescale_if_necessary()
+        weight = self._weight(self.clock.time() - self.start_time)
+        rand = random.random
+        log = math.log
+        log1p = math.log1p
+        heapreplace = heapq.heapreplace
+        kept = self.values
+        priorities = self.priorities
+        length = len(values)
+        i = min(length, max(0, self.size - self.counter))
+        for value in values[:i]:
+            priority = weight / (1.0 - rand())
+            if priority not in kept:
+                kept[priority] = value
+                heapq.heappush(priorities, priority)
+        self.counter += length
+        while i < length:
+            # a value is kept if weight / u > priorities[0] for a uniform u,
+            # i.e. with probability p; skip the values which are not kept
+            p = weight / priorities[0]
+            if p < 1.0:
+                i += int(log(1.0 - rand()) / log1p(-p))
+                if i >= length:
+                    break
+                priority = weight / (p * (1.0 - rand()))
+            else:
+                priority = weight / (1.0 - rand())
+            if priority not in kept:
+                kept[priority] = values[i]
+                first = heapreplace(priorities, priority)
+                while first not in kept:
+                    first = heapq.heappop(priorities)
+                del kept[first]
+            i += 1
+        self.marker = None
+
+    def get_state(self):
+        self._rescale_if_necessary()
+        return {"alpha": self.alpha,
+                "start_time": self.start_time,
+                "counter": self.counter,
+                "items": [list(item) for item in self._items()]}
+
+    def merge_state(self, state):
+        """
+        Merges the reservoir of another sample. Its priorities are moved to
+        the landmark of this sample, and the size highest priorities of
+        both reservoirs are kept.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another sample
+        """
+        if state["alpha"] != self.alpha:
+            raise ValueError("Cannot merge samples with different alpha")
+        self._rescale_if_necessary()
+        factor = math.exp(
+            self.alpha * (state["start_time"] - self.start_time))
+        items = self._items()
+        items.extend((priority * factor, value)
+                     for priority, value in state["items"])
+        self._load(heapq.nlargest(self.size, items, key=itemgetter(0)),
+                   self.counter + state["counter"])
+        self.marker = None
+
+    def _items(self):
+        "the (priority, value) pairs in the reservoir"
+        return list(self.values.items())
+
+    def _load(self, items, counter):
+        self.values = dict(items)
+        self.priorities = list(self.values)
+        heapq.heapify(self.priorities)
+        self.counter = counter if len(self.values) >= self.size \
+            else len(self.values)
 
     def _rescale_if_necessary(self):
         if self.clock.time() >= self.next_time:
             self._rescale()
 
     def _rescale(self):
-        self.next_time = self.clock.time() + \
-            ExpDecayingSample.RESCALE_THREASHOLD
-        old_start_time = self.start_time
-        self.start_time = self.clock.time()
-        new_values = {}
-        new_priorities = []
-        for key, val in self.values.items():
-            priority = key * \
-                math.exp(-self.alpha * (self.start_time - old_start_time))
-            new_values[priority] = val
-            heapq.heappush(new_priorities, priority)
-        self.values = new_values
-        self.priorities = new_priorities
-        self.counter = len(self.values)
+        """
+        Moves the landmark to the current time and scales all priorities to
+        it in one pass. Like every other change it runs under the lock of
+        the owner, so a writer waits for it, but only for that pass.
+        """
+        now = self.clock.time()
+        self.next_time = now + ExpDecayingSample.RESCALE_THREASHOLD
+        factor = math.exp(-self.alpha * (now - self.start_time))
+        self.start_time = now
+        # build the new reservoir in bulk and swap it in with one assignment
+        values = self.values
+        new_values = dict(zip(_scale(list(values), factor), values.values()))
+        new_priorities = list(new_values)
+        heapq.heapify(new_priorities)
+        self.values, self.priorities = new_values, new_priorities
+        self.counter = len(new_values)
+        self.marker = None
 
     def _weight(self, value):
         return math.exp(self.alpha * value)
 
-    def get_snapshot(self):
+    def _create_snapshot(self):
         return Snapshot(self.values.values())
 
 
-class SlidingTimeWindowSample(object):
+def _scale(priorities, factor):
+    "multiply a sequence of priorities by factor, returning a list"
+    if numpy is not None:
+        return numpy.multiply(priorities, factor).tolist()
+    return [priority * factor for priority in priorities]
+
+
+class ArrayExpDecayingSample(ExpDecayingSample):
+
+    """
+    An L{ExpDecayingSample} which keeps priorities and values in two
+    parallel preallocated arrays of doubles, organized together as one
+    min-heap on the priorities. A value which beats the lowest priority
+    replaces the top of the heap in place, so memory stays at exactly size
+    entries and equal priorities never drop a sample.
+    """
+
+    __slots__ = ()
+
+    def clear(self):
+        self.priorities = array("d", [0.0]) * self.size
+        self.values = array("d", [0.0]) * self.size
+        self.counter = 0
+        self.start_time = self.clock.time()
+        self.next_time = self.clock.time() + \
+            ExpDecayingSample.RESCALE_THREASHOLD
+        self.marker = None
+
+    def update(self, value):
+        """
+        Adds a value to the sample.
+
+        :type value: C{int} or C{float}
+        :param value: the value to be added
+        """
+        if self.size == 0:
+            return
+        self._rescale_if_necessary()
+        priority = self._weight(
+            self.clock.time() - self.start_time) / (1.0 - random.random())
+        counter = self.counter
+        self.counter = counter + 1
+        if counter < self.size:
+            self._push(counter, priority, value)
+        elif priority > self.priorities[0]:
+            self._replace_top(priority, value)
+        self.marker = None
+
+    def update_many(self, values):
+        """
+        Adds a batch of values to the sample, see
+        L{ExpDecayingSample.update_many}.
+
+        :type values: C{list}
+        :param values: the values to be added
+        """
+        if self.size == 0:
+            return
+        self._rescale_if_necessary()
+        weight = self._weight(self.clock.time() - self.start_time)
+        rand = random.random
+        log = math.log
+        log1p = math.log1p
+        priorities = self.priorities
+        length = len(values)
+        i = min(length, max(0, self.size - self.counter))
+        for index in range(i):
+            self._push(self.counter + index, weight / (1.0 - rand()),
+                       values[index])
+        self.counter += length
+        while i < length:
+            p = weight / priorities[0]
+            if p < 1.0:
+                i += int(log(1.0 - rand()) / log1p(-p))
+                if i >= length:
+                    break
+                priority = weight / (p * (1.0 - rand()))
+            else:
+                priority = weight / (1.0 - rand())
+            self._replace_top(priority, values[i])
+            i += 1
+        self.marker = None
+
+    def _items(self):
+        size = self.get_size()
+        return list(zip(self.priorities[:size], self.values[:size]))
+
+    def _load(self, items, counter):
+        # ascending priorities are a valid min-heap
+        items.sort(key=itemgetter(0))
+        size = len(items)
+        self.priorities[:size] = array("d", [item[0] for item in items])
+        self.values[:size] = array("d", [item[1] for item in items])
+        self.counter = counter if size >= self.size else size
+
+    def _push(self, pos, priority, value):
+        priorities = self.priorities
+        values = self.values
+        while pos > 0:
+            parent = (pos - 1) >> 1
+            if priorities[parent] <= priority:
+                break
+            priorities[pos] = priorities[parent]
+            values[pos] = values[parent]
+            pos = parent
+        priorities[pos] = priority
+        values[pos] = value
+
+    def _replace_top(self, priority, value):
+        priorities = self.priorities
+        values = self.values
+        size = self.size
+        pos = 0
+        child = 1
+        while child < size:
+            right = child + 1
+            if right < size and priorities[right] < priorities[child]:
+                child = right
+            if priorities[child] >= priority:
+                break
+            priorities[pos] = priorities[child]
+            values[pos] = values[child]
+            pos = child
+            child = 2 * pos + 1
+        priorities[pos] = priority
+        values[pos] = value
+
+    def _rescale(self):
+        now = self.clock.time()
+        self.next_time = now + ExpDecayingSample.RESCALE_THREASHOLD
+        factor = math.exp(-self.alpha * (now - self.start_time))
+        self.start_time = now
+        # scaling all priorities by the same factor keeps the heap order
+        size = self.counter = self.get_size()
+        if numpy is not None:
+            scaled = numpy.frombuffer(self.priorities, dtype=numpy.float64)
+            scaled[:size] *= factor
+        else:
+            self.priorities[:size] = array(
+                "d", _scale(self.priorities[:size], factor))
+        self.marker = None
+
+    def _create_snapshot(self):
+        return Snapshot(self.values[:self.get_size()])
+
+
+class UniformSample(Sample):
+
+    """
+    A uniform random sample of all values seen so far, kept in a
+    preallocated array of doubles. Once the reservoir is full it uses Li's
+    Algorithm L: instead of drawing a random number for every value, the
+    number of values to skip before the next replacement is drawn
+    directly, so the random number generator is only called
+    O(size * log(count / size)) times in total and skipped values just bump
+    a counter.
+
+    @see: <a href="https://dl.acm.org/doi/10.1145/198429.198435">Li.
+          Reservoir-Sampling Algorithms of Time Complexity
+          O(n(1 + log(N/n))). ACM Transactions on Mathematical Software
+          20(4) (1994)</a>
+    """
+
+    __slots__ = ("size", "values", "counter", "weight", "next_index")
+
+    def __init__(self, size=DEFAULT_SIZE):
+        """
+        Creates a new L{UniformSample}.
+
+        :type size: C{int}
+        :param size: the number of samples to keep in the sampling reservoir
+        """
+        super(UniformSample, self).__init__()
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        self.values = array("d", [0.0]) * self.size
+        self.counter = 0
+        self.weight = 1.0
+        self.next_index = self.size
+        self.marker = None
+
+    def get_size(self):
+        return self.counter if self.counter < self.size else self.size
+
+    def update(self, value):
+        """
+        Adds a value to the sample.
+
+        :type value: C{int} or C{float}
+        :param value: the value to be added
+        """
+        if self.size == 0:
+            return
+        counter = self.counter
+        self.counter = counter + 1
+        if counter < self.size:
+            self.values[counter] = value
+            self.marker = None
+            if counter + 1 == self.size:
+                self._start_skipping()
+        elif counter == self.next_index:
+            self._replace(counter, value)
+
+    def update_many(self, values):
+        """
+        Adds a batch of values to the sample, jumping straight from one
+        replaced value to the next.
+
+        :type values: C{list}
+        :param values: the values to be added
+        """
+        if self.size == 0:
+            return
+        start = self.counter
+        length = len(values)
+        filled = min(length, max(0, self.size - start))
+        if filled:
+            self.values[start:start + filled] = array("d", values[:filled])
+            self.marker = None
+            if start + filled == self.size:
+                self._start_skipping()
+        self.counter = start + length
+        while self.next_index < self.counter:
+            index = self.next_index
+            self._replace(index, values[index - start])
+
+    def get_state(self):
+        return {"counter": self.counter,
+                "values": self.values[:self.get_size()].tolist()}
+
+    def merge_state(self, state):
+        """
+        Merges the reservoir of another sample, taking from each reservoir
+        in proportion to the number of values it has seen.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another sample
+        """
+        other = state["values"]
+        other_counter = state["counter"]
+        if not other_counter:
+            return
+        own = self.values[:self.get_size()].tolist()
+        counter = self.counter + other_counter
+        keep = min(self.size, len(own) + len(other))
+        taken = int(round(keep * float(other_counter) / counter))
+        taken = max(keep - len(own), min(taken, len(other)))
+        values = random.sample(own, keep - taken) + \
+            random.sample(other, taken)
+        self.values[:keep] = array("d", values)
+        self.counter = counter
+        if counter >= self.size > 0:
+            # the largest of the size smallest keys out of counter uniform
+            # keys, which is where Algorithm L would be after counter values
+            self.weight = random.betavariate(self.size,
+                                             counter - self.size + 1)
+            self._skip(counter - 1)
+        self.marker = None
+
+    def _start_skipping(self):
+        self.weight = math.exp(math.log(1.0 - random.random()) / self.size)
+        self._skip(self.size - 1)
+
+    def _replace(self, index, value):
+        self.values[int(random.random() * self.size)] = value
+        self.weight *= math.exp(math.log(1.0 - random.random()) / self.size)
+        self._skip(index)
+        self.marker = None
+
+    def _skip(self, index):
+        "draw the index of the next value which goes into the reservoir"
+        self.next_index = index + 1 + int(
+            math.log(1.0 - random.random()) / math.log1p(-self.weight))
+
+    def _create_snapshot(self):
+        return Snapshot(self.values[:self.get_size()])
+
+
+class SlidingWindowSample(Sample):
+
+    """
+    A sample of the last size measurements, kept in a preallocated ring of
+    doubles. Unlike L{ExpDecayingSample} recording a value neither
+    allocates nor draws a random number, and the snapshot copies the ring
+    once: the next position is looked up in a ring of index ints shared by
+    all samples of the same size, as ints above 256 are allocated anew by
+    every addition, and the count of values is a float.
+    """
+
+    __slots__ = ("size", "values", "counter", "index", "ring")
+
+    def __init__(self, size=DEFAULT_SIZE):
+        """
+        Creates a new L{SlidingWindowSample}.
+
+        :type size: C{int}
+        :param size: the number of most recent values to keep
+        """
+        super(SlidingWindowSample, self).__init__()
+        self.size = size
+        self.ring = _ring(size)
+        self.clear()
+
+    def clear(self):
+        self.values = array("d", [0.0]) * self.size
+        self.counter = 0.0
+        self.index = 0
+        self.marker = None
+
+    def get_size(self):
+        return int(min(self.counter, self.size))
+
+    def update(self, value):
+        """
+        Adds a value to the sample.
+
+        :type value: C{int} or C{float}
+        :param value: the value to be added
+        """
+        if self.size == 0:
+            return
+        index = self.index
+        self.values[index] = value
+        self.index = self.ring[index]
+        self.counter += 1
+        self.marker = None
+
+    def update_many(self, values):
+        if self.size == 0:
+            return
+        length = len(values)
+        values = array("d", values[-self.size:])
+        start = (self.index + length - len(values)) % self.size
+        head = min(len(values), self.size - start)
+        self.values[start:start + head] = values[:head]
+        self.values[:len(values) - head] = values[head:]
+        self.index = (self.index + length) % self.size
+        self.counter += length
+        self.marker = None
+
+    def get_state(self):
+        if self.counter < self.size:
+            values = self.values[:self.index]
+        else:
+            values = self.values[self.index:] + self.values[:self.index]
+        return {"counter": int(self.counter), "values": values.tolist()}
+
+    def merge_state(self, state):
+        """
+        Appends the values of another sample after the values of this one.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another sample
+        """
+        values = state["values"]
+        self.update_many(values)
+        self.counter += state["counter"] - len(values)
+
+    def _create_snapshot(self):
+        if self.counter < self.size:
+            return Snapshot(self.values[:self.index])
+        return Snapshot(self.values)
+
+
+_rings = {}
+
+
+def _ring(size):
+    "the position following each position of a ring of the given size"
+    ring = _rings.get(size)
+    if ring is None:
+        ring = _rings[size] = tuple(range(1, size)) + (0,) if size else ()
+    return ring
+
+
+class SlidingTimeWindowSample(Sample):
 
     """
     A sample of measurements made in a sliding time window.
     """
 
+    __slots__ = ("window", "clock", "values")
+
     DEFAULT_WINDOW = 300
 
     def __init__(self, window=DEFAULT_WINDOW, clock=time):
@@ -127,21 +666,219 @@ class SlidingTimeWindowSample(object):
         :param clock: clock.time() is called to get the current time as seconds
                       since the epoch.
         """
+        super(SlidingTimeWindowSample, self).__init__()
         self.window = window
         self.clock = clock
         self.clear()
 
     def clear(self):
         self.values = []
+        self.marker = None
 
     def _trim(self):
         deadline = self.clock.time() - self.window
         while self.values and self.values[0][0] < deadline:
             heapq.heappop(self.values)
+            self.marker = None
 
     def update(self, value):
         heapq.heappush(self.values, (self.clock.time(), value))
+        self.marker = None
+
+    def update_many(self, values):
+        now = self.clock.time()
+        push = heapq.heappush
+        for value in values:
+            push(self.values, (now, value))
+        self.marker = None
 
     def get_snapshot(self):
         self._trim()
+        return super(SlidingTimeWindowSample, self).get_snapshot()
+
+    def get_state(self):
+        self._trim()
+        return {"values": [list(item) for item in self.values]}
+
+    def merge_state(self, state):
+        """
+        Adds the timestamped values of another sample.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another sample
+        """
+        for item in state["values"]:
+            heapq.heappush(self.values, tuple(item))
+        self._trim()
+        self.marker = None
+
+    def _create_snapshot(self):
         return Snapshot(x[1] for x in self.values)
+
+
+class BucketedSlidingTimeWindowSample(Sample):
+
+    """
+    A sample of measurements made in a sliding time window, which is split
+    into a ring of fixed-width time buckets. Each bucket keeps a uniform
+    reservoir of at most bucket_size values, so memory is capped no matter
+    how many values arrive, and expiring old values only resets buckets.
+    """
+
+    __slots__ = ("window", "bucket_width", "bucket_size", "clock", "buckets",
+                 "epochs", "counts", "reservoirs")
+
+    DEFAULT_WINDOW = 300
+    DEFAULT_BUCKET_WIDTH = 1
+    DEFAULT_BUCKET_SIZE = 64
+
+    def __init__(self, window=DEFAULT_WINDOW, bucket_width=DEFAULT_BUCKET_WIDTH,
+                 bucket_size=DEFAULT_BUCKET_SIZE, clock=time):
+        """Creates a BucketedSlidingTimeWindowSample.
+
+        :param window: the length of the time window in seconds
+        :param bucket_width: the length of a bucket in seconds
+        :param bucket_size: the number of values kept per bucket
+        :param clock: clock.time() is called to get the current time as seconds
+                      since the epoch.
+        """
+        super(BucketedSlidingTimeWindowSample, self).__init__()
+        self.window = window
+        self.bucket_width = bucket_width
+        self.bucket_size = bucket_size
+        self.clock = clock
+        # one more bucket than the window needs for the partial current one
+        self.buckets = int(math.ceil(float(window) / bucket_width)) + 1
+        self.clear()
+
+    def clear(self):
+        self.epochs = [None] * self.buckets
+        self.counts = [0] * self.buckets
+        self.reservoirs = [[] for i in range(self.buckets)]
+        self.marker = None
+
+    def get_size(self):
+        "get number of values in the window"
+        return sum(self.counts[slot] for slot in self._live_slots())
+
+    def update(self, value):
+        """
+        Adds a value to the sample.
+
+        :type value: C{int} or C{float}
+        :param value: the value to be added
+        """
+        slot = self._current_slot()
+        count = self.counts[slot] + 1
+        self.counts[slot] = count
+        if count <= self.bucket_size:
+            self.reservoirs[slot].append(value)
+        else:
+            index = int(random.random() * count)
+            if index < self.bucket_size:
+                self.reservoirs[slot][index] = value
+        self.marker = None
+
+    def update_many(self, values):
+        slot = self._current_slot()
+        reservoir = self.reservoirs[slot]
+        size = self.bucket_size
+        count = self.counts[slot]
+        rand = random.random
+        for value in values:
+            count += 1
+            if count <= size:
+                reservoir.append(value)
+            else:
+                index = int(rand() * count)
+                if index < size:
+                    reservoir[index] = value
+        self.counts[slot] = count
+        self.marker = None
+
+    def get_state(self):
+        return {"window": self.window,
+                "bucket_width": self.bucket_width,
+                "bucket_size": self.bucket_size,
+                "buckets": [[self.epochs[slot], self.counts[slot],
+                             list(self.reservoirs[slot])]
+                            for slot in self._live_slots()]}
+
+    def merge_state(self, state):
+        """
+        Merges the buckets of another sample with the same layout. Buckets
+        of the same time are combined into one uniform reservoir.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another sample
+        """
+        if (state["window"], state["bucket_width"], state["bucket_size"]) != \
+                (self.window, self.bucket_width, self.bucket_size):
+            raise ValueError("Cannot merge samples with different layouts")
+        oldest = int(self.clock.time() // self.bucket_width) - self.buckets
+        for epoch, count, reservoir in state["buckets"]:
+            slot = epoch % self.buckets
+            current = self.epochs[slot]
+            if not count or epoch <= oldest or \
+                    (current is not None and current > epoch):
+                continue
+            if current != epoch:
+                self.epochs[slot] = epoch
+                self.counts[slot] = 0
+                self.reservoirs[slot] = []
+            own_count = self.counts[slot]
+            own = self.reservoirs[slot]
+            total = own_count + count
+            # take the same fraction of both reservoirs, as in a snapshot
+            fraction = float(self.bucket_size) / total
+            if own_count:
+                fraction = min(fraction, len(own) / float(own_count))
+            if count:
+                fraction = min(fraction, len(reservoir) / float(count))
+            merged = []
+            for part, part_count in ((own, own_count), (reservoir, count)):
+                keep = int(round(part_count * fraction))
+                if keep >= len(part):
+                    merged.extend(part)
+                else:
+                    merged.extend(random.sample(part, keep))
+            self.counts[slot] = total
+            self.reservoirs[slot] = merged[:self.bucket_size]
+        self.marker = None
+
+    def _snapshot_key(self):
+        # buckets expire with time, not only with updates
+        return self.marker, int(self.clock.time() // self.bucket_width)
+
+    def _create_snapshot(self):
+        # buckets which saw more values than they keep are sampled more
+        # sparsely; take the same fraction of every bucket so the snapshot
+        # stays a uniform sample of the whole window
+        slots = [slot for slot in self._live_slots() if self.counts[slot]]
+        if not slots:
+            return Snapshot([])
+        fraction = min(len(self.reservoirs[slot]) / float(self.counts[slot])
+                       for slot in slots)
+        values = []
+        for slot in slots:
+            reservoir = self.reservoirs[slot]
+            keep = int(round(self.counts[slot] * fraction))
+            if keep >= len(reservoir):
+                values.extend(reservoir)
+            else:
+                values.extend(random.sample(reservoir, keep))
+        return Snapshot(values)
+
+    def _current_slot(self):
+        epoch = int(self.clock.time() // self.bucket_width)
+        slot = epoch % self.buckets
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.counts[slot] = 0
+            self.reservoirs[slot] = []
+        return slot
+
+    def _live_slots(self):
+        oldest = int(self.clock.time() // self.bucket_width) - self.buckets
+        return [slot for slot, epoch in enumerate(self.epochs)
+                if epoch is not None and epoch > oldest]
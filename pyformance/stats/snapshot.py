@@ -1,22 +1,53 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
 class Snapshot(object):
 
     """
-    This class is used by the histogram meter
+    This class is used by the histogram meter.
+
+    The values are only sorted once a single percentile is asked for;
+    get_percentiles answers several quantiles at once by partitioning
+    around the ranks it needs when NumPy is available.
     """
 
+    __slots__ = ("_values", "_sorted")
+
     MEDIAN = 0.5
     P75_Q = 0.75
     P95_Q = 0.95
     P99_Q = 0.99
     P999_Q = 0.999
 
+    # below this size converting to an array costs more than sorting
+    PARTITION_THRESHOLD = 256
+
     def __init__(self, values):
         super(Snapshot, self).__init__()
-        self.values = sorted(values)
+        self._values = list(values)
+        self._sorted = False
+
+    @property
+    def values(self):
+        "the sorted values"
+        if not self._sorted:
+            # the list is a private copy, so it is sorted in place; numbers
+            # compare in C, so other readers never see it half sorted
+            self._values.sort()
+            self._sorted = True
+        return self._values
+
+    @values.setter
+    def values(self, values):
+        self._values = list(values)
+        self._sorted = False
 
     def get_size(self):
         "get current size"
-        return len(self.values)
+        return len(self._values)
 
     def get_median(self):
         "get current median"
@@ -57,3 +88,39 @@ class Snapshot(object):
         lower = self.values[int(pos) - 1]
         upper = self.values[int(pos)]
         return lower + (pos - int(pos)) * (upper - lower)
+
+    def get_percentiles(self, percentiles):
+        """
+        get several percentiles at once, in the order they were given
+
+        :param percentiles: float values between 0 and 1
+        """
+        for percentile in percentiles:
+            if percentile < 0 or percentile > 1:
+                raise ValueError("{0} is not in [0..1]".format(percentile))
+        if (self._sorted or numpy is None or
+                len(self._values) < self.PARTITION_THRESHOLD):
+            return [self.get_percentile(q) for q in percentiles]
+
+        length = len(self._values)
+        positions = [q * (length + 1) for q in percentiles]
+        ranks = set()
+        for pos in positions:
+            if 1 <= pos < length:
+                ranks.update((int(pos) - 1, int(pos)))
+        ranks.update((0, length - 1))
+        ranks = sorted(ranks)
+        partitioned = numpy.partition(numpy.asarray(self._values), ranks)
+        selected = dict(zip(ranks, partitioned[ranks].tolist()))
+
+        results = []
+        for pos in positions:
+            if pos < 1:
+                results.append(selected[0])
+            elif pos >= length:
+                results.append(selected[length - 1])
+            else:
+                lower = selected[int(pos) - 1]
+                upper = selected[int(pos)]
+                results.append(lower + (pos - int(pos)) * (upper - lower))
+        return results
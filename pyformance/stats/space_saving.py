@@ -0,0 +1,142 @@
+import heapq
+import itertools
+
+DEFAULT_SIZE = 100
+
+
+class SpaceSaving(object):
+
+    """
+    Tracks the heaviest keys of a stream in a fixed number of slots. Once
+    all slots are taken, a new key replaces the lightest one and inherits
+    its count as an error bound, so counts are overestimated by at most
+    the total weight divided by the number of slots, and every key heavier
+    than that is guaranteed to be tracked.
+
+    @see: <a href="https://www.cs.ucsb.edu/sites/default/files/documents/2005-23.pdf">
+          Metwally, Agrawal, El Abbadi. Efficient Computation of Frequent and
+          Top-k Elements in Data Streams. ICDT '05 (2005)</a>
+    """
+
+    __slots__ = ("size", "counts", "errors", "heap", "_sequence")
+
+    def __init__(self, size=DEFAULT_SIZE):
+        """
+        Creates a new L{SpaceSaving} summary.
+
+        :type size: C{int}
+        :param size: the number of keys tracked
+        """
+        super(SpaceSaving, self).__init__()
+        if size < 1:
+            raise ValueError("size must be positive")
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        self.counts = {}
+        self.errors = {}
+        # one [count, sequence, key] entry per tracked key whose count may
+        # lag behind counts[key]: counts only grow, so an up to date entry
+        # at the top of the heap belongs to the lightest key. The sequence
+        # keeps keys of different types from being compared on ties.
+        self.heap = []
+        self._sequence = itertools.count()
+
+    def add(self, key, weight=1):
+        """
+        Adds weight to the count of key.
+
+        :param key: a hashable key
+        :type weight: C{int} or C{float}
+        :param weight: a non-negative weight
+        """
+        counts = self.counts
+        if key in counts:
+            counts[key] += weight
+        elif len(counts) < self.size:
+            counts[key] = weight
+            self.errors[key] = 0
+            heapq.heappush(self.heap, [weight, next(self._sequence), key])
+        else:
+            entry = self._lightest()
+            del counts[entry[2]]
+            del self.errors[entry[2]]
+            counts[key] = entry[0] + weight
+            self.errors[key] = entry[0]
+            entry[0] = counts[key]
+            entry[2] = key
+            heapq.heapreplace(self.heap, entry)
+
+    def _lightest(self):
+        "refresh outdated entries until the top of the heap is up to date"
+        heap = self.heap
+        counts = self.counts
+        while heap[0][0] != counts[heap[0][2]]:
+            entry = heap[0]
+            entry[0] = counts[entry[2]]
+            heapq.heapreplace(heap, entry)
+        return heap[0]
+
+    def get_min(self):
+        "get the count a new key would inherit, 0 while there are free slots"
+        if len(self.counts) < self.size:
+            return 0
+        return self._lightest()[0]
+
+    def top(self, n=None):
+        """
+        Gets the heaviest keys.
+
+        :type n: C{int}
+        :param n: the number of keys, all tracked keys by default
+
+        :return: C{list} of (key, count, error) sorted by descending count,
+                 where count - error is a lower bound of the true count
+        """
+        counts = self.counts
+        if n is None:
+            keys = sorted(counts, key=counts.__getitem__, reverse=True)
+        else:
+            keys = heapq.nlargest(n, counts, key=counts.__getitem__)
+        return [(key, counts[key], self.errors[key]) for key in keys]
+
+    def get_state(self):
+        "get the size and the tracked keys as plain data"
+        return {"size": self.size,
+                "items": [list(item) for item in self.top()],
+                "min": self.get_min()}
+
+    def merge_state(self, state):
+        """
+        Merges the summary of another stream. A key missing from one
+        summary may have been evicted from it, so it is charged that
+        summary's minimum count, which keeps the error bounds valid.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another summary
+        """
+        own_min = self.get_min()
+        other_min = state["min"]
+        counts = dict((key, (count + other_min, error + other_min))
+                      for key, count, error in self.top())
+        for key, count, error in state["items"]:
+            if key in counts:
+                own_count, own_error = counts[key]
+                counts[key] = (own_count - other_min + count,
+                               own_error - other_min + error)
+            else:
+                counts[key] = (count + own_min, error + own_min)
+        keys = heapq.nlargest(self.size, counts,
+                              key=lambda key: counts[key][0])
+        self.clear()
+        for key in keys:
+            count, error = counts[key]
+            self.counts[key] = count
+            self.errors[key] = error
+            self.heap.append([count, next(self._sequence), key])
+        heapq.heapify(self.heap)
+
+    def merge(self, other):
+        "merge another summary into this one"
+        self.merge_state(other.get_state())
@@ -0,0 +1,221 @@
+from __future__ import division
+import math
+from bisect import bisect_left
+
+from .samples import Sample
+from .snapshot import Snapshot
+
+DEFAULT_COMPRESSION = 200
+
+
+class TDigestSample(Sample):
+
+    """
+    A sample which summarizes the values in a t-digest: a sorted list of
+    weighted centroids, which are kept small near the tails so extreme
+    percentiles stay accurate. Values are collected in a buffer which is
+    merged into the centroids once it is full, so updates are amortized
+    O(1) and memory is bounded by the compression.
+
+    @see: <a href="https://github.com/tdunning/t-digest">Dunning et al.
+          Computing Extremely Accurate Quantiles Using t-Digests</a>
+    """
+
+    __slots__ = ("compression", "buffer_size", "centroids", "buffer", "count",
+                 "min", "max")
+
+    def __init__(self, compression=DEFAULT_COMPRESSION, buffer_size=None):
+        """
+        Creates a new L{TDigestSample}.
+
+        :type compression: C{int}
+        :param compression: bounds the number of centroids, which stays
+                            below it; higher values are more accurate
+        :type buffer_size: C{int}
+        :param buffer_size: the number of values collected before they are
+                            merged, defaults to five times the compression
+        """
+        super(TDigestSample, self).__init__()
+        if compression <= 0:
+            raise ValueError("compression must be positive")
+        self.compression = compression
+        self.buffer_size = buffer_size or 5 * compression
+        self.clear()
+
+    def clear(self):
+        self.centroids = ([], [])
+        self.buffer = []
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.marker = None
+
+    def get_size(self):
+        return self.count + len(self.buffer)
+
+    def update(self, value):
+        """
+        Adds a value to the sample.
+
+        :type value: C{int} or C{float}
+        :param value: the value to be added
+        """
+        self.buffer.append((value, 1))
+        if len(self.buffer) >= self.buffer_size:
+            self._compress()
+        self.marker = None
+
+    def update_many(self, values):
+        self.buffer.extend((value, 1) for value in values)
+        if len(self.buffer) >= self.buffer_size:
+            self._compress()
+        self.marker = None
+
+    def get_state(self):
+        means, weights, count, minimum, maximum = self._summarize()
+        # the infinite sentinels of an empty digest are not valid JSON
+        empty = not means
+        return {"means": list(means),
+                "weights": list(weights),
+                "min": None if empty else minimum,
+                "max": None if empty else maximum}
+
+    def merge_state(self, state):
+        """
+        Adds the centroids of another t-digest to this one.
+
+        :type state: C{dict}
+        :param state: the result of L{get_state} on another sample
+        """
+        self.buffer.extend(zip(state["means"], state["weights"]))
+        self._compress()
+        if state["means"]:
+            self.min = min(self.min, state["min"])
+            self.max = max(self.max, state["max"])
+        self.marker = None
+
+    def _create_snapshot(self):
+        return TDigestSnapshot(*self._summarize())
+
+    def _compress(self):
+        means, weights, count, minimum, maximum = self._summarize()
+        self.buffer = []
+        self.centroids = (means, weights)
+        self.count = count
+        self.min = minimum
+        self.max = maximum
+
+    def _summarize(self):
+        """
+        Merge the buffered values into a copy of the centroids. Returns the
+        new centroid means and weights, the count, the minimum and maximum.
+        """
+        means, weights = self.centroids
+        points = list(self.buffer)
+        if not points:
+            return means, weights, self.count, self.min, self.max
+        points.sort()
+        minimum = min(self.min, points[0][0])
+        maximum = max(self.max, points[-1][0])
+        if means:
+            points = sorted(points + list(zip(means, weights)))
+
+        # merge neighbours as long as a centroid stays below the weight the
+        # k2 scale function allows at its quantile
+        total = float(sum(weight for mean, weight in points))
+        normalizer = self.compression / (
+            4 * math.log(max(total / self.compression, 1.0)) + 24)
+        means = []
+        weights = []
+        mean, weight = points[0]
+        sofar = 0.0
+        limit = total * self._next_quantile(0.0, normalizer)
+        for point_mean, point_weight in points[1:]:
+            if sofar + weight + point_weight <= limit:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                sofar += weight
+                means.append(mean)
+                weights.append(weight)
+                limit = total * self._next_quantile(sofar / total, normalizer)
+                mean, weight = point_mean, point_weight
+        means.append(mean)
+        weights.append(weight)
+        return means, weights, int(total), minimum, maximum
+
+    @staticmethod
+    def _next_quantile(quantile, normalizer):
+        # k2(q) = normalizer * log(q / (1 - q)), solved for k2(q) + 1
+        if quantile <= 0.0:
+            return 0.0
+        if quantile >= 1.0:
+            return 1.0
+        odds = quantile / (1 - quantile) * math.exp(1 / normalizer)
+        return odds / (1 + odds)
+
+
+class TDigestSnapshot(Snapshot):
+
+    """
+    A snapshot of the centroids of a L{TDigestSample}
+    """
+
+    __slots__ = ("means", "weights", "count", "min", "max", "centers")
+
+    def __init__(self, means, weights, count, minimum, maximum):
+        # the raw values are not available, so Snapshot.__init__ is skipped
+        # and get_percentiles asks get_percentile for every quantile
+        super(Snapshot, self).__init__()
+        self._sorted = True
+        self.means = means
+        self.weights = weights
+        self.count = count
+        self.min = minimum
+        self.max = maximum
+        # the rank of each centroid's center
+        self.centers = []
+        total = 0.0
+        for weight in self.weights:
+            self.centers.append(total + weight / 2.0)
+            total += weight
+
+    @property
+    def values(self):
+        """
+        the mean of each centroid, sorted; one per centroid, while get_size
+        counts every recorded value
+        """
+        return self.means
+
+    def get_size(self):
+        "get number of recorded values"
+        return self.count
+
+    def get_percentile(self, percentile):
+        """
+        get custom percentile
+
+        :param percentile: float value between 0 and 1
+        """
+        if percentile < 0 or percentile > 1:
+            raise ValueError("{0} is not in [0..1]".format(percentile))
+        if self.count == 0:
+            return 0
+        if len(self.means) == 1:
+            return self.means[0]
+        rank = percentile * self.count
+        index = bisect_left(self.centers, rank)
+        if index == 0:
+            # interpolate between the minimum and the first center
+            lower, upper = (0.0, self.min), (self.centers[0], self.means[0])
+        elif index == len(self.centers):
+            lower = (self.centers[-1], self.means[-1])
+            upper = (float(self.count), self.max)
+        else:
+            lower = (self.centers[index - 1], self.means[index - 1])
+            upper = (self.centers[index], self.means[index])
+        if upper[0] == lower[0]:
+            return upper[1]
+        return lower[1] + (rank - lower[0]) * (upper[1] - lower[1]) / \
+            (upper[0] - lower[0])
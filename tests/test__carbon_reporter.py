@@ -134,6 +134,66 @@ class TestCarbonReporter(TimedTestCase):
         ])
         self.assertEqual(test_data, expected_data)
 
+    def test_report_now_labels(self):
+        r = CarbonReporter(
+            registry=self.registry, reporting_interval=1, clock=self.clock,
+            socket_factory=lambda: self)
+        requests = self.registry.counter("requests",
+                                         labels=("route", "status"))
+        requests.labels("/api", 200).inc()
+        requests.labels(route="/api", status=500).inc(2)
+        self.clock.now = 2
+        r.report_now()
+        test_data = sorted(self.output.getvalue().decode().splitlines())
+        self.assertEqual(['requests.count;route=/api;status=200 1 2',
+                          'requests.count;route=/api;status=500 2 2'],
+                         test_data)
+
+    def test_report_now_escapes_labels(self):
+        r = CarbonReporter(
+            registry=self.registry, reporting_interval=1, clock=self.clock,
+            socket_factory=lambda: self)
+        self.registry.counter("requests", labels=("route",)).labels(
+            "/a b;c=d").inc()
+        self.clock.now = 2
+        r.report_now()
+        self.assertEqual("requests.count;route=/a_b_c_d 1 2\n",
+                         self.output.getvalue().decode())
+
+    def test_report_now_changed_only(self):
+        r = CarbonReporter(
+            registry=self.registry, reporting_interval=1, clock=self.clock,
+            socket_factory=lambda: self, changed_only=True)
+        c1 = self.registry.counter("c1")
+        c2 = self.registry.counter("c2")
+        c1.inc()
+        c2.inc()
+        self.clock.now = 2
+        r.report_now()
+        c2.inc()
+        r.report_now()
+        r.report_now()
+        test_data = self.output.getvalue().decode().splitlines()
+        self.assertEqual(['c1.count 1 2', 'c2.count 1 2', 'c2.count 2 2'],
+                         sorted(test_data))
+
+    def test_report_now_changed_only_failed_send(self):
+        def fail(*args):
+            raise IOError("connection refused")
+
+        r = CarbonReporter(
+            registry=self.registry, reporting_interval=1, clock=self.clock,
+            socket_factory=lambda: self, changed_only=True)
+        self.registry.counter("c1").inc()
+        self.clock.now = 2
+        self.sendall, sendall = fail, self.sendall
+        self.assertRaises(IOError, r.report_now)
+        self.sendall = sendall
+        r.report_now()
+        r.report_now()
+        self.assertEqual(['c1.count 1 2'],
+                         self.output.getvalue().decode().splitlines())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -75,6 +75,14 @@ class TestConsoleReporter(TimedTestCase):
                          '           mean_rate = 1.0',
                          'c1:', '               count = 1', ''].sort())
 
+    def test_report_now_labels(self):
+        r = ConsoleReporter(
+            registry=self.registry, reporting_interval=1, stream=self.output, clock=self.clock)
+        self.registry.counter("requests", labels=("route",)).labels("/api").inc()
+        r.report_now()
+        self.assertEqual(self.output.getvalue().splitlines()[1:], [
+                         'requests{route=/api}:', '               count = 1', ''])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,4 +1,6 @@
-from pyformance.meters import Counter
+import threading
+
+from pyformance.meters import Counter, StripedCounter
 from tests import TimedTestCase
 
 
@@ -22,3 +24,39 @@ class CounterTestCase(TimedTestCase):
         self.counter.dec()
         after = self.counter.get_count()
         self.assertEqual(before - 1, after)
+
+
+class StripedCounterTestCase(CounterTestCase):
+
+    def setUp(self):
+        super(StripedCounterTestCase, self).setUp()
+        self.counter = StripedCounter()
+
+    def test__threads(self):
+        def work():
+            for i in range(1000):
+                self.counter.inc()
+        threads = [threading.Thread(target=work) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(8000, self.counter.get_count())
+        # cells of finished threads are folded once a new thread writes
+        self.counter.dec(3)
+        self.assertEqual(7997, self.counter.get_count())
+        self.assertEqual(1, len(self.counter.adder._cells))
+
+    def test__clear(self):
+        self.counter.inc(5)
+        self.counter.clear()
+        self.assertEqual(0, self.counter.get_count())
+        self.counter.inc()
+        self.assertEqual(1, self.counter.get_count())
+
+    def test__merge(self):
+        other = StripedCounter()
+        other.inc(4)
+        self.counter.inc()
+        self.counter.merge(other)
+        self.assertEqual(5, self.counter.get_count())
@@ -0,0 +1,84 @@
+import random
+
+from pyformance.meters import Histogram, Timer
+from pyformance.stats.ddsketch import DDSketchSample
+from tests import TimedTestCase
+
+
+class DDSketchSampleTestCase(TimedTestCase):
+
+    def assertRelativeError(self, sample, values):
+        values = sorted(values)
+        snapshot = sample.get_snapshot()
+        for i in range(101):
+            q = i / 100.0
+            exact = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(exact, snapshot.get_percentile(q),
+                                   delta=abs(exact) * 0.0100001)
+
+    def test__relative_error(self):
+        sample = DDSketchSample()
+        values = [random.lognormvariate(0, 2) * random.choice([1, -1])
+                  for i in range(10000)] + [0] * 10
+        Histogram(sample=sample).add_many(values)
+        self.assertEqual(10010, sample.get_size())
+        self.assertRelativeError(sample, values)
+
+    def test__merge(self):
+        timer1 = Timer(sample=DDSketchSample())
+        timer2 = Timer(sample=DDSketchSample())
+        values = [random.expovariate(10.0) for i in range(2000)]
+        timer1.update_many(values[:1000])
+        timer2.update_many(values[1000:])
+        sample = timer1.hist.sample
+        sample.merge(timer2.hist.sample)
+        self.assertEqual(2000, sample.get_size())
+        self.assertRelativeError(sample, values)
+        self.assertRaises(ValueError, sample.merge, DDSketchSample(0.05))
+
+    def test__collapse_lowest_bins(self):
+        sample = DDSketchSample(max_bins=100)
+        values = [1.1 ** i for i in range(-200, 200)]
+        sample.update_many(values)
+        self.assertEqual(100, len(sample.positive.counts))
+        snapshot = sample.get_snapshot()
+        self.assertEqual(400, snapshot.get_size())
+        # only the lowest percentiles lose accuracy
+        exact = values[int(0.9 * (len(values) - 1))]
+        self.assertAlmostEqual(exact, snapshot.get_percentile(0.9),
+                               delta=exact * 0.0100001)
+        self.assertEqual(values[-1], snapshot.get_percentile(1))
+
+        sample = DDSketchSample(max_bins=100)
+        sample.update_many([-value for value in values])
+        self.assertEqual(100, len(sample.negative.counts))
+        snapshot = sample.get_snapshot()
+        exact = -values[len(values) - 1 - int(0.9 * (len(values) - 1))]
+        self.assertAlmostEqual(exact, snapshot.get_percentile(0.9),
+                               delta=-exact * 0.0100001)
+        self.assertEqual(-values[0], snapshot.get_percentile(1))
+
+    def test__non_finite(self):
+        sample = DDSketchSample()
+        for value in (float("inf"), float("-inf"), float("nan")):
+            self.assertRaises(ValueError, sample.update, value)
+            self.assertRaises(ValueError, sample.update_many, [1, value])
+        self.assertEqual(0, sample.get_size())
+
+    def test__values(self):
+        sample = DDSketchSample()
+        sample.update_many([5, -1, 0, 5])
+        snapshot = sample.get_snapshot()
+        # one value per bin
+        self.assertEqual(3, len(snapshot.values))
+        self.assertAlmostEqual(-1, snapshot.values[0], delta=0.02)
+        self.assertEqual(0, snapshot.values[1])
+        self.assertAlmostEqual(5, snapshot.values[2], delta=0.1)
+        self.assertEqual(4, snapshot.get_size())
+
+    def test__empty(self):
+        snapshot = DDSketchSample().get_snapshot()
+        self.assertEqual([], snapshot.values)
+        self.assertEqual(0, snapshot.get_size())
+        self.assertEqual(0, snapshot.get_median())
+        self.assertRaises(ValueError, DDSketchSample, 1.5)
@@ -1,4 +1,5 @@
-from pyformance.meters import CallbackGauge
+from pyformance.meters import CallbackGauge, SimpleGauge
+from pyformance.meters.metric import Metric
 from tests import TimedTestCase
 
 
@@ -18,3 +19,22 @@ class CallbackGaugeTestCase(TimedTestCase):
     def test__value(self):
         self._value = 123
         self.assertEqual(self.gauge.get_value(), self._value)
+
+    def test__state(self):
+        self._value = 123
+        self.assertEqual({"value": 123}, self.gauge.get_state())
+        self.gauge.merge_state({"value": 456})
+        self.assertEqual(123, self.gauge.get_value())
+        gauge = SimpleGauge(1)
+        gauge.merge(self.gauge)
+        self.assertEqual(123, gauge.get_value())
+
+
+class MetricTestCase(TimedTestCase):
+
+    def test__without_state(self):
+        class Custom(Metric):
+            pass
+
+        metric = Custom()
+        self.assertRaises(NotImplementedError, metric.merge, Custom())
@@ -0,0 +1,72 @@
+import random
+
+from pyformance.meters import Histogram, Timer
+from pyformance.stats.hdr_histogram import HdrHistogramSample
+from tests import TimedTestCase
+
+
+class HdrHistogramSampleTestCase(TimedTestCase):
+
+    def test__percentiles(self):
+        sample = HdrHistogramSample(lowest=1, highest=100000,
+                                    significant_digits=3)
+        hist = Histogram(sample=sample)
+        for i in range(1, 10001):
+            hist.add(i)
+        snapshot = hist.get_snapshot()
+        self.assertEqual(10000, snapshot.get_size())
+        self.assertAlmostEqual(5000, snapshot.get_median(), delta=5)
+        self.assertAlmostEqual(9900, snapshot.get_99th_percentile(), delta=10)
+        self.assertAlmostEqual(9990, snapshot.get_999th_percentile(),
+                               delta=10)
+        self.assertEqual(1, snapshot.get_percentile(0))
+        self.assertEqual(10000, snapshot.get_percentile(1))
+        # one value per bucket
+        values = snapshot.values
+        self.assertEqual(sorted(values), values)
+        self.assertTrue(len(values) < 10000)
+        self.assertEqual(1, values[0])
+        self.assertAlmostEqual(10000, values[-1], delta=10)
+
+    def test__relative_error(self):
+        sample = HdrHistogramSample(significant_digits=2)
+        values = [random.expovariate(10.0) for i in range(10000)]
+        sample.update_many(values)
+        values.sort()
+        snapshot = sample.get_snapshot()
+        for q in (0.5, 0.75, 0.95, 0.99, 0.999):
+            exact = values[int(q * len(values)) - 1]
+            self.assertAlmostEqual(exact, snapshot.get_percentile(q),
+                                   delta=exact * 0.01)
+
+    def test__clamping(self):
+        sample = HdrHistogramSample(lowest=1, highest=1000)
+        sample.update(-5)
+        sample.update(10 ** 6)
+        snapshot = sample.get_snapshot()
+        self.assertEqual(2, snapshot.get_size())
+        self.assertEqual(0, snapshot.get_percentile(0))
+        self.assertEqual(10 ** 6, snapshot.get_percentile(1))
+
+    def test__merge(self):
+        timer1 = Timer(sample=HdrHistogramSample())
+        timer2 = Timer(sample=HdrHistogramSample())
+        for i in range(100):
+            timer1._update(0.001)
+            timer2._update(0.1)
+        sample = timer1.hist.sample
+        sample.merge(timer2.hist.sample)
+        snapshot = sample.get_snapshot()
+        self.assertEqual(200, snapshot.get_size())
+        self.assertAlmostEqual(0.001, snapshot.get_percentile(0.25),
+                               delta=0.00001)
+        self.assertAlmostEqual(0.1, snapshot.get_percentile(0.75),
+                               delta=0.001)
+        self.assertRaises(ValueError, sample.merge,
+                          HdrHistogramSample(significant_digits=3))
+
+    def test__empty(self):
+        snapshot = HdrHistogramSample().get_snapshot()
+        self.assertEqual(0, snapshot.get_size())
+        self.assertEqual(0, snapshot.get_median())
+        self.assertRaises(ValueError, snapshot.get_percentile, 1.5)
@@ -1,5 +1,19 @@
-from tests import TimedTestCase
-from pyformance.meters import Histogram
+import collections
+import json
+import threading
+from array import array
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from tests import TimedTestCase, unittest
+from pyformance.meters import Histogram, DeltaHistogram
+from pyformance.stats.samples import SlidingWindowSample, UniformSample
+from pyformance.stats.hdr_histogram import HdrHistogramSample
+from pyformance.stats.tdigest import TDigestSample
+from pyformance.stats.ddsketch import DDSketchSample
 
 
 class HistogramTestCase(TimedTestCase):
@@ -63,3 +77,172 @@ class HistogramTestCase(TimedTestCase):
         self.assertEqual(hist.get_snapshot().get_size(), 10)
         for i in hist.sample.get_snapshot().values:
             self.assertTrue(3000 <= i and i <= 4000)
+
+    def test__add_many(self):
+        hist = Histogram(100, 0.99)
+        hist.add(-5)
+        hist.add_many(array("d", range(1000)))
+        hist.add_many(x * 2 for x in range(10))
+
+        self.assertEqual(1011, hist.get_count())
+        self.assertEqual(100, hist.sample.get_size())
+        self.assertEqual(100, hist.get_snapshot().get_size())
+        for i in hist.get_snapshot().values:
+            self.assertTrue(-5 <= i and i <= 999)
+
+        values = [-5] + list(range(1000)) + [x * 2 for x in range(10)]
+        mean = sum(values) / float(len(values))
+        var = sum((x - mean) ** 2 for x in values) / (len(values) - 1)
+        self.assertEqual(999, hist.get_max())
+        self.assertEqual(-5, hist.get_min())
+        self.assertAlmostEqual(mean, hist.get_mean())
+        self.assertAlmostEqual(var, hist.get_var(), delta=0.0001)
+
+    def test__add_many_keeps_recent_values(self):
+        hist = Histogram(10, 0.015, clock=self.clock)
+        hist.add_many(range(1000))
+        self.clock.add(600)
+        hist.add_many(range(1000, 2000))
+        self.assertEqual(10, hist.get_snapshot().get_size())
+        for i in hist.get_snapshot().values:
+            self.assertTrue(1000 <= i and i < 2000)
+
+    def test__merge(self):
+        hist1 = Histogram(100, clock=self.clock)
+        hist2 = Histogram(100, clock=self.clock)
+        hist1.add_many(range(10))
+        hist2.add_many(range(10, 30))
+        hist1.merge_state(json.loads(json.dumps(hist2.get_state())))
+
+        values = list(range(30))
+        mean = sum(values) / 30.0
+        var = sum((x - mean) ** 2 for x in values) / 29
+        self.assertEqual(30, hist1.get_count())
+        self.assertEqual(sum(values), hist1.get_sum())
+        self.assertEqual(0, hist1.get_min())
+        self.assertEqual(29, hist1.get_max())
+        self.assertAlmostEqual(var, hist1.get_var())
+        self.assertEqual(values, hist1.get_snapshot().values)
+
+        hist1.merge(Histogram(100, clock=self.clock))
+        self.assertEqual(30, hist1.get_count())
+
+        empty = Histogram(100, clock=self.clock)
+        empty.merge(hist1)
+        self.assertAlmostEqual(var, empty.get_var())
+
+    def test__empty_state_is_json(self):
+        state = Histogram(100, clock=self.clock).get_state()
+        self.assertEqual(None, state["min"])
+        self.assertEqual(None, state["max"])
+        hist = Histogram(100, clock=self.clock)
+        hist.merge_state(json.loads(json.dumps(state, allow_nan=False)))
+        self.assertEqual(0, hist.get_count())
+        for cls in (HdrHistogramSample, TDigestSample, DDSketchSample):
+            empty = Histogram(sample=cls()).get_state()
+            hist = Histogram(sample=cls())
+            hist.add(2)
+            hist.sample.merge_state(json.loads(
+                json.dumps(empty["sample"], allow_nan=False)))
+            self.assertEqual(2, hist.sample.get_state()["min"])
+            self.assertEqual(2, hist.sample.get_state()["max"])
+
+    def test__empty(self):
+        hist = Histogram()
+        self.assertEqual(0, hist.get_min())
+        self.assertEqual(0, hist.get_max())
+        hist.add(-1)
+        self.assertEqual(-1, hist.get_min())
+        self.assertEqual(-1, hist.get_max())
+        hist.clear()
+        self.assertEqual(0, hist.get_max())
+
+    @unittest.skipIf(not hasattr(tracemalloc, "reset_peak"),
+                     "needs tracemalloc.reset_peak")
+    def test__add_allocates_nothing(self):
+        def peak(record):
+            for i in range(2000):
+                record(float(i))
+            sizes = collections.Counter()
+            tracemalloc.start()
+            try:
+                for i in range(2000):
+                    before = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+                    record(float(i))
+                    sizes[tracemalloc.get_traced_memory()[1] - before] += 1
+            finally:
+                tracemalloc.stop()
+            return sizes.most_common(1)[0][0]
+        # ints above 256 are allocated anew, so the ring is larger than that
+        hist = Histogram(sample=SlidingWindowSample(1000))
+        self.assertEqual(0, peak(hist.add))
+
+
+class DeltaHistogramTestCase(TimedTestCase):
+
+    def test__rollover(self):
+        hist = DeltaHistogram(clock=self.clock)
+        for value in (100, 1, 10):
+            hist.add(value)
+        closed = hist.rollover()
+        self.assertEqual(3, closed.get_count())
+        self.assertEqual(100, closed.get_max())
+        self.assertEqual(3, closed.get_snapshot().get_size())
+        self.assertEqual(0, hist.get_count())
+        self.assertEqual(0, hist.get_snapshot().get_size())
+        hist.add(5)
+        closed = hist.rollover()
+        self.assertEqual(1, closed.get_count())
+        self.assertEqual(5, closed.get_max())
+        self.assertEqual([5], closed.get_snapshot().values)
+        self.assertEqual(0, hist.rollover().get_count())
+
+    def test__rollover_loses_no_values(self):
+        hist = DeltaHistogram(clock=self.clock)
+        writers = [threading.Thread(target=lambda: [hist.add(i)
+                                                    for i in range(5000)])
+                   for i in range(4)]
+        for writer in writers:
+            writer.start()
+        total = 0
+        while any(writer.is_alive() for writer in writers):
+            total += hist.rollover().get_count()
+        for writer in writers:
+            writer.join()
+        total += hist.rollover().get_count()
+        self.assertEqual(20000, total)
+
+    def test__readers_see_every_value(self):
+        class Reader(object):
+            pass
+        first, second = Reader(), Reader()
+        hist = DeltaHistogram(clock=self.clock)
+        hist.add(1)
+        self.assertEqual([1], hist.rollover(first).get_snapshot().values)
+        hist.add(2)
+        # a new reader starts with the values since the last rollover
+        self.assertEqual([2], hist.rollover(second).get_snapshot().values)
+        hist.add(3)
+        closed = hist.rollover(first)
+        self.assertEqual([2, 3], closed.get_snapshot().values)
+        self.assertEqual(3, closed.get_max())
+        self.assertEqual([3], hist.rollover(second).get_snapshot().values)
+        self.assertEqual(0, hist.rollover(second).get_count())
+        # without a reader, only the values since the last rollover
+        hist.add(4)
+        self.assertEqual([4], hist.rollover().get_snapshot().values)
+        self.assertEqual([4], hist.rollover(first).get_snapshot().values)
+        del second
+        self.assertEqual([first], list(hist.readers))
+
+    def test__histogram_signature(self):
+        hist = DeltaHistogram(10, 0.5, self.clock)
+        self.assertEqual(0.5, hist.sample.alpha)
+        self.assertEqual(10, hist.sample.size)
+        self.assertRaises(ValueError, DeltaHistogram,
+                          sample=UniformSample(10))
+        hist = DeltaHistogram(sample=UniformSample(10),
+                              sample_factory=lambda: UniformSample(10))
+        hist.add(1)
+        self.assertEqual(1, hist.rollover().get_count())
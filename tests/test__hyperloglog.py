@@ -0,0 +1,73 @@
+import json
+
+from pyformance.meters import Distinct
+from pyformance.stats.hyperloglog import HyperLogLog, hash64
+from tests import TimedTestCase
+
+
+class HyperLogLogTestCase(TimedTestCase):
+
+    def test__small_counts(self):
+        sketch = HyperLogLog()
+        self.assertEqual(0, sketch.estimate())
+        for i in range(100):
+            sketch.add(i)
+            sketch.add(i)
+        self.assertAlmostEqual(100, sketch.estimate(), delta=5)
+
+    def test__relative_error(self):
+        sketch = HyperLogLog()
+        for i in range(50000):
+            sketch.add("user-%d" % i)
+        self.assertAlmostEqual(50000, sketch.estimate(), delta=50000 * 0.05)
+
+    def test__stable_hash(self):
+        # the builtin hash of strings changes from one process to the next
+        self.assertEqual(0xe220a8397b1dcdaf, hash64(0))
+        self.assertEqual(hash64(b"abc"), hash64(u"abc"))
+        self.assertNotEqual(hash64(1), hash64(True))
+        self.assertEqual(hash64(1), hash64(1.0))
+        self.assertNotEqual(hash64(1), hash64(1.5))
+        self.assertEqual(hash64((1, "a")), hash64((1, "a")))
+
+    def test__merge(self):
+        sketch1 = HyperLogLog()
+        sketch2 = HyperLogLog()
+        for i in range(20000):
+            sketch1.add(i)
+            sketch2.add(i + 10000)
+        sketch1.merge_state(json.loads(json.dumps(sketch2.get_state())))
+        self.assertAlmostEqual(30000, sketch1.estimate(), delta=30000 * 0.05)
+        self.assertRaises(ValueError, sketch1.merge, HyperLogLog(10))
+
+    def test__precision(self):
+        self.assertEqual(1024, len(HyperLogLog(10).registers))
+        self.assertRaises(ValueError, HyperLogLog, 3)
+        self.assertRaises(ValueError, HyperLogLog, 19)
+
+
+class DistinctTestCase(TimedTestCase):
+
+    def test__distinct(self):
+        distinct = Distinct()
+        for i in range(1000):
+            distinct.add("user-%d" % (i % 300))
+        count = distinct.get_count()
+        self.assertAlmostEqual(300, count, delta=10)
+        other = Distinct()
+        other.add("user-1000")
+        distinct.merge(other)
+        self.assertEqual(count + 1, distinct.get_count())
+        distinct.clear()
+        self.assertEqual(0, distinct.get_count())
+
+    def test__version(self):
+        distinct = Distinct()
+        distinct.add("user-1")
+        version = distinct.version
+        self.assertTrue(version > 0)
+        # adding a value seen before leaves the sketch alone
+        distinct.add("user-1")
+        self.assertEqual(version, distinct.version)
+        distinct.add("user-2")
+        self.assertTrue(distinct.version > version)
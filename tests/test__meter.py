@@ -1,4 +1,8 @@
-from pyformance.meters import Meter
+import threading
+
+from pyformance import MetricsRegistry
+from pyformance.meters import Meter, StripedMeter, WindowedMeter, Timer
+from pyformance.stats.moving_average import ExpWeightedMovingAvg
 from tests import TimedTestCase
 
 
@@ -74,3 +78,149 @@ class MeterTestCase(TimedTestCase):
         self.meter.tick()
         val = self.meter.get_mean_rate()
         self.assertEqual(1, val)
+
+    def test__merge_ticked_rates(self):
+        other = Meter(TimedTestCase.clock)
+        self.meter.mark(3)
+        other.mark(6)
+        self.clock.add(5)
+        self.meter.tick()
+        other.tick()
+        self.meter.merge_state(other.get_state())
+        self.assertAlmostEqual(
+            1.8, self.meter.get_one_minute_rate(), delta=0.000001)
+
+    def test__periods(self):
+        meter = self.meter.__class__(TimedTestCase.clock,
+                                     periods=(10, 60, 3600))
+        averages = [ExpWeightedMovingAvg(period / 60.0, clock=self.clock)
+                    for period in meter.periods]
+        for seconds in (5, 5, 1, 17, 3600):
+            meter.mark(10)
+            for average in averages:
+                average.add(10)
+            self.clock.add(seconds)
+            # idle meters catch up in one step, like separate averages
+            for rate, average in zip(meter.get_rates(), averages):
+                self.assertAlmostEqual(average.get_rate(), rate,
+                                       delta=0.000001)
+        self.assertEqual(meter.get_rates()[1], meter.get_one_minute_rate())
+        self.assertEqual(meter.get_rates()[2], meter.get_rate(3600))
+        self.assertRaises(ValueError, meter.get_rate, 30)
+        self.assertRaises(ValueError, self.meter.merge, meter)
+
+        registry = MetricsRegistry(TimedTestCase.clock)
+        registry.add("foo", meter)
+        self.assertEqual(["10s_rate", "1h_rate", "1m_rate", "count",
+                          "mean_rate"],
+                         sorted(registry.dump_metrics()["foo"]))
+
+    def test__mark_many(self):
+        self.meter.mark_many([1, 2])
+        self.clock.add(5)
+        self.meter.tick()
+        self.assertEqual(3, self.meter.get_count())
+        self.assertAlmostEqual(
+            0.6, self.meter.get_one_minute_rate(), delta=0.000001)
+
+
+class StripedMeterTestCase(MeterTestCase):
+
+    def setUp(self):
+        super(StripedMeterTestCase, self).setUp()
+        self.meter = StripedMeter(TimedTestCase.clock)
+
+    def test__threads(self):
+        def work():
+            for i in range(1000):
+                self.meter.mark()
+        threads = [threading.Thread(target=work) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(4000, self.meter.get_count())
+        self.clock.add(5)
+        self.meter.tick()
+        self.assertAlmostEqual(
+            800, self.meter.get_one_minute_rate(), delta=0.000001)
+
+    def test__merge(self):
+        other = self.meter.__class__(TimedTestCase.clock)
+        self.meter.mark(3)
+        other.mark(2)
+        self.clock.add(5)
+        self.meter.merge(other)
+        self.assertEqual(5, self.meter.get_count())
+        self.assertAlmostEqual(
+            1.0, self.meter.get_one_minute_rate(), delta=0.000001)
+        self.assertAlmostEqual(1.0, self.meter.get_mean_rate(),
+                               delta=0.000001)
+
+
+class WindowedMeterTestCase(TimedTestCase):
+
+    def setUp(self):
+        super(WindowedMeterTestCase, self).setUp()
+        # start on a second boundary
+        self.clock.add(-self.clock.time() % 1)
+        self.meter = WindowedMeter(TimedTestCase.clock)
+
+    def test__exact_rates(self):
+        self.meter.mark(30)
+        self.clock.add(0.5)
+        self.assertAlmostEqual(60, self.meter.get_one_minute_rate())
+        self.clock.add(9.5)
+        self.meter.mark_many([10, 20])
+        self.assertAlmostEqual(6, self.meter.get_one_minute_rate())
+        self.assertAlmostEqual(6, self.meter.get_fifteen_minute_rate())
+
+        # the window is the current partial second and the 59 before it
+        self.clock.add(49.5)
+        self.assertAlmostEqual(60 / 59.5, self.meter.get_one_minute_rate())
+        self.clock.add(6)
+        # the first 30 marks left the one minute window
+        self.assertAlmostEqual(30 / 59.5, self.meter.get_one_minute_rate())
+        self.assertAlmostEqual(60 / 65.5, self.meter.get_five_minute_rate())
+        self.clock.add(300)
+        self.assertEqual(0, self.meter.get_five_minute_rate())
+        self.assertAlmostEqual(60 / 365.5,
+                               self.meter.get_fifteen_minute_rate())
+        self.clock.add(10000)
+        self.assertEqual(0, self.meter.get_fifteen_minute_rate())
+        self.assertEqual(60, self.meter.get_count())
+
+    def test__wraps_around(self):
+        for i in range(2000):
+            self.meter.mark()
+            self.clock.add(1)
+        self.assertAlmostEqual(1, self.meter.get_one_minute_rate())
+        self.assertAlmostEqual(1, self.meter.get_five_minute_rate())
+        self.assertAlmostEqual(1, self.meter.get_fifteen_minute_rate())
+        self.meter.clear()
+        self.assertEqual(0, self.meter.get_count())
+        self.assertEqual(0, self.meter.get_one_minute_rate())
+
+    def test__merge(self):
+        other = WindowedMeter(TimedTestCase.clock)
+        self.meter.mark(10)
+        other.mark(20)
+        self.clock.add(100)
+        other.mark(30)
+        self.clock.add(1)
+        self.meter.merge(other)
+        self.assertEqual(60, self.meter.get_count())
+        self.assertAlmostEqual(30 / 59.0, self.meter.get_one_minute_rate())
+        self.assertAlmostEqual(60 / 101.0,
+                               self.meter.get_five_minute_rate())
+        self.assertRaises(ValueError, self.meter.merge,
+                          Meter(TimedTestCase.clock))
+
+    def test__timer(self):
+        timer = Timer(clock=self.clock, meter=self.meter)
+        for i in range(10):
+            with timer.time():
+                self.clock.add(1)
+        self.assertEqual(10, timer.get_count())
+        self.assertAlmostEqual(1, timer.get_one_minute_rate())
+
@@ -3,7 +3,7 @@ import os
 import socket
 
 from pyformance import MetricsRegistry
-from pyformance.meters import SimpleGauge
+from pyformance.meters import Meter, SimpleGauge, Timer
 from pyformance.reporters.newrelic_reporter import NewRelicReporter, NewRelicSink
 from tests import TimedTestCase
 
@@ -170,3 +170,16 @@ class TestNewRelicReporter(TimedTestCase):
         }
 
         self.assertEqual(json.loads(json.dumps(expected)), json.loads(json.dumps(output)))
+
+    def test_custom_periods(self):
+        r = NewRelicReporter(
+            'license_key',
+            registry=self.registry, reporting_interval=1, clock=self.clock, name='foo')
+        self.registry.add("m1", Meter(clock=self.clock, periods=(10, 3600)))
+        self.registry.add("t1", Timer(clock=self.clock,
+                                      meter=Meter(clock=self.clock, periods=(10,))))
+        metrics = r.create_metrics(self.registry)
+        self.assertTrue("Component/m1/10s_rate" in metrics)
+        self.assertTrue("Component/m1/1h_rate" in metrics)
+        self.assertTrue("Component/t1/10s_rate" in metrics)
+        self.assertFalse("Component/m1/1m_rate" in metrics)
@@ -1,5 +1,6 @@
-from pyformance import MetricsRegistry
-from pyformance.meters import Meter
+from pyformance import MetricsRegistry, MetricFamily, Cursor
+from pyformance.meters import Counter, Meter, Timer, WindowedMeter
+from pyformance.meters import DeltaHistogram
 from tests import TimedTestCase
 
 
@@ -15,3 +16,225 @@ class RegistryTestCase(TimedTestCase):
 
     def test__add(self):
         self.registry.add('foo', Meter(TimedTestCase.clock))
+
+    def test__windowed(self):
+        meter = self.registry.meter('foo', windowed=True)
+        self.assertTrue(isinstance(meter, WindowedMeter))
+        self.assertTrue(meter is self.registry.meter('foo'))
+        timer = self.registry.timer('bar', windowed=True)
+        self.assertTrue(isinstance(timer.meter, WindowedMeter))
+        with timer.time():
+            self.clock.add(2)
+        self.assertAlmostEqual(
+            0.5, self.registry.dump_metrics()['bar']['1m_rate'])
+
+    def test__distinct(self):
+        distinct = self.registry.distinct('users')
+        self.assertTrue(distinct is self.registry.distinct('users'))
+        for user in ('a', 'b', 'a'):
+            distinct.add(user)
+        self.assertEqual({'count': 2}, self.registry.dump_metrics()['users'])
+
+    def test__top_k(self):
+        top_k = self.registry.top_k('tenants', 2)
+        self.assertTrue(top_k is self.registry.top_k('tenants'))
+        for tenant in ('count', 1, 'count', 'c', 'count', '1'):
+            top_k.add(tenant)
+        self.assertEqual({'top.count': 3, 'top.1': 2},
+                         self.registry.dump_metrics()['tenants'])
+
+    def test__delta(self):
+        hist = self.registry.histogram('size', delta=True)
+        timer = self.registry.timer('latency', delta=True)
+        hist.add(100)
+        timer.update_many([3.0, 1.0])
+        self.clock.add(1)
+        metrics = self.registry.dump_metrics()
+        self.assertEqual(100, metrics['size']['max'])
+        self.assertEqual(3.0, metrics['latency']['max'])
+        self.assertEqual(2, metrics['latency']['count'])
+        hist.add(1)
+        metrics = self.registry.dump_metrics()
+        self.assertEqual(1, metrics['size']['max'])
+        self.assertEqual(0, metrics['latency']['count'])
+        self.assertEqual(0, metrics['latency']['max'])
+
+    def test__delta_readers(self):
+        class Reader(object):
+            pass
+        first, second = Reader(), Reader()
+        timer = self.registry.timer('latency', delta=True)
+        self.registry.dump_metrics(reader=first)
+        self.registry.dump_metrics(reader=second)
+        timer.update_many([3.0, 1.0])
+        self.clock.add(1)
+        for reader in (first, second):
+            metrics = self.registry.dump_metrics(reader=reader)
+            self.assertEqual(2, metrics['latency']['count'])
+            self.assertEqual(3.0, metrics['latency']['max'])
+        # an anonymous read does not take values from the readers
+        timer.update_many([2.0])
+        self.assertEqual(1, self.registry.get_metrics('latency')['count'])
+        self.assertEqual(1, self.registry.dump_metrics(reader=first)
+                         ['latency']['count'])
+
+    def test__add_delta(self):
+        hist = DeltaHistogram(clock=self.clock)
+        self.registry.add('size', hist)
+        self.assertTrue(hist is self.registry.histogram('size', delta=True))
+        hist.add(5)
+        self.assertEqual(1, self.registry.dump_metrics()['size']['count'])
+        self.assertEqual(0, self.registry.dump_metrics()['size']['count'])
+        family = self.registry.histogram('sizes', delta=True,
+                                         labels=('kind',))
+        family.labels('a').add(5)
+        self.assertEqual(1, self.registry.dump_metrics()['sizes{kind=a}']
+                         ['count'])
+        self.assertEqual(0, self.registry.dump_metrics()['sizes{kind=a}']
+                         ['count'])
+
+    def test__labels(self):
+        family = self.registry.timer('latency', labels=('route', 'status'))
+        self.assertTrue(isinstance(family, MetricFamily))
+        self.assertTrue(family is self.registry.timer(
+            'latency', labels=('route', 'status')))
+        timer = family.labels('/api', 200)
+        self.assertTrue(timer is family.labels('/api', 200))
+        self.assertTrue(timer is family.labels(status=200, route='/api'))
+        self.assertTrue(timer is family.labels('/api', '200'))
+        self.assertTrue(timer is family.labels(route='/api', status='200'))
+        self.assertEqual([(('/api', '200'), timer)], family.get_children())
+        self.assertRaises(ValueError, family.labels, route='/api', code=200)
+        self.assertRaises(ValueError, family.labels, '/api')
+        self.assertRaises(ValueError, family.labels, route='/api')
+        self.assertRaises(ValueError, self.registry.timer, 'latency',
+                          labels=('route',))
+        timer.update_many([1.0, 3.0])
+        family.labels('/api', 500).update_many([2.0])
+        self.clock.add(1)
+        labelled = dict(((key, labels), metrics) for key, labels, metrics
+                        in self.registry.dump_labelled_metrics())
+        self.assertEqual(
+            2, labelled['latency', (('route', '/api'), ('status', '200'))]
+            ['count'])
+        self.assertEqual(
+            2.0, labelled['latency', (('route', '/api'), ('status', '500'))]
+            ['max'])
+        self.assertEqual(
+            3.0,
+            self.registry.dump_metrics()['latency{route=/api,status=200}']
+            ['max'])
+        self.registry.clear()
+        self.assertEqual({}, self.registry.dump_metrics())
+
+    def test__families_of_different_types(self):
+        counters = self.registry.counter('latency', labels=('route',))
+        timers = self.registry.timer('latency', labels=('route',))
+        self.assertTrue(isinstance(counters.labels('/api'), Counter))
+        self.assertTrue(isinstance(timers.labels('/api'), Timer))
+        self.assertTrue(counters is self.registry.counter(
+            'latency', labels=('route',)))
+        counters.labels('/api').inc(3)
+        timers.labels('/api').update_many([1.0])
+        self.clock.add(1)
+        metrics = sorted((len(values), values['count'])
+                         for key, labels, values
+                         in self.registry.iter_metrics())
+        self.assertEqual(2, len(metrics))
+        self.assertEqual((1, 3), metrics[0])
+        self.assertEqual(1, metrics[1][1])
+
+    def test__iter_metrics(self):
+        self.registry.counter('foo').inc(3)
+        self.registry.meter('foo').mark(2)
+        self.registry.counter('bar', labels=('kind',)).labels('a').inc()
+        self.clock.add(1)
+        metrics = sorted((key, labels, sorted(values))
+                         for key, labels, values
+                         in self.registry.iter_metrics())
+        self.assertEqual(
+            [('bar', (('kind', 'a'),), ['count']),
+             ('foo', (), ['15m_rate', '1m_rate', '5m_rate', 'count',
+                          'mean_rate']),
+             ('foo', (), ['count'])],
+            metrics)
+        self.assertEqual(self.registry.get_metrics('foo'),
+                         self.registry.dump_metrics()['foo'])
+        self.assertEqual(2, self.registry.dump_metrics()['foo']['count'])
+
+    def test__changed_only(self):
+        counter = self.registry.counter('requests')
+        hist = self.registry.histogram('size', delta=True)
+        self.registry.gauge('load').set_value(1)
+        family = self.registry.counter('errors', labels=('code',))
+        family.labels(500).inc()
+        counter.inc()
+        hist.add(5)
+        self.assertEqual(
+            set(['requests', 'size', 'load', 'errors{code=500}']),
+            set(self.registry.dump_metrics(changed_only=True)))
+        # gauges are always reported
+        self.assertEqual(['load'],
+                         list(self.registry.dump_metrics(changed_only=True)))
+        counter.inc()
+        hist.add(5)
+        family.labels(404).inc()
+        changed = self.registry.dump_metrics(changed_only=True)
+        self.assertEqual(set(['requests', 'size', 'load', 'errors{code=404}']),
+                         set(changed))
+        self.assertEqual(5, changed['size']['max'])
+        # a cursor is independent of the registry's own
+        cursor = {}
+        self.assertEqual(5, len(self.registry.dump_metrics(cursor=cursor)))
+        self.assertEqual(1, len(self.registry.dump_metrics(cursor=cursor)))
+        self.assertEqual(5, len(self.registry.dump_metrics()))
+
+    def test__cursor_commit(self):
+        counter = self.registry.counter('requests')
+        counter.inc()
+        cursor = Cursor()
+        self.assertEqual(['requests'],
+                         list(self.registry.dump_metrics(cursor=cursor)))
+        # not committed, e.g. because the send failed
+        self.assertEqual(['requests'],
+                         list(self.registry.dump_metrics(cursor=cursor)))
+        cursor.commit()
+        self.assertEqual({}, self.registry.dump_metrics(cursor=cursor))
+        counter.inc()
+        self.assertEqual(['requests'],
+                         list(self.registry.dump_metrics(cursor=cursor)))
+
+    def test__changed_only_decaying_rates(self):
+        calls = []
+
+        class CountingMeter(Meter):
+
+            def get_rates(self):
+                calls.append(self)
+                return super(CountingMeter, self).get_rates()
+
+        self.registry.add('requests', CountingMeter(clock=self.clock))
+        self.registry.meter('requests').mark(60)
+        self.registry.timer('latency').update_many([1.0])
+        self.clock.add(5)
+        self.registry.dump_metrics(changed_only=True)
+        # idle, but the moving averages still decay
+        self.clock.add(5)
+        self.assertEqual(
+            set(['requests', 'latency']),
+            set(self.registry.dump_metrics(changed_only=True)))
+        # until they are about 0, which takes a few of the longest periods
+        reported = 0
+        for i in range(2 * 3600 // 5):
+            self.clock.add(5)
+            if self.registry.dump_metrics(changed_only=True):
+                reported = self.clock.now
+        self.assertTrue(reported < self.clock.now - 600)
+        # the rates of a decayed metric are no longer computed
+        del calls[:]
+        self.clock.add(5)
+        self.assertEqual({}, self.registry.dump_metrics(changed_only=True))
+        self.assertEqual([], calls)
+        self.registry.meter('requests').mark()
+        self.assertEqual(['requests'],
+                         list(self.registry.dump_metrics(changed_only=True)))
@@ -0,0 +1,392 @@
+import json
+import random
+import threading
+import unittest
+
+from pyformance.meters import Histogram, DeltaHistogram
+from pyformance.stats import samples
+from pyformance.stats.samples import Sample, ExpDecayingSample
+from pyformance.stats.samples import ArrayExpDecayingSample
+from pyformance.stats.samples import UniformSample
+from pyformance.stats.samples import SlidingWindowSample
+from pyformance.stats.samples import SlidingTimeWindowSample
+from pyformance.stats.samples import BucketedSlidingTimeWindowSample
+from pyformance.stats.hdr_histogram import HdrHistogramSample
+from pyformance.stats.tdigest import TDigestSample
+from pyformance.stats.ddsketch import DDSketchSample
+from tests import TimedTestCase
+
+
+class SnapshotCacheTestCase(TimedTestCase):
+
+    def test__shared_until_changed(self):
+        for sample in (ExpDecayingSample(), ArrayExpDecayingSample(),
+                       UniformSample(), SlidingWindowSample(),
+                       BucketedSlidingTimeWindowSample(clock=self.clock),
+                       HdrHistogramSample(), TDigestSample(),
+                       DDSketchSample()):
+            hist = Histogram(sample=sample)
+            hist.add(1)
+            snapshot = hist.get_snapshot()
+            self.assertTrue(snapshot is hist.get_snapshot())
+            hist.add(2)
+            self.assertFalse(snapshot is hist.get_snapshot())
+            self.assertEqual(2, hist.get_snapshot().get_size())
+            hist.clear()
+            self.assertEqual(0, hist.get_snapshot().get_size())
+
+    def test__change_during_snapshot(self):
+        class ChangingSample(SlidingWindowSample):
+            __slots__ = ()
+
+            def _create_snapshot(self):
+                snapshot = super(ChangingSample, self)._create_snapshot()
+                if self.get_size() == 1:
+                    self.update(2)
+                return snapshot
+
+        sample = ChangingSample(10)
+        sample.update(1)
+        self.assertEqual([1], sample.get_snapshot().values)
+        self.assertEqual([1, 2], sample.get_snapshot().values)
+
+    def test__time_windows_expire(self):
+        for sample in (SlidingTimeWindowSample(10, clock=self.clock),
+                       BucketedSlidingTimeWindowSample(10, clock=self.clock)):
+            sample.update(1)
+            self.assertEqual(1, sample.get_snapshot().get_size())
+            self.clock.add(100)
+            self.assertEqual(0, sample.get_snapshot().get_size())
+
+    def test__abstract(self):
+        self.assertRaises(TypeError, Sample)
+
+
+class SampleMergeTestCase(TimedTestCase):
+
+    def roundtrip(self, sample):
+        return json.loads(json.dumps(sample.get_state()))
+
+    def test__exp_decaying(self):
+        for cls in (ExpDecayingSample, ArrayExpDecayingSample):
+            sample = cls(10, clock=self.clock)
+            other = cls(10, clock=self.clock)
+            sample.update_many(range(3))
+            other.update_many(range(3, 6))
+            sample.merge_state(self.roundtrip(other))
+            self.assertEqual(list(range(6)), sample.get_snapshot().values)
+
+            # the newer values of the other sample win over the old ones
+            self.clock.add(600)
+            other.update_many(range(100, 120))
+            sample.merge_state(self.roundtrip(other))
+            self.assertEqual(10, sample.get_size())
+            for value in sample.get_snapshot().values:
+                self.assertTrue(100 <= value < 120)
+            sample.update(1000)
+            self.assertEqual(10, sample.get_size())
+            self.assertRaises(ValueError, sample.merge,
+                              cls(10, alpha=0.5, clock=self.clock))
+
+    def test__uniform(self):
+        sample = UniformSample(100)
+        other = UniformSample(100)
+        sample.update_many(range(1000))
+        other.update_many(range(1000, 4000))
+        sample.merge_state(self.roundtrip(other))
+        self.assertEqual(4000, sample.counter)
+        values = sample.get_snapshot().values
+        self.assertEqual(100, len(values))
+        self.assertEqual(25, len([v for v in values if v < 1000]))
+        sample.update_many(range(10000))
+        self.assertEqual(100, sample.get_size())
+
+    def test__sliding_window(self):
+        sample = SlidingWindowSample(5)
+        other = SlidingWindowSample(5)
+        sample.update_many([1, 2])
+        other.update_many(range(10))
+        sample.merge_state(self.roundtrip(other))
+        self.assertEqual([5, 6, 7, 8, 9], sample.get_snapshot().values)
+        self.assertEqual(12, sample.counter)
+
+    def test__sliding_time_window(self):
+        sample = SlidingTimeWindowSample(10, clock=self.clock)
+        other = SlidingTimeWindowSample(10, clock=self.clock)
+        other.update(1)
+        self.clock.add(5)
+        sample.update(2)
+        sample.merge_state(self.roundtrip(other))
+        self.assertEqual([1, 2], sample.get_snapshot().values)
+        self.clock.add(6)
+        self.assertEqual([2], sample.get_snapshot().values)
+
+    def test__bucketed_sliding_time_window(self):
+        sample = BucketedSlidingTimeWindowSample(10, bucket_size=10,
+                                                 clock=self.clock)
+        other = BucketedSlidingTimeWindowSample(10, bucket_size=10,
+                                                clock=self.clock)
+        other.update_many(range(100))
+        self.clock.add(1)
+        sample.update_many(range(100, 105))
+        other.update_many(range(200, 210))
+        sample.merge_state(self.roundtrip(other))
+        self.assertEqual(115, sample.get_size())
+        values = sample.get_snapshot().values
+        # a tenth of both buckets, the merged one keeps 10 out of 15
+        self.assertEqual(10, len(sample.reservoirs[sample._current_slot()]))
+        self.assertEqual(12, len(values))
+        self.assertEqual(10, len([v for v in values if v < 100]))
+        self.assertRaises(ValueError, sample.merge,
+                          BucketedSlidingTimeWindowSample(10))
+
+    def test__sketches(self):
+        for cls in (HdrHistogramSample, TDigestSample, DDSketchSample):
+            sample = cls()
+            other = cls()
+            sample.update_many([0.001] * 100)
+            other.update_many([0.1] * 100)
+            sample.merge_state(self.roundtrip(other))
+            snapshot = sample.get_snapshot()
+            self.assertEqual(200, snapshot.get_size())
+            self.assertAlmostEqual(0.001, snapshot.get_percentile(0.25),
+                                   delta=0.00002)
+            self.assertAlmostEqual(0.1, snapshot.get_percentile(0.75),
+                                   delta=0.002)
+
+
+class RescaleTestCase(TimedTestCase):
+
+    SIZE = 100
+
+    def rescale(self, cls):
+        "rescale the full sample of a histogram"
+        test = self
+        self.clock.now = 0
+
+        class RescalingSample(cls):
+
+            def _rescale(self):
+                # the owner's lock is held for the whole rescale
+                test.assertTrue(hist.lock.locked())
+                super(RescalingSample, self)._rescale()
+
+        hist = Histogram(sample=RescalingSample(self.SIZE, clock=self.clock),
+                         clock=self.clock)
+        for i in range(self.SIZE * 2):
+            hist.add(1)
+            self.clock.add(0.01)
+        self.clock.now = hist.sample.next_time
+        hist.add(2)
+        return hist
+
+    def test__rescale(self):
+        for cls in (ExpDecayingSample, ArrayExpDecayingSample):
+            hist = self.rescale(cls)
+            sample = hist.sample
+            self.assertEqual(self.clock.now, sample.start_time)
+            self.assertEqual(self.SIZE, sample.get_size())
+            self.assertEqual(hist.get_count(), self.SIZE * 2 + 1)
+            priorities = list(sample.priorities)[:self.SIZE]
+            self.assertTrue(max(priorities) < 1e20)
+            for pos in range(1, self.SIZE):
+                self.assertTrue(priorities[(pos - 1) // 2] <= priorities[pos])
+
+    def test__rollover_during_rescale(self):
+        # a reporter rolling over waits for the rescale and the add
+        closed = []
+
+        class RescalingSample(ExpDecayingSample):
+
+            def _rescale(self):
+                reader = threading.Thread(
+                    target=lambda: closed.append(hist.rollover()))
+                reader.start()
+                reader.join(0.05)
+                test.assertTrue(reader.is_alive())
+                readers.append(reader)
+                super(RescalingSample, self)._rescale()
+
+        test = self
+        readers = []
+        hist = DeltaHistogram(
+            clock=self.clock, sample_factory=lambda: RescalingSample(
+                self.SIZE, clock=self.clock))
+        hist.add(1)
+        self.clock.now = hist.sample.next_time
+        hist.add(2)
+        readers[0].join()
+        self.assertEqual(2, closed[0].get_count())
+        self.assertEqual([1, 2], closed[0].get_snapshot().values)
+        self.assertEqual(0, hist.get_count())
+
+    @unittest.skipIf(samples.numpy is None, "NumPy is not installed")
+    def test__numpy_rescale(self):
+        priorities = []
+        for numpy in (samples.numpy, None):
+            random.seed(1)
+            old_numpy, samples.numpy = samples.numpy, numpy
+            try:
+                sample = self.rescale(ArrayExpDecayingSample).sample
+            finally:
+                samples.numpy = old_numpy
+            priorities.append(list(sample.priorities))
+        self.assertEqual(priorities[0], priorities[1])
+
+
+class ArrayExpDecayingSampleTestCase(TimedTestCase):
+
+    def assertHeap(self, sample):
+        size = sample.get_size()
+        for pos in range(1, size):
+            self.assertTrue(sample.priorities[(pos - 1) // 2] <=
+                            sample.priorities[pos])
+
+    def test__a_sample_of_100_from_1000(self):
+        sample = ArrayExpDecayingSample(100, 0.99)
+        for i in range(1000):
+            sample.update(i)
+        self.assertEqual(100, sample.get_size())
+        self.assertEqual(100, len(sample.values))
+        self.assertEqual(100, sample.get_snapshot().get_size())
+        self.assertHeap(sample)
+
+    def test__update_many(self):
+        sample = ArrayExpDecayingSample(100, 0.99, clock=self.clock)
+        sample.update_many(list(range(50)))
+        sample.update_many(list(range(50, 1000)))
+        self.assertEqual(1000, sample.counter)
+        self.assertEqual(100, sample.get_snapshot().get_size())
+        self.assertHeap(sample)
+
+    def test__a_long_wait_should_not_corrupt_sample(self):
+        hist = Histogram(sample=ArrayExpDecayingSample(10, 0.015,
+                                                       clock=self.clock))
+        for i in range(1000):
+            hist.add(1000 + i)
+            self.clock.add(0.1)
+        self.assertEqual(10, hist.get_snapshot().get_size())
+        for i in hist.get_snapshot().values:
+            self.assertTrue(1000 <= i and i <= 2000)
+
+        self.clock.add(15 * 3600)  # 15 hours, should trigger rescale
+        hist.add(2000)
+        self.assertEqual(10, hist.get_snapshot().get_size())
+        self.assertHeap(hist.sample)
+
+        for i in range(1000):
+            hist.add(3000 + i)
+            self.clock.add(0.1)
+        self.assertEqual(10, hist.get_snapshot().get_size())
+        for i in hist.get_snapshot().values:
+            self.assertTrue(3000 <= i and i <= 4000)
+
+
+class UniformSampleTestCase(TimedTestCase):
+
+    def test__fills_then_samples_uniformly(self):
+        for batched in (False, True):
+            sample = UniformSample(1000)
+            values = list(range(100000))
+            if batched:
+                for i in range(0, len(values), 3000):
+                    sample.update_many(values[i:i + 3000])
+            else:
+                for value in values:
+                    sample.update(value)
+            self.assertEqual(100000, sample.counter)
+            self.assertEqual(1000, sample.get_size())
+            kept = sample.get_snapshot().values
+            self.assertEqual(1000, len(set(kept)))
+            self.assertAlmostEqual(50000, sum(kept) / 1000.0, delta=5000)
+
+    def test__draws_few_random_numbers(self):
+        calls = []
+        original = random.random
+
+        def counting_random():
+            calls.append(1)
+            return original()
+        random.random = counting_random
+        try:
+            sample = UniformSample(100)
+            for value in range(100000):
+                sample.update(value)
+        finally:
+            random.random = original
+        # about 3 * size * log(count / size)
+        self.assertTrue(len(calls) < 5000)
+
+    def test__small(self):
+        sample = UniformSample(10)
+        sample.update_many([1, 2])
+        sample.update(3)
+        self.assertEqual([1, 2, 3], sample.get_snapshot().values)
+        UniformSample(0).update(1)
+
+
+class SlidingWindowSampleTestCase(TimedTestCase):
+
+    def test__last_values(self):
+        sample = SlidingWindowSample(10)
+        hist = Histogram(sample=sample)
+        for i in range(5):
+            hist.add(i)
+        self.assertEqual(5, sample.get_size())
+        self.assertEqual([0, 1, 2, 3, 4], hist.get_snapshot().values)
+        for i in range(5, 25):
+            hist.add(i)
+        self.assertEqual(10, sample.get_size())
+        self.assertEqual(list(range(15, 25)), hist.get_snapshot().values)
+
+    def test__update_many(self):
+        for batches in ([range(7), range(7, 13)],
+                        [range(3), range(3, 30)],
+                        [range(8), range(8, 12), range(12, 13)]):
+            sample = SlidingWindowSample(10)
+            expected = SlidingWindowSample(10)
+            for batch in batches:
+                sample.update_many(list(batch))
+                for value in batch:
+                    expected.update(value)
+            self.assertEqual(expected.counter, sample.counter)
+            self.assertEqual(expected.values, sample.values)
+
+
+class BucketedSlidingTimeWindowSampleTestCase(TimedTestCase):
+
+    def setUp(self):
+        super(BucketedSlidingTimeWindowSampleTestCase, self).setUp()
+        self.sample = BucketedSlidingTimeWindowSample(
+            window=10, bucket_size=10, clock=self.clock)
+
+    def test__window(self):
+        hist = Histogram(sample=self.sample)
+        for i in range(20):
+            hist.add(i)
+            self.clock.add(1)
+        self.assertEqual(10, self.sample.get_size())
+        snapshot = hist.get_snapshot()
+        self.assertEqual(sorted(snapshot.values), list(range(10, 20)))
+
+        self.clock.add(100)
+        self.assertEqual(0, self.sample.get_size())
+        self.assertEqual(0, hist.get_snapshot().get_size())
+
+    def test__bounded_buckets(self):
+        self.sample.update_many(range(1000))
+        self.sample.update(1000)
+        self.assertEqual(1001, self.sample.get_size())
+        self.assertEqual(10, len(self.sample.reservoirs[
+            int(self.clock.time()) % self.sample.buckets]))
+        self.assertEqual(10, self.sample.get_snapshot().get_size())
+
+    def test__uniform_across_buckets(self):
+        # a busy bucket is sampled more sparsely, so the quiet bucket is
+        # thinned out to the same fraction
+        self.sample.update_many(range(1000))
+        self.clock.add(1)
+        self.sample.update_many([-1] * 100)
+        snapshot = self.sample.get_snapshot()
+        self.assertEqual(11, snapshot.get_size())
+        self.assertEqual(1, list(snapshot.values).count(-1))
@@ -0,0 +1,45 @@
+import random
+
+from pyformance.stats.snapshot import Snapshot
+from pyformance.stats.hdr_histogram import HdrHistogramSample
+from tests import TimedTestCase
+
+QUANTILES = (0, 0.001, 0.5, 0.75, 0.95, 0.99, 0.999, 1)
+
+
+class SnapshotTestCase(TimedTestCase):
+
+    def test__sorts_on_demand(self):
+        snapshot = Snapshot([3, 1, 2])
+        self.assertEqual(3, snapshot.get_size())
+        self.assertFalse(snapshot._sorted)
+        self.assertEqual(2, snapshot.get_median())
+        self.assertEqual([1, 2, 3], snapshot.values)
+        snapshot.values = [5, 4]
+        self.assertFalse(snapshot._sorted)
+        self.assertEqual(4.5, snapshot.get_median())
+        self.assertEqual([4, 5], snapshot.values)
+
+    def test__get_percentiles_matches_get_percentile(self):
+        for size in (0, 1, 10, 1000, 16384):
+            values = [random.random() for i in range(size)]
+            expected = [Snapshot(values).get_percentile(q) for q in QUANTILES]
+            actual = Snapshot(values).get_percentiles(QUANTILES)
+            self.assertEqual(len(expected), len(actual))
+            for e, a in zip(expected, actual):
+                self.assertAlmostEqual(e, a)
+
+    def test__get_percentiles_on_sorted(self):
+        snapshot = Snapshot(range(1000, 0, -1))
+        snapshot.get_median()
+        self.assertEqual([1, 1000], snapshot.get_percentiles((0, 1)))
+
+    def test__get_percentiles_on_summaries(self):
+        sample = HdrHistogramSample(lowest=1, highest=1000)
+        sample.update_many(range(1, 101))
+        snapshot = sample.get_snapshot()
+        self.assertEqual([snapshot.get_percentile(q) for q in QUANTILES],
+                         snapshot.get_percentiles(QUANTILES))
+
+    def test__get_percentiles_out_of_range(self):
+        self.assertRaises(ValueError, Snapshot([1]).get_percentiles, (0.5, 2))
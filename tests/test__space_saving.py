@@ -0,0 +1,89 @@
+import json
+import random
+
+from pyformance.meters import TopK
+from pyformance.stats.space_saving import SpaceSaving
+from tests import TimedTestCase
+
+
+class SpaceSavingTestCase(TimedTestCase):
+
+    def zipf_stream(self, n):
+        keys = ["url-%d" % i for i in range(1000)]
+        stream = []
+        for i in range(n):
+            stream.append(keys[min(999, int(random.paretovariate(1)) - 1)])
+        return stream
+
+    def assertBounds(self, summary, stream):
+        exact = {}
+        for key in stream:
+            exact[key] = exact.get(key, 0) + 1
+        for key, count, error in summary.top():
+            self.assertTrue(count - error <= exact[key] <= count)
+
+    def test__exact_with_free_slots(self):
+        summary = SpaceSaving(10)
+        for key in "abcabca":
+            summary.add(key)
+        summary.add("d", 2.5)
+        self.assertEqual([("a", 3, 0), ("d", 2.5, 0), ("b", 2, 0),
+                          ("c", 2, 0)], summary.top())
+        self.assertEqual(0, summary.get_min())
+
+    def test__heavy_hitters(self):
+        summary = SpaceSaving(50)
+        stream = self.zipf_stream(20000)
+        for key in stream:
+            summary.add(key)
+        self.assertEqual(50, len(summary.counts))
+        self.assertEqual(20000, sum(summary.counts.values()))
+        self.assertBounds(summary, stream)
+        self.assertEqual(["url-0", "url-1", "url-2"],
+                         [key for key, count, error in summary.top(3)])
+
+    def test__eviction_inherits_min(self):
+        summary = SpaceSaving(2)
+        summary.add("a", 5)
+        summary.add("b", 1)
+        summary.add("b", 2)
+        summary.add("c")
+        self.assertEqual([("a", 5, 0), ("c", 4, 3)], summary.top())
+
+    def test__merge(self):
+        summary1 = SpaceSaving(50)
+        summary2 = SpaceSaving(50)
+        stream = self.zipf_stream(20000)
+        for key in stream[:10000]:
+            summary1.add(key)
+        for key in stream[10000:]:
+            summary2.add(key)
+        summary1.merge_state(json.loads(json.dumps(summary2.get_state())))
+        self.assertEqual(50, len(summary1.counts))
+        self.assertBounds(summary1, stream)
+        self.assertEqual("url-0", summary1.top(1)[0][0])
+
+
+class TopKTestCase(TimedTestCase):
+
+    def test__top_k(self):
+        top_k = TopK(2)
+        self.assertEqual(20, top_k.summary.size)
+        for key in ("a", "b", "a", "c", "a", "b"):
+            top_k.add(key)
+        self.assertEqual([("a", 3, 0), ("b", 2, 0)], top_k.get_top())
+        other = TopK(2)
+        other.add("c", 5)
+        top_k.merge(other)
+        self.assertEqual([("c", 6, 0), ("a", 3, 0)], top_k.get_top())
+        top_k.clear()
+        self.assertEqual([], top_k.get_top())
+
+    def test__keys_are_str(self):
+        top_k = TopK(2)
+        top_k.add(200)
+        top_k.add("200")
+        other = TopK(2)
+        other.add(200, 3)
+        top_k.merge_state(json.loads(json.dumps(other.get_state())))
+        self.assertEqual([("200", 5, 0)], top_k.get_top())
@@ -0,0 +1,61 @@
+import random
+
+from pyformance.meters import Histogram, Timer
+from pyformance.stats.tdigest import TDigestSample
+from tests import TimedTestCase
+
+
+class TDigestSampleTestCase(TimedTestCase):
+
+    def test__percentiles(self):
+        hist = Histogram(sample=TDigestSample())
+        for i in range(1, 10001):
+            hist.add(i)
+        snapshot = hist.get_snapshot()
+        self.assertEqual(10000, snapshot.get_size())
+        self.assertAlmostEqual(5000, snapshot.get_median(), delta=50)
+        self.assertAlmostEqual(9900, snapshot.get_99th_percentile(), delta=10)
+        self.assertAlmostEqual(9990, snapshot.get_999th_percentile(),
+                               delta=5)
+        self.assertEqual(1, snapshot.get_percentile(0))
+        self.assertEqual(10000, snapshot.get_percentile(1))
+
+    def test__bounded_centroids(self):
+        sample = TDigestSample()
+        values = [random.expovariate(10.0) for i in range(50000)]
+        sample.update_many(values)
+        snapshot = sample.get_snapshot()
+        self.assertEqual(50000, snapshot.get_size())
+        self.assertTrue(len(snapshot.means) <= sample.compression)
+        values.sort()
+        exact = values[int(0.99 * len(values)) - 1]
+        self.assertAlmostEqual(exact, snapshot.get_99th_percentile(),
+                               delta=exact * 0.01)
+
+    def test__merge(self):
+        timer1 = Timer(sample=TDigestSample())
+        timer2 = Timer(sample=TDigestSample())
+        for i in range(1000):
+            timer1._update(0.001)
+            timer2._update(0.1)
+        sample = timer1.hist.sample
+        sample.merge(timer2.hist.sample)
+        snapshot = sample.get_snapshot()
+        self.assertEqual(2000, snapshot.get_size())
+        self.assertAlmostEqual(0.001, snapshot.get_percentile(0.25))
+        self.assertAlmostEqual(0.1, snapshot.get_percentile(0.75))
+        self.assertEqual(0.1, snapshot.get_percentile(1))
+
+    def test__values(self):
+        sample = TDigestSample()
+        sample.update_many([3, 1, 2])
+        snapshot = sample.get_snapshot()
+        self.assertEqual([1, 2, 3], snapshot.values)
+        self.assertEqual(3, snapshot.get_size())
+
+    def test__empty(self):
+        snapshot = TDigestSample().get_snapshot()
+        self.assertEqual([], snapshot.values)
+        self.assertEqual(0, snapshot.get_size())
+        self.assertEqual(0, snapshot.get_median())
+        self.assertRaises(ValueError, snapshot.get_percentile, -0.5)
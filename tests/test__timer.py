@@ -1,9 +1,14 @@
-from pyformance.meters import Timer
+import json
+from array import array
+
+from pyformance.meters import Timer, FusedTimer, DeltaTimer, StripedMeter
 from tests import TimedTestCase
 
 
 class TimerTestCase(TimedTestCase):
 
+    merge_classes = (Timer, FusedTimer)
+
     def setUp(self):
         super(TimerTestCase, self).setUp()
         self.timer = Timer()
@@ -21,3 +26,92 @@ class TimerTestCase(TimedTestCase):
         self.timer.clear()
 
         self.assertEqual(self.timer.get_count(), 0)
+
+    def test__update_many(self):
+        self.timer.update_many(array("d", [1.0, 2.0, -1.0, 3.0]))
+        self.timer.update_many([4.0])
+        self.assertEqual(self.timer.get_count(), 4)
+        self.assertEqual(self.timer.get_sum(), 10.0)
+        self.assertEqual(self.timer.get_min(), 1.0)
+        self.assertEqual(self.timer.get_max(), 4.0)
+        self.assertAlmostEqual(self.timer.get_var(), 5.0 / 3)
+
+    def test__striped_meter(self):
+        timer = Timer(clock=self.clock, meter=StripedMeter(clock=self.clock))
+        with timer.time():
+            self.clock.add(1)
+        self.assertEqual(timer.get_count(), 1)
+        self.assertEqual(timer.meter.get_count(), 1)
+
+    def test__merge(self):
+        for cls in self.merge_classes:
+            timer = cls(clock=self.clock)
+            timer.update_many([1.0, 2.0])
+            other = self.timer.__class__(clock=self.clock)
+            other.update_many([3.0, 4.0])
+            self.clock.add(5)
+            timer.merge_state(json.loads(json.dumps(other.get_state())))
+            self.assertEqual(4, timer.get_count())
+            self.assertEqual(10.0, timer.get_sum())
+            self.assertEqual(1.0, timer.get_min())
+            self.assertEqual(4.0, timer.get_max())
+            self.assertAlmostEqual(5.0 / 3, timer.get_var())
+            self.assertEqual(4, timer.get_snapshot().get_size())
+            self.assertAlmostEqual(0.8, timer.get_one_minute_rate())
+
+    def test__compact(self):
+        context = self.timer.time()
+        for obj in (self.timer, self.timer.meter,
+                    self.timer.get_snapshot(), context):
+            self.assertFalse(hasattr(obj, "__dict__"), obj)
+
+
+class FusedTimerTestCase(TimerTestCase):
+
+    def setUp(self):
+        super(FusedTimerTestCase, self).setUp()
+        self.timer = FusedTimer()
+
+    def test__same_stats_as_timer(self):
+        fused = FusedTimer(clock=self.clock)
+        timer = Timer(clock=self.clock)
+        for i in range(100):
+            fused._update(i / 10.0)
+            timer._update(i / 10.0)
+        self.clock.add(5)
+        for getter in ("get_count", "get_sum", "get_max", "get_min",
+                       "get_mean", "get_stddev", "get_var", "get_mean_rate",
+                       "get_one_minute_rate", "get_five_minute_rate",
+                       "get_fifteen_minute_rate"):
+            self.assertAlmostEqual(getattr(timer, getter)(),
+                                   getattr(fused, getter)(), delta=0.000001)
+        self.assertEqual(timer.get_snapshot().get_size(),
+                         fused.get_snapshot().get_size())
+
+    def test__meter_is_marked_when_read(self):
+        fused = FusedTimer(clock=self.clock)
+        fused.update_many([0.1, 0.2])
+        fused._update(0.3)
+        self.assertEqual(3, fused.meter.get_count())
+        self.assertEqual(None, fused.hist)
+
+
+class DeltaTimerTestCase(TimerTestCase):
+
+    merge_classes = (DeltaTimer,)
+
+    def setUp(self):
+        super(DeltaTimerTestCase, self).setUp()
+        self.timer = DeltaTimer()
+
+    def test__rollover_keeps_rates(self):
+        self.timer = DeltaTimer(clock=self.clock)
+        self.timer.update_many([0.5, 2.0])
+        self.clock.add(5)
+        closed = self.timer.rollover()
+        self.assertEqual(2, closed.get_count())
+        self.assertEqual(2.0, closed.get_max())
+        self.assertEqual(0, self.timer.get_count())
+        self.assertEqual(0, self.timer.get_max())
+        self.assertEqual(2, self.timer.meter.get_count())
+        self.assertTrue(self.timer.get_one_minute_rate() > 0)